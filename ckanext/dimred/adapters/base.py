@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import logging
-from typing import Any
+import os
+from collections.abc import Callable, Iterator
+from typing import IO, Any
 
 import requests
 
@@ -15,10 +19,62 @@ from ckanext.dimred.exception import (
     DimredResourceSizeError,
     DimredResourceUrlError,
 )
+from ckanext.dimred.utils import timing as dimred_timing
+from ckanext.dimred.utils.metrics import get_metrics
 
 log = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 60
+CONTENT_CHUNK_SIZE = 1024 * 1024
+
+
+class _ContentDigest:
+    """Size, sha256 and trailing newline of content fed in chunks."""
+
+    def __init__(self) -> None:
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.last = b""
+
+    def update(self, chunk: bytes | memoryview) -> None:
+        if not chunk:
+            return
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        self.last = bytes(chunk[-1:])
+
+    def fingerprint(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "sha256": self.sha256.hexdigest(),
+            "ends_with_newline": self.last in (b"\n", b"\r"),
+        }
+
+
+class _HashingReader(io.RawIOBase):
+    """Read a local file while hashing it; on_complete gets the fingerprint at EOF."""
+
+    def __init__(self, path: str, on_complete: Callable[[dict[str, Any]], None]) -> None:
+        super().__init__()
+        self._file = open(path, "rb")  # noqa: SIM115 - closed in close()
+        self._digest = _ContentDigest()
+        self._on_complete: Callable[[dict[str, Any]], None] | None = on_complete
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        n_read = self._file.readinto(buffer)
+        if n_read:
+            self._digest.update(memoryview(buffer)[:n_read])
+        elif self._on_complete is not None:
+            self._on_complete(self._digest.fingerprint())
+            self._on_complete = None
+        return n_read
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
 
 
 class BaseAdapter:
@@ -31,6 +87,12 @@ class BaseAdapter:
     - HTTP fetching for remote resources
     """
 
+    #: whether read_appended_rows() can detect append-only file changes
+    supports_append = False
+
+    #: size/sha256 of the content read through open_content(), once fully read
+    content_fingerprint: dict[str, Any] | None = None
+
     def __init__(
         self,
         resource: dict[str, Any],
@@ -101,6 +163,29 @@ class BaseAdapter:
         readable_size = dimred_utils.printable_file_size(max_size_bytes)
         raise DimredResourceSizeError(readable_size)
 
+    def source_signature(self) -> str | None:
+        """Return a cheap identifier of the current content, without reading it.
+
+        Local files are identified by path, size and modification time.
+        Remote ones by URL and the size and modification date recorded on
+        the resource, so a remote file changed behind CKAN's back is only
+        noticed once frames cached under the old signature expire. Returns
+        None if the local file cannot be found.
+        """
+        if self.remote:
+            parts = [
+                self.filepath,
+                self.resource.get("size"),
+                self.resource.get("last_modified") or self.resource.get("metadata_modified"),
+            ]
+        else:
+            try:
+                stat = os.stat(self.filepath)
+            except OSError:
+                return None
+            parts = [self.filepath, stat.st_size, stat.st_mtime_ns]
+        return "|".join(str(part) for part in (type(self).__name__, self.resource.get("format"), *parts))
+
     def fetch_remote(self, url: str, max_bytes: int | None = None) -> bytes:
         """Make a GET request and return up to max_bytes (or full) content."""
         try:
@@ -108,6 +193,7 @@ class BaseAdapter:
                 resp.raise_for_status()
 
                 if max_bytes is None:
+                    get_metrics().inc("dimred_download_bytes_total", len(resp.content))
                     return resp.content
 
                 content: bytearray = bytearray()
@@ -117,10 +203,66 @@ class BaseAdapter:
                     content.extend(chunk)
                     if len(content) >= max_bytes:
                         break
+                get_metrics().inc("dimred_download_bytes_total", len(content))
                 return bytes(content)
         except requests.RequestException as e:
             raise DimredRemoteFetchError(str(e)) from e
 
+    def iter_content(self, chunk_size: int = CONTENT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the raw resource content in chunks, from disk or over HTTP."""
+        if not self.remote:
+            with open(self.filepath, "rb") as src:
+                while chunk := src.read(chunk_size):
+                    yield chunk
+            return
+
+        try:
+            with requests.get(self.filepath, timeout=DEFAULT_TIMEOUT, stream=True) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    get_metrics().inc("dimred_download_bytes_total", len(chunk))
+                    yield chunk
+        except requests.RequestException as e:
+            raise DimredRemoteFetchError(str(e)) from e
+
+    def open_content(self, seekable: bool = False) -> IO[bytes]:
+        """Open the resource content for parsing and fingerprint it on the way.
+
+        Local files are streamed through a hashing reader, so the
+        fingerprint costs no extra read; ``content_fingerprint`` is set once
+        the parser reaches the end of the file. Remote content is downloaded
+        in full (as before), and so is local content for parsers that need
+        to seek (spreadsheets).
+        """
+        if not self.remote and not seekable:
+            return io.BufferedReader(_HashingReader(self.filepath, self._set_content_fingerprint))
+
+        # streamed local files are read while parsing, only full reads count as download
+        with dimred_timing.span("download", remote=self.remote):
+            raw = self.fetch_remote(self.filepath) if self.remote else b"".join(self.iter_content())
+        digest = _ContentDigest()
+        digest.update(raw)
+        self.content_fingerprint = digest.fingerprint()
+        return io.BytesIO(raw)
+
+    def _set_content_fingerprint(self, fingerprint: dict[str, Any]) -> None:
+        self.content_fingerprint = fingerprint
+
+    def fingerprint(self) -> dict[str, Any]:
+        """Return size, sha256 and trailing-newline flag of the resource content."""
+        digest = _ContentDigest()
+        for chunk in self.iter_content():
+            digest.update(chunk)
+        return digest.fingerprint()
+
+    def read_appended_rows(self, fingerprint: dict[str, Any]) -> tuple[Any, dict[str, Any]] | None:
+        """Return rows appended since the content had the given fingerprint.
+
+        Returns a (rows, new fingerprint) pair, or None if the content was
+        changed in any other way than appending rows.
+        """
+        return None
+
     def get_dataframe(self):
         """Return a pandas.DataFrame representing the tabular data.
 
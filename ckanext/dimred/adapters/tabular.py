@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import io
 import logging
+from typing import Any
 
 import pandas as pd
 
@@ -10,6 +12,9 @@ from ckanext.dimred.exception import DimredError
 
 log = logging.getLogger(__name__)
 
+# dtype kinds of columns holding text, parsed as text when rows are appended
+TEXT_KINDS = ("O", "U", "S")
+
 
 class TabularAdapter(BaseAdapter):
     """Adapter for tabular resources (CSV, TSV, spreadsheets).
@@ -18,26 +23,29 @@ class TabularAdapter(BaseAdapter):
     dimred pipeline.
     """
 
+    appendable_formats = ("csv", "tsv")
+
+    @property
+    def supports_append(self) -> bool:
+        return (self.resource.get("format") or "").lower() in self.appendable_formats
+
     def get_dataframe(self) -> pd.DataFrame:
         """Load the resource content into a pandas.DataFrame."""
         self.validate_size_limit()
 
         res_format = (self.resource.get("format") or "").lower()
 
-        if self.remote:
-            raw = self.fetch_remote(self.filepath)
-            buffer = io.BytesIO(raw)
-        else:
-            buffer = self.filepath
-
         try:
-            if res_format in ("csv", "tsv"):
-                sep = "," if res_format == "csv" else "\t"
-                df = pd.read_csv(buffer, sep=sep, low_memory=False)
-            elif res_format in ("xls", "xlsx"):
-                df = pd.read_excel(buffer)
-            else:
-                df = pd.read_csv(buffer, low_memory=False)
+            with self.open_content(seekable=res_format in ("xls", "xlsx")) as buffer:
+                if res_format in ("csv", "tsv"):
+                    sep = "," if res_format == "csv" else "\t"
+                    df = pd.read_csv(buffer, sep=sep, low_memory=False)
+                elif res_format in ("xls", "xlsx"):
+                    df = pd.read_excel(buffer)
+                else:
+                    df = pd.read_csv(buffer, low_memory=False)
+        except DimredError:
+            raise
         except Exception as e:
             raise DimredError(str(e)) from e
 
@@ -73,3 +81,78 @@ class TabularAdapter(BaseAdapter):
             df = self.get_dataframe()
 
         return df.columns.tolist()
+
+    def read_appended_rows(self, fingerprint: dict[str, Any]) -> tuple[pd.DataFrame, dict[str, Any]] | None:
+        """Return rows appended to a CSV/TSV file since it had the given fingerprint.
+
+        The first ``fingerprint["size"]`` bytes must hash to the stored
+        sha256 and the appended bytes must start on a new line; only those
+        bytes are parsed, against the stored header (``fingerprint["columns"]``)
+        and with the dtypes the whole file was read with (``fingerprint["kinds"]``).
+        """
+        if not self.supports_append or not fingerprint.get("columns"):
+            return None
+        self.validate_size_limit()
+
+        appended = self._read_appended_bytes(fingerprint)
+        if appended is None:
+            return None
+
+        tail, new_fingerprint = appended
+        columns = fingerprint["columns"]
+        if not tail.strip():
+            return pd.DataFrame(columns=columns), new_fingerprint
+
+        df = self._parse_appended_bytes(tail, columns, fingerprint.get("kinds") or {})
+        return (df, new_fingerprint) if df is not None else None
+
+    def _read_appended_bytes(self, fingerprint: dict[str, Any]) -> tuple[bytes, dict[str, Any]] | None:
+        """Return the bytes after the fingerprinted prefix and the new fingerprint; None if the prefix changed."""
+        old_size = fingerprint["size"]
+        digest = hashlib.sha256()
+        consumed = 0
+        tail = bytearray()
+        for chunk in self.iter_content():
+            take = min(len(chunk), max(old_size - consumed, 0))
+            digest.update(chunk[:take])
+            consumed += take
+            tail.extend(chunk[take:])
+
+        if consumed < old_size or digest.hexdigest() != fingerprint["sha256"]:
+            return None
+        if tail and not fingerprint.get("ends_with_newline") and not tail.startswith((b"\n", b"\r")):
+            return None
+
+        digest.update(tail)
+        new_fingerprint = {
+            **fingerprint,
+            "size": old_size + len(tail),
+            "sha256": digest.hexdigest(),
+            "ends_with_newline": tail[-1:] in (b"\n", b"\r") if tail else fingerprint.get("ends_with_newline"),
+        }
+        return bytes(tail), new_fingerprint
+
+    def _parse_appended_bytes(self, tail: bytes, columns: list[str], kinds: dict[str, str]) -> pd.DataFrame | None:
+        """Parse appended CSV/TSV rows with the column dtypes of the whole file.
+
+        On their own, a few rows can infer other dtypes than the whole file
+        did (e.g. integers in a column of codes like ``"007"``), so text
+        columns are parsed as text and numeric columns as floats where the
+        file had floats. Values that are not numbers stay text in numeric
+        columns, for the schema check of the incremental update.
+        """
+        sep = "\t" if (self.resource.get("format") or "").lower() == "tsv" else ","
+        text = {position: str for position, column in enumerate(columns) if kinds.get(column) in TEXT_KINDS}
+        try:
+            df = pd.read_csv(io.BytesIO(tail), sep=sep, header=None, dtype=text, low_memory=False)
+        except (pd.errors.ParserError, UnicodeDecodeError, ValueError) as err:
+            log.info("Appended rows cannot be parsed: %s", err)
+            return None
+
+        if df.shape[1] != len(columns):
+            return None
+        df.columns = columns
+        for column in columns:
+            if kinds.get(column) == "f" and pd.api.types.is_integer_dtype(df[column]):
+                df[column] = df[column].astype(float)
+        return df
@@ -0,0 +1,148 @@
+/*
+ * Micro-benchmark of the data preparation of the dimred ECharts view.
+ *
+ * Compares building per-point option objects (what the view did before)
+ * with packing the embedding into a Float32Array and rewriting its color
+ * slot, and encoding color values client-side with decoding the codes the
+ * server precomputes. No browser needed:
+ *
+ *     node ckanext/dimred/assets/js/bench/dimred-data.bench.js [points]
+ */
+"use strict";
+
+var data = require("../dimred-data.js");
+
+var nPoints = parseInt(process.argv[2], 10) || 200000;
+var rounds = 5;
+
+var makeInput = function (n) {
+    var embedding = new Array(n);
+    var labels = new Array(n);
+    var numbers = new Array(n);
+    for (var i = 0; i < n; i++) {
+        embedding[i] = [Math.random() * 10, Math.random() * 10];
+        labels[i] = i % 97 === 0 ? null : "class " + (i % 12);
+        numbers[i] = i % 89 === 0 ? null : Math.random() * 100;
+    }
+    return {
+        embedding: embedding,
+        categorical: { name: "kind", kind: "categorical", values: labels },
+        numeric: { name: "value", kind: "numeric", values: numbers },
+    };
+};
+
+/* Per-point objects, rebuilt on every color change (the previous implementation). */
+var legacyCategorical = function (embedding, values) {
+    var colorMap = {};
+    var paletteIdx = 0;
+    return embedding.map(function (coords, idx) {
+        var label = values[idx];
+        var color = "#999999";
+        if (label !== null && label !== undefined && label !== "") {
+            if (!colorMap[label]) {
+                colorMap[label] = "color-" + (paletteIdx % 9);
+                paletteIdx += 1;
+            }
+            color = colorMap[label];
+        }
+        var c = coords.slice(0);
+        return { value: c, __coords: c, __colorValue: label, itemStyle: { color: color } };
+    });
+};
+
+var legacyNumeric = function (embedding, values) {
+    var finite = values.filter(function (v) {
+        return typeof v === "number" && isFinite(v);
+    });
+    Math.min.apply(null, finite.slice(0, 100000));
+    return embedding.map(function (coords, idx) {
+        var raw = values[idx];
+        var c = coords.slice(0);
+        var withColor = c.slice(0);
+        withColor.push(typeof raw === "number" && isFinite(raw) ? raw : null);
+        return { value: withColor, __coords: c, __colorValue: raw };
+    });
+};
+
+var time = function (label, fn) {
+    var best = Infinity;
+    for (var r = 0; r < rounds; r++) {
+        var started = process.hrtime.bigint();
+        fn();
+        best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    console.log(label.padEnd(40) + best.toFixed(1).padStart(8) + " ms");
+    return best;
+};
+
+var input = makeInput(nPoints);
+console.log(nPoints + " points, best of " + rounds);
+
+time("legacy: categorical objects", function () {
+    legacyCategorical(input.embedding, input.categorical.values);
+});
+time("legacy: numeric objects", function () {
+    legacyNumeric(input.embedding, input.numeric.values);
+});
+
+var packed;
+time("packed: pack embedding", function () {
+    packed = data.packEmbedding(input.embedding);
+});
+var categorical, numeric;
+time("packed: encode categorical (first use)", function () {
+    categorical = data.encodeCandidate(input.categorical, packed.length);
+});
+time("packed: encode numeric (first use)", function () {
+    numeric = data.encodeCandidate(input.numeric, packed.length);
+});
+time("packed: switch color (cached encoding)", function () {
+    data.writeColor(packed, categorical.codes);
+    data.writeColor(packed, numeric.codes);
+});
+
+/* The codes utils/colors.py sends: categorical palette indexes and uint8 quantized numbers. */
+var serverCandidates = function (n) {
+    var kinds = new Uint8Array(n);
+    var levels = new Uint8Array(n);
+    for (var i = 0; i < n; i++) {
+        kinds[i] = i % 97 === 0 ? 255 : i % 12;
+        levels[i] = i % 89 === 0 ? 255 : Math.round(Math.random() * 254);
+    }
+    var labels = [];
+    for (var k = 0; k < 12; k++) {
+        labels.push("class " + k);
+    }
+    return {
+        categorical: {
+            name: "kind",
+            kind: "categorical",
+            encoding: { dtype: "uint8", codes: Buffer.from(kinds.buffer).toString("base64"), missing: 255, labels: labels },
+        },
+        numeric: {
+            name: "value",
+            kind: "numeric",
+            min: 0,
+            max: 100,
+            encoding: { dtype: "uint8", codes: Buffer.from(levels.buffer).toString("base64"), missing: 255, levels: 254 },
+        },
+    };
+};
+
+var server = serverCandidates(nPoints);
+time("server codes: decode categorical", function () {
+    categorical = data.encodeCandidate(server.categorical, packed.length);
+});
+time("server codes: decode numeric", function () {
+    numeric = data.encodeCandidate(server.numeric, packed.length);
+});
+time("server codes: switch color", function () {
+    data.writeColor(packed, categorical.codes);
+    data.writeColor(packed, numeric.codes);
+});
+
+var kib = function (value) {
+    return (JSON.stringify(value).length / 1024).toFixed(0) + " KiB";
+};
+console.log("payload, categorical values vs codes: " + kib(input.categorical.values) + " vs " + kib(server.categorical.encoding));
+console.log("payload, numeric values vs codes:     " + kib(input.numeric.values) + " vs " + kib(server.numeric.encoding));
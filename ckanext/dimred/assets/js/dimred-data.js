@@ -0,0 +1,197 @@
+/*
+ * Data preparation for the dimred ECharts view.
+ *
+ * Points are packed into one flat Float32Array (x, y[, z], color per point)
+ * that ECharts reads directly, so no per-point objects are
+ * created. Switching the color column only rewrites the color slot of every
+ * point; each column is encoded once and reused.
+ *
+ * Color candidates computed by the server carry an ``encoding``: per-point
+ * uint8/uint16 codes (palette indexes, or numeric values quantized between
+ * min and max) as base64. Those are only decoded, never re-derived from the
+ * raw values; the encode* functions remain for results cached without them.
+ *
+ * Plain functions without DOM or jQuery access, so the same file runs in
+ * the browser (window.dimredData) and under node (module.exports) for the
+ * micro-benchmark in bench/.
+ */
+(function (root, factory) {
+    "use strict";
+    var api = factory();
+    if (typeof module === "object" && module.exports) {
+        module.exports = api;
+    } else {
+        root.dimredData = api;
+    }
+})(this, function () {
+    "use strict";
+
+    // color slot value of points without a category
+    var MISSING_CODE = -1;
+
+    var isMissing = function (value) {
+        return value === null || value === undefined || value === "";
+    };
+
+    /* Copy embedding rows into a flat Float32Array with a spare color slot per point. */
+    var packEmbedding = function (embedding) {
+        var length = embedding.length;
+        var first = embedding[0] || [];
+        var dims = first.length >= 3 ? 3 : 2;
+        var stride = dims + 1;
+        var buffer = new Float32Array(length * stride);
+        for (var i = 0, base = 0; i < length; i++, base += stride) {
+            var row = embedding[i];
+            for (var d = 0; d < dims; d++) {
+                buffer[base + d] = row[d];
+            }
+        }
+        return { buffer: buffer, stride: stride, dims: dims, length: length };
+    };
+
+    /* Map labels to palette indexes: known labels first, then in order of appearance. */
+    var encodeCategorical = function (values, length, knownLabels) {
+        var codes = new Float32Array(length);
+        var labels = [];
+        var index = Object.create(null);
+        var add = function (label) {
+            var key = String(label);
+            if (!(key in index)) {
+                index[key] = labels.length;
+                labels.push(label);
+            }
+            return index[key];
+        };
+        (knownLabels || []).forEach(function (label) {
+            if (!isMissing(label)) {
+                add(label);
+            }
+        });
+        for (var i = 0; i < length; i++) {
+            var label = i < values.length ? values[i] : null;
+            codes[i] = isMissing(label) ? MISSING_CODE : add(label);
+        }
+        return { kind: "categorical", codes: codes, labels: labels, values: values };
+    };
+
+    /* Keep numeric values as codes; missing ones get a value below min (drawn as out of range). */
+    var encodeNumeric = function (values, length, min, max) {
+        var codes = new Float32Array(length);
+        var known = [];
+        var i, value;
+        var lo = typeof min === "number" && isFinite(min) ? min : Infinity;
+        var hi = typeof max === "number" && isFinite(max) ? max : -Infinity;
+        for (i = 0; i < length; i++) {
+            value = i < values.length ? values[i] : null;
+            if (typeof value === "number" && isFinite(value)) {
+                known.push(i);
+                if (value < lo) {
+                    lo = value;
+                }
+                if (value > hi) {
+                    hi = value;
+                }
+            }
+        }
+        if (!known.length && lo > hi) {
+            return null;
+        }
+        var missing = lo - Math.max(hi - lo, 1);
+        codes.fill(missing);
+        for (i = 0; i < known.length; i++) {
+            codes[known[i]] = values[known[i]];
+        }
+        return { kind: "numeric", codes: codes, min: lo, max: hi, values: values };
+    };
+
+    var CODE_ARRAYS = { uint8: Uint8Array, uint16: Uint16Array };
+
+    /* Decode base64 little-endian codes into a typed array of the given dtype. */
+    var decodeCodes = function (base64, dtype) {
+        var binary = typeof atob === "function" ? atob(base64) : Buffer.from(base64, "base64").toString("binary");
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        // typed arrays use the platform byte order, little-endian on every browser platform
+        return new CODE_ARRAYS[dtype](bytes.buffer);
+    };
+
+    /* Wrap a server-side encoding ({dtype, codes, missing, labels | levels}) of a candidate. */
+    var decodeCandidate = function (candidate) {
+        var encoding = candidate.encoding;
+        if (!CODE_ARRAYS[encoding.dtype]) {
+            return null;
+        }
+        var decoded = {
+            kind: candidate.kind === "numeric" ? "numeric" : "categorical",
+            codes: decodeCodes(encoding.codes, encoding.dtype),
+            missing: encoding.missing,
+        };
+        if (decoded.kind === "numeric") {
+            decoded.levels = encoding.levels;
+            decoded.min = candidate.min;
+            decoded.max = candidate.max;
+        } else {
+            decoded.labels = encoding.labels || [];
+        }
+        return decoded;
+    };
+
+    /* Return the value a quantized numeric code stands for. */
+    var dequantize = function (encoding, code) {
+        return encoding.min + (code / encoding.levels) * (encoding.max - encoding.min);
+    };
+
+    /* Encode a color candidate ({name, kind, values | encoding, ...}) for length points; null if unusable. */
+    var encodeCandidate = function (candidate, length) {
+        if (candidate.encoding) {
+            var decoded = decodeCandidate(candidate);
+            if (decoded && decoded.codes.length === length) {
+                return decoded;
+            }
+        }
+        var values = Array.isArray(candidate.values) ? candidate.values : [];
+        if (candidate.kind === "numeric") {
+            return encodeNumeric(values, length, candidate.min, candidate.max);
+        }
+        return encodeCategorical(values, length, candidate.unique_values);
+    };
+
+    /* Write per-point codes into the color slot of a packed embedding. */
+    var writeColor = function (packed, codes) {
+        var buffer = packed.buffer;
+        var stride = packed.stride;
+        for (var i = 0, slot = packed.dims; i < packed.length; i++, slot += stride) {
+            buffer[slot] = codes ? codes[i] : 0;
+        }
+    };
+
+    /* Return the tooltip value of point idx for an encoding. */
+    var colorLabel = function (encoding, idx) {
+        if (!encoding) {
+            return null;
+        }
+        var code = encoding.codes[idx];
+        if (encoding.kind === "categorical") {
+            return code === MISSING_CODE || code === encoding.missing ? null : encoding.labels[code];
+        }
+        if (encoding.levels) {
+            return code === encoding.missing ? null : dequantize(encoding, code);
+        }
+        var value = encoding.values[idx];
+        return typeof value === "number" && isFinite(value) ? value : null;
+    };
+
+    return {
+        MISSING_CODE: MISSING_CODE,
+        packEmbedding: packEmbedding,
+        encodeCategorical: encodeCategorical,
+        encodeNumeric: encodeNumeric,
+        decodeCodes: decodeCodes,
+        dequantize: dequantize,
+        encodeCandidate: encodeCandidate,
+        writeColor: writeColor,
+        colorLabel: colorLabel,
+    };
+});
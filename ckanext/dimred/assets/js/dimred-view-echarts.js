@@ -1,16 +1,67 @@
 this.ckan.module("dimred-view-echarts", function ($) {
     "use strict";
+
+    var palette = [
+        "#5470c6",
+        "#91cc75",
+        "#fac858",
+        "#ee6666",
+        "#73c0de",
+        "#3ba272",
+        "#fc8452",
+        "#9a60b4",
+        "#ea7ccc",
+    ];
+    var baseColor = palette[0];
+    var missingColor = "#999999";
+    var numericRange = ["#d2e9f7", "#0b62c3"];
+
+    // 2D embeddings with at least this many points are drawn with WebGL (scatterGL)
+    var GL_THRESHOLD = 20000;
+    // canvas scatter series are drawn in chunks of this many points, so the
+    // page stays responsive (ECharts' "large" mode would be faster but
+    // ignores per-point colors)
+    var PROGRESSIVE_CHUNK = 10000;
+
+    // libraries are loaded once per page, even if several views need them
+    var scripts = {};
+    var loadScript = function (url) {
+        if (!scripts[url]) {
+            var loaded = $.Deferred();
+            var script = document.createElement("script");
+            script.src = url;
+            script.async = true;
+            script.onload = function () {
+                loaded.resolve();
+            };
+            script.onerror = function () {
+                loaded.reject();
+            };
+            document.head.appendChild(script);
+            scripts[url] = loaded.promise();
+        }
+        return scripts[url];
+    };
+
+    var symbolSize = function (length) {
+        if (length > 100000) {
+            return 2;
+        }
+        return length > 10000 ? 4 : 6;
+    };
+
     return {
+        chart: null,
+
         initialize: function () {
             var container = $("#dimred-js-render");
-            var selectContainer = $("#dimred-color-select");
 
             if (!container.length) {
                 console.error("dimred-view-echarts: container not found");
                 return;
             }
-            if (!window.echarts) {
-                console.error("dimred-view-echarts: echarts not available");
+            if (!window.dimredData) {
+                console.error("dimred-view-echarts: dimred-data.js not loaded");
                 return;
             }
 
@@ -27,334 +78,276 @@ this.ckan.module("dimred-view-echarts", function ($) {
                 return;
             }
 
+            var self = this;
+            $(window).on("resize", function () {
+                if (self.chart) {
+                    self.chart.resize();
+                }
+            });
+
+            container.text("Loading chart…");
+            // ECharts is fetched only once the page (summary included) is painted
+            window.requestAnimationFrame(function () {
+                window.setTimeout(function () {
+                    self.show(container, embedding, meta);
+                    if (meta.provisional && container.attr("data-poll-url")) {
+                        self.pollFinal(container);
+                    }
+                }, 0);
+            });
+        },
+
+        /* Load the libraries an embedding needs, then render it. */
+        show: function (container, embedding, meta) {
+            var self = this;
+            this.loadLibraries(container, embedding)
+                .done(function () {
+                    self.render(container, embedding, meta);
+                })
+                .fail(function () {
+                    console.error("dimred-view-echarts: echarts not available");
+                    container.text("Failed to render embedding (chart library not available).");
+                });
+        },
+
+        /*
+         * Load ECharts, and echarts-gl for 3D embeddings or 2D ones large
+         * enough for WebGL. A 2D view is drawn on canvas if echarts-gl fails.
+         */
+        loadLibraries: function (container, embedding) {
+            var first = (embedding && embedding[0]) || [];
+            var is3D = first.length >= 3;
+            var wantsGL = is3D || embedding.length >= GL_THRESHOLD;
+            var echartsLoaded = window.echarts ? $.when() : loadScript(container.attr("data-echarts-url"));
+
+            return echartsLoaded.then(function () {
+                if (!wantsGL || window["echarts-gl"]) {
+                    return $.when();
+                }
+                var glLoaded = loadScript(container.attr("data-echarts-gl-url"));
+                return is3D ? glLoaded : glLoaded.then(null, function () {
+                    return $.when();
+                });
+            });
+        },
+
+        /* Poll the preview action until the final embedding replaces the provisional one. */
+        pollFinal: function (container) {
+            var self = this;
+            var url = container.attr("data-poll-url");
+            var interval = (parseInt(container.attr("data-poll-interval"), 10) || 5) * 1000;
+
+            var poll = function () {
+                $.getJSON(url)
+                    .done(function (response) {
+                        var result = response && response.result;
+                        if (!result || !result.meta || result.meta.provisional) {
+                            window.setTimeout(poll, interval);
+                            return;
+                        }
+                        self.show(container, result.embedding, result.meta);
+                        var notice = $("#dimred-provisional-notice");
+                        notice.text(notice.attr("data-final-text"));
+                        $(".dimred-summary").hide();
+                    })
+                    .fail(function (xhr) {
+                        // a failing final embedding keeps the provisional one on screen
+                        console.error("dimred-view-echarts: cannot load the final embedding", xhr.status);
+                    });
+            };
+            window.setTimeout(poll, interval);
+        },
+
+        render: function (container, embedding, meta) {
+            var data = window.dimredData;
+            var selectContainer = $("#dimred-color-select");
+
             if (!embedding || !embedding.length) {
                 container.text("No embedding data available.");
                 return;
             }
 
             var prepareInfo = meta.prepare_info || {};
-            var colorCandidatesRaw = prepareInfo.color_candidates;
-            var colorCandidates = Array.isArray(colorCandidatesRaw) ? colorCandidatesRaw : [];
+            var colorCandidates = Array.isArray(prepareInfo.color_candidates) ? prepareInfo.color_candidates : [];
+            if (!colorCandidates.length && prepareInfo.color_by && Array.isArray(prepareInfo.color_values)) {
+                // results cached before color candidates existed
+                colorCandidates = [
+                    { name: prepareInfo.color_by, kind: "categorical", values: prepareInfo.color_values },
+                ];
+            }
             var defaultColorBy = prepareInfo.color_by || "";
-            var legacyColorValues = prepareInfo.color_values || [];
-
-            var palette = [
-                "#5470c6",
-                "#91cc75",
-                "#fac858",
-                "#ee6666",
-                "#73c0de",
-                "#3ba272",
-                "#fc8452",
-                "#9a60b4",
-                "#ea7ccc",
-            ];
-            var baseColor = palette[0];
-            var missingColor = "#999999";
-
-            var firstPoint = embedding[0] || [];
-            var is3D = Array.isArray(firstPoint) && firstPoint.length >= 3;
+
+            var packed = data.packEmbedding(embedding);
+            var is3D = packed.dims === 3;
             var dimNames = is3D ? ["x", "y", "z"] : ["x", "y"];
-            var baseCoords = [];
-            $.each(embedding, function (_, coords) {
-                if (is3D) {
-                    baseCoords.push([coords[0], coords[1], coords[2]]);
-                } else {
-                    baseCoords.push([coords[0], coords[1]]);
-                }
-            });
+            var useGL = !is3D && packed.length >= GL_THRESHOLD && !!window["echarts-gl"];
 
-            var colorState = { name: null, kind: null };
             var candidateMap = {};
             $.each(colorCandidates, function (_, cand) {
                 if (cand && cand.name) {
                     candidateMap[cand.name] = cand;
                 }
             });
+            // each column is encoded on first use only
+            var encodings = {};
+            var colorState = { name: null, encoding: null };
 
             var tooltipFormatter = function (params) {
-                var coords = (params.data && params.data.__coords) || params.value || [];
+                var idx = params.dataIndex;
+                var base = idx * packed.stride;
                 var lines = [];
-                lines.push(dimNames[0] + ": " + coords[0]);
-                lines.push(dimNames[1] + ": " + coords[1]);
-                if (is3D && coords.length > 2) {
-                    lines.push(dimNames[2] + ": " + coords[2]);
+                for (var d = 0; d < packed.dims; d++) {
+                    lines.push(dimNames[d] + ": " + packed.buffer[base + d]);
+                }
+                var colorVal = data.colorLabel(colorState.encoding, idx);
+                if (colorVal !== null && colorState.encoding.levels) {
+                    // quantized server-side: the value is only known to one step
+                    colorVal = "≈ " + Number(colorVal.toPrecision(4));
                 }
-                var colorVal = params.data ? params.data.__colorValue : null;
-                if (colorState.name && colorVal !== undefined && colorVal !== null && colorVal !== "") {
+                if (colorState.name && colorVal !== null && colorVal !== "") {
                     lines.push(colorState.name + ": " + colorVal);
                 }
                 return lines.join("<br/>");
             };
 
-            var baseSeries = {
-                type: is3D ? "scatter3D" : "scatter",
-                symbolSize: 6,
-                data: $.map(baseCoords, function (coords) {
-                    var c = (coords || []).slice(0);
-                    return { value: c, __coords: c };
-                }),
+            var series = {
+                type: is3D ? "scatter3D" : useGL ? "scatterGL" : "scatter",
+                symbolSize: symbolSize(packed.length),
+                dimensions: dimNames.concat(["color"]),
                 encode: is3D ? { x: 0, y: 1, z: 2 } : { x: 0, y: 1 },
+                data: packed.buffer,
+                itemStyle: { color: baseColor },
             };
+            if (!is3D && !useGL) {
+                series.progressive = PROGRESSIVE_CHUNK;
+                series.progressiveThreshold = PROGRESSIVE_CHUNK;
+            }
 
-            var option;
+            var option = {
+                tooltip: { trigger: "item", formatter: tooltipFormatter },
+                series: [series],
+                visualMap: [],
+            };
             if (is3D) {
-                option = {
-                    tooltip: {
-                        trigger: "item",
-                        formatter: tooltipFormatter,
-                    },
-                    xAxis3D: { type: "value", name: dimNames[0] },
-                    yAxis3D: { type: "value", name: dimNames[1] },
-                    zAxis3D: { type: "value", name: dimNames[2] },
-                    grid3D: {
-                        viewControl: {
-                            projection: "perspective",
-                            rotateSensitivity: 1,
-                            zoomSensitivity: 1,
-                            panSensitivity: 1,
-                        },
+                option.xAxis3D = { type: "value", name: dimNames[0] };
+                option.yAxis3D = { type: "value", name: dimNames[1] };
+                option.zAxis3D = { type: "value", name: dimNames[2] };
+                option.grid3D = {
+                    viewControl: {
+                        projection: "perspective",
+                        rotateSensitivity: 1,
+                        zoomSensitivity: 1,
+                        panSensitivity: 1,
                     },
-                    series: [baseSeries],
-                    visualMap: [],
                 };
             } else {
-                option = {
-                    tooltip: {
-                        trigger: "item",
-                        formatter: tooltipFormatter,
-                    },
-                    xAxis: { type: "value", name: dimNames[0] },
-                    yAxis: { type: "value", name: dimNames[1] },
-                    dataZoom: [
-                        { type: "inside", filterMode: "none" },
-                        { type: "slider", filterMode: "none" },
-                    ],
-                    series: [baseSeries],
-                    visualMap: [],
-                };
+                option.xAxis = { type: "value", name: dimNames[0], scale: true };
+                option.yAxis = { type: "value", name: dimNames[1], scale: true };
+                option.dataZoom = [
+                    { type: "inside", filterMode: "none" },
+                    { type: "slider", filterMode: "none" },
+                ];
             }
 
-            var chart = echarts.init(container[0]);
-            var baseOption = option;
-
-            try {
-                var cloneBaseOption = function () {
-                    return $.extend(true, {}, baseOption);
-                };
-
-                chart.setOption(baseOption, true);
-
-                var setColorState = function (name, kind) {
-                    colorState.name = name || null;
-                    colorState.kind = kind || null;
-                };
-
-                var applyUniformColor = function () {
-                    var data = $.map(baseCoords, function (coords) {
-                        var c = (coords || []).slice(0);
-                        return { value: c, __coords: c, __colorValue: null, itemStyle: { color: baseColor } };
-                    });
-                    setColorState(null, null);
-                    var newOption = cloneBaseOption();
-                    newOption.visualMap = [];
-                    newOption.series[0].data = data;
-                    chart.setOption(newOption, true);
-                };
-
-                var applyCategorical = function (candidate) {
-                    var values = Array.isArray(candidate.values) ? candidate.values : [];
-                    var knownValues = Array.isArray(candidate.unique_values) ? candidate.unique_values : [];
-                    var data = [];
-                    var paletteIdx = 0;
-                    var colorMap = {};
-
-                    $.each(knownValues, function (_, v) {
-                        if (v === null || v === undefined || v === "") {
-                            return;
-                        }
-                        if (!colorMap[v]) {
-                            colorMap[v] = palette[paletteIdx % palette.length];
-                            paletteIdx += 1;
-                        }
-                    });
-
-                    $.each(baseCoords, function (idx, coords) {
-                        var label = idx < values.length ? values[idx] : null;
-                        var itemColor = null;
-                        if (label !== null && label !== undefined && label !== "") {
-                            if (!colorMap[label]) {
-                                colorMap[label] = palette[paletteIdx % palette.length];
-                                paletteIdx += 1;
-                            }
-                            itemColor = colorMap[label];
-                        }
-                        var c = (coords || []).slice(0);
-                        data.push({
-                            value: c,
-                            __coords: c,
-                            __colorValue: label,
-                            itemStyle: { color: itemColor || missingColor },
-                        });
-                    });
-
-                    setColorState(candidate.name, "categorical");
-                    var newOption = cloneBaseOption();
-                    newOption.visualMap = [];
-                    newOption.series[0].data = data;
-                    chart.setOption(newOption, true);
-                };
-
-                var applyNumeric = function (candidate) {
-                    var values = Array.isArray(candidate.values) ? candidate.values : [];
-                    var numericValues = [];
-                    $.each(values, function (_, val) {
-                        if (typeof val === "number" && isFinite(val)) {
-                            numericValues.push(val);
-                        }
-                    });
-
-                    var minVal =
-                        typeof candidate.min === "number" && isFinite(candidate.min)
-                            ? candidate.min
-                            : numericValues.length
-                            ? Math.min.apply(null, numericValues)
-                            : null;
-                    var maxVal =
-                        typeof candidate.max === "number" && isFinite(candidate.max)
-                            ? candidate.max
-                            : numericValues.length
-                            ? Math.max.apply(null, numericValues)
-                            : null;
-
-                    if (minVal === null || maxVal === null) {
-                        applyUniformColor();
-                        return;
-                    }
-
-                    var data = [];
-                    $.each(baseCoords, function (idx, coords) {
-                        var rawVal = idx < values.length ? values[idx] : null;
-                        var numericVal = typeof rawVal === "number" && isFinite(rawVal) ? rawVal : null;
-                        var c = (coords || []).slice(0);
-                        var valueWithColor = c.slice(0);
-                        valueWithColor.push(numericVal);
-                        data.push({
-                            value: valueWithColor,
-                            __coords: c,
-                            __colorValue: numericVal,
-                        });
-                    });
-
-                    setColorState(candidate.name, "numeric");
-                    var newOption = cloneBaseOption();
-                    newOption.visualMap = [
+            var visualMapFor = function (encoding) {
+                if (!encoding) {
+                    return [];
+                }
+                if (encoding.kind === "numeric") {
+                    // quantized codes span 0..levels; the handles show the values they stand for
+                    var quantized = !!encoding.levels;
+                    return [
                         {
                             type: "continuous",
-                            min: minVal,
-                            max: maxVal,
-                            dimension: is3D ? 3 : 2,
+                            min: quantized ? 0 : encoding.min,
+                            max: quantized ? encoding.levels : encoding.max,
+                            formatter: quantized
+                                ? function (code) {
+                                      return String(Number(data.dequantize(encoding, code).toPrecision(4)));
+                                  }
+                                : undefined,
+                            dimension: packed.dims,
                             calculable: true,
-                            inRange: {
-                                color: ["#d2e9f7", "#0b62c3"],
-                            },
+                            inRange: { color: numericRange },
+                            outOfRange: { color: missingColor },
                             seriesIndex: 0,
                         },
                     ];
-                    newOption.series[0].data = data;
-                    chart.setOption(newOption, true);
-                };
-
-                var applyColor = function (columnName) {
-                    if (!columnName) {
-                        applyUniformColor();
-                        return;
-                    }
-                    var candidate = candidateMap[columnName];
-                    if (!candidate) {
-                        applyUniformColor();
-                        return;
-                    }
-                    if (candidate.kind === "numeric") {
-                        applyNumeric(candidate);
-                    } else {
-                        applyCategorical(candidate);
-                    }
-                };
+                }
+                return [
+                    {
+                        type: "piecewise",
+                        show: false,
+                        dimension: packed.dims,
+                        pieces: $.map(encoding.labels, function (label, code) {
+                            return { value: code, label: String(label), color: palette[code % palette.length] };
+                        }),
+                        outOfRange: { color: missingColor },
+                        seriesIndex: 0,
+                    },
+                ];
+            };
 
-                var buildSelector = function () {
-                    if (!colorCandidates.length || !selectContainer || !selectContainer.length) {
-                        return null;
+            if (!this.chart) {
+                container.empty();
+                this.chart = echarts.init(container[0]);
+            }
+            var chart = this.chart;
+
+            /* Recolor by rewriting the color slot of the shared buffer and swapping the visual map. */
+            var applyColor = function (columnName) {
+                var candidate = columnName ? candidateMap[columnName] : null;
+                var encoding = null;
+                if (candidate) {
+                    if (!(columnName in encodings)) {
+                        encodings[columnName] = data.encodeCandidate(candidate, packed.length);
                     }
+                    encoding = encodings[columnName];
+                }
+                colorState.name = encoding ? columnName : null;
+                colorState.encoding = encoding;
+                data.writeColor(packed, encoding && encoding.codes);
+                chart.setOption(
+                    { series: [{ data: packed.buffer }], visualMap: visualMapFor(encoding) },
+                    { replaceMerge: ["visualMap"] }
+                );
+            };
 
-                    var selectId = "dimred-color-select-input";
-                    var label = $('<label class="dimred-color-select__label" for="' + selectId + '">Color by</label>');
-                    var select = $('<select class="form-control dimred-color-select__control" id="' + selectId + '"></select>');
-                    select.append('<option value="">None</option>');
+            var buildSelector = function () {
+                if (!colorCandidates.length || !selectContainer || !selectContainer.length) {
+                    return null;
+                }
 
-                    $.each(colorCandidates, function (_, cand) {
-                        if (!cand || !cand.name) {
-                            return;
-                        }
-                        var optionEl = $("<option></option>").attr("value", cand.name).text(cand.name);
-                        select.append(optionEl);
-                    });
+                var selectId = "dimred-color-select-input";
+                var label = $('<label class="dimred-color-select__label" for="' + selectId + '">Color by</label>');
+                var select = $('<select class="form-control dimred-color-select__control" id="' + selectId + '"></select>');
+                select.append('<option value="">None</option>');
 
-                    select.on("change", function () {
-                        applyColor($(this).val());
-                    });
+                $.each(colorCandidates, function (_, cand) {
+                    if (!cand || !cand.name) {
+                        return;
+                    }
+                    var optionEl = $("<option></option>").attr("value", cand.name).text(cand.name);
+                    select.append(optionEl);
+                });
 
-                    selectContainer.empty().append(label).append(select);
-                    return select;
-                };
+                select.on("change", function () {
+                    applyColor($(this).val());
+                });
 
-                var applyLegacyColor = function () {
-                    var colorBy = prepareInfo.color_by || "";
-                    var hasLabels = colorBy && legacyColorValues.length === baseCoords.length;
-                    var data = [];
-                    var colorMap = {};
-                    var paletteIdx = 0;
-
-                    $.each(baseCoords, function (idx, coords) {
-                        var label = hasLabels ? legacyColorValues[idx] : null;
-                        var color = baseColor;
-                        if (label !== null && label !== undefined && label !== "") {
-                            if (!colorMap[label]) {
-                                colorMap[label] = palette[paletteIdx % palette.length];
-                                paletteIdx += 1;
-                            }
-                            color = colorMap[label];
-                        }
-                        var c = (coords || []).slice(0);
-                        data.push({
-                            value: c,
-                            __coords: c,
-                            __colorValue: label,
-                            itemStyle: { color: color },
-                        });
-                    });
+                selectContainer.empty().append(label).append(select);
+                return select;
+            };
 
-                    setColorState(hasLabels ? colorBy : null, hasLabels ? "categorical" : null);
-                    var newOption = cloneBaseOption();
-                    newOption.visualMap = [];
-                    newOption.series[0].data = data;
-                    chart.setOption(newOption, true);
-                };
+            try {
+                chart.setOption(option, true);
 
-                if (colorCandidates.length) {
-                    var selector = buildSelector();
-                    var initialValue = defaultColorBy && candidateMap[defaultColorBy] ? defaultColorBy : "";
-                    applyColor(initialValue);
-                    if (selector) {
-                        selector.val(initialValue);
-                    }
-                } else {
-                    applyLegacyColor();
+                var selector = buildSelector();
+                var initialValue = defaultColorBy && candidateMap[defaultColorBy] ? defaultColorBy : "";
+                applyColor(initialValue);
+                if (selector) {
+                    selector.val(initialValue);
                 }
-
-                $(window).on("resize", function () {
-                    chart.resize();
-                });
             } catch (err) {
                 console.error("dimred-view-echarts: failed to render chart", err);
                 container.text("Failed to render embedding (chart error).");
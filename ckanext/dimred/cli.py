@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any
+
+import click
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred import jobs
+
+__all__ = ["dimred"]
+
+
+class DatasetNotFoundError(click.BadParameter):
+    """Raised when a --dataset option names a dataset that does not exist."""
+
+    default_message = "Dataset {} not found"
+
+    def __init__(self, name_or_id: str) -> None:
+        super().__init__(self.default_message.format(name_or_id), param_hint="--dataset")
+
+
+@click.group(short_help="Dimensionality reduction preview commands.")
+def dimred():
+    pass
+
+
+@dimred.command("warm-cache")
+@click.option(
+    "-d",
+    "--dataset",
+    "datasets",
+    multiple=True,
+    help="Dataset id or name to warm (repeatable). Defaults to all datasets.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Views computed in parallel (defaults to ckanext.dimred.prewarm_workers).",
+)
+@click.pass_context
+def warm_cache(ctx: click.Context, datasets: tuple[str, ...], workers: int | None):
+    """Compute and cache the embeddings of dimred views.
+
+    Useful after a deploy or a Redis flush, so the first visitors do not pay
+    the full pipeline latency.
+    """
+    dataset_ids = [_dataset_id(name) for name in datasets]
+    views = jobs.iter_dimred_views(dataset_ids)
+    if not views:
+        click.secho("No dimred views found", fg="yellow")
+        return
+
+    workers = workers or dimred_config.prewarm_workers()
+    click.secho(f"Warming {len(views)} dimred view(s) with {workers} worker(s)", fg="green")
+
+    failed = 0
+    # the pipeline spends most of its time in numpy/scikit-learn/numba code
+    # that releases the GIL, so threads are enough to use several cores
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_warm_view, ctx.meta["flask_app"], resource_id, view): view["id"]
+            for resource_id, view in views
+        }
+        with click.progressbar(as_completed(futures), length=len(futures)) as bar:
+            for future in bar:
+                if not future.result():
+                    failed += 1
+
+    if failed:
+        click.secho(f"{failed} view(s) failed, see the log for details", fg="red")
+    click.secho(f"Warmed {len(views) - failed} view(s)", fg="green")
+
+
+def _warm_view(flask_app: Any, resource_id: str, view: dict[str, Any]) -> bool:
+    with flask_app.test_request_context():
+        return jobs.warm_view(resource_id, view)
+
+
+def _dataset_id(name_or_id: str) -> str:
+    try:
+        return tk.get_action("package_show")({"ignore_auth": True}, {"id": name_or_id})["id"]
+    except tk.ObjectNotFound as err:
+        raise DatasetNotFoundError(name_or_id) from err
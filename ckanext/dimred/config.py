@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+
 import ckan.plugins.toolkit as tk
 
 DEFAULT_METHOD = "ckanext.dimred.default_method"
@@ -7,16 +9,47 @@ ALLOWED_METHODS = "ckanext.dimred.allowed_methods"
 
 MAX_FILE_SIZE_MB = "ckanext.dimred.max_file_size_mb"
 MAX_ROWS = "ckanext.dimred.max_rows"
+SAMPLING_STRATEGY = "ckanext.dimred.sampling_strategy"
+SAMPLING_CLASS_CAP = "ckanext.dimred.sampling_class_cap"
+MAX_MEMORY_MB = "ckanext.dimred.max_memory_mb"
+JOB_MEMORY_LIMIT_MB = "ckanext.dimred.job_memory_limit_mb"
 
 ENABLE_CATEGORICAL = "ckanext.dimred.enable_categorical"
 MAX_CATEGORIES_FOR_OHE = "ckanext.dimred.max_categories_for_ohe"
+SPARSE_MAX_DENSITY = "ckanext.dimred.sparse_max_density"
 CACHE_ENABLED = "ckanext.dimred.cache_enabled"
 CACHE_TTL = "ckanext.dimred.cache_ttl"
 EXPORT_ENABLED = "ckanext.dimred.export_enabled"
 RENDER_BACKEND = "ckanext.dimred.render_backend"
 RENDER_ASSET = "ckanext.dimred.render_asset"
 RENDER_MODULE = "ckanext.dimred.render_module"
+ECHARTS_URL = "ckanext.dimred.echarts_url"
+ECHARTS_GL_URL = "ckanext.dimred.echarts_gl_url"
 EMBEDDING_DECIMALS = "ckanext.dimred.embedding_decimals"
+MODEL_STORE_ENABLED = "ckanext.dimred.model_store_enabled"
+MODEL_STORE_PATH = "ckanext.dimred.model_store_path"
+TRANSFORM_MAX_ROWS = "ckanext.dimred.transform_max_rows"
+INCREMENTAL_ENABLED = "ckanext.dimred.incremental_enabled"
+INCREMENTAL_DRIFT_THRESHOLD = "ckanext.dimred.incremental_drift_threshold"
+PREWARM_ENABLED = "ckanext.dimred.prewarm_enabled"
+PREWARM_QUEUE = "ckanext.dimred.prewarm_queue"
+PREWARM_WORKERS = "ckanext.dimred.prewarm_workers"
+EXECUTION_BACKEND = "ckanext.dimred.execution_backend"
+PROCESS_WORKERS = "ckanext.dimred.process_workers"
+PROCESS_TIMEOUT = "ckanext.dimred.process_timeout"
+PROCESS_MEMORY_LIMIT_MB = "ckanext.dimred.process_memory_limit_mb"
+FRAME_CACHE_MB = "ckanext.dimred.frame_cache_mb"
+FRAME_CACHE_TTL = "ckanext.dimred.frame_cache_ttl"
+BATCH_MAX_ITEMS = "ckanext.dimred.batch_max_items"
+BATCH_WORKERS = "ckanext.dimred.batch_workers"
+PROGRESSIVE_ENABLED = "ckanext.dimred.progressive_enabled"
+PROGRESSIVE_METHOD = "ckanext.dimred.progressive_method"
+PROGRESSIVE_MAX_ROWS = "ckanext.dimred.progressive_max_rows"
+PROGRESSIVE_POLL_INTERVAL = "ckanext.dimred.progressive_poll_interval"
+OPENTELEMETRY_ENABLED = "ckanext.dimred.opentelemetry_enabled"
+METRICS_ENABLED = "ckanext.dimred.metrics_enabled"
+PROFILING_ENABLED = "ckanext.dimred.profiling_enabled"
+PROFILING_INTERVAL = "ckanext.dimred.profiling_interval"
 UMAP_N_NEIGHBORS = "ckanext.dimred.umap.n_neighbors"
 UMAP_MIN_DIST = "ckanext.dimred.umap.min_dist"
 UMAP_N_COMPONENTS = "ckanext.dimred.umap.n_components"
@@ -27,6 +60,8 @@ TSNE_N_COMPONENTS = "ckanext.dimred.tsne.n_components"
 PCA_N_COMPONENTS = "ckanext.dimred.pca.n_components"
 PCA_WHITEN = "ckanext.dimred.pca.whiten"
 
+SVD_N_COMPONENTS = "ckanext.dimred.svd.n_components"
+
 
 def default_method() -> str:
     """Default dimensionality reduction method (e.g. 'umap')."""
@@ -48,6 +83,26 @@ def max_rows() -> int:
     return tk.config[MAX_ROWS]
 
 
+def sampling_strategy() -> str:
+    """How rows are picked when a resource exceeds max_rows ('uniform', 'stratified' or 'density')."""
+    return (tk.config[SAMPLING_STRATEGY] or "uniform").strip().lower()
+
+
+def sampling_class_cap() -> int:
+    """Maximum rows kept per class by stratified and density sampling; 0 means no cap."""
+    return tk.config[SAMPLING_CLASS_CAP]
+
+
+def max_memory_mb() -> int:
+    """Estimated peak memory (in megabytes) allowed for one preview; 0 disables the check."""
+    return tk.config[MAX_MEMORY_MB]
+
+
+def job_memory_limit_mb() -> int:
+    """Address space limit (in megabytes) for warm-up jobs; 0 disables it."""
+    return tk.config[JOB_MEMORY_LIMIT_MB]
+
+
 def enable_categorical() -> bool:
     """Whether to include low-cardinality categorical columns via one-hot encoding."""
     return tk.config[ENABLE_CATEGORICAL]
@@ -58,6 +113,11 @@ def max_categories_for_ohe() -> int:
     return tk.config[MAX_CATEGORIES_FOR_OHE]
 
 
+def sparse_max_density() -> float:
+    """Largest non-zero share of the feature matrix for which the sparse path is used."""
+    return float(tk.config[SPARSE_MAX_DENSITY])
+
+
 def cache_enabled() -> bool:
     """Whether caching for dimred previews is enabled."""
     return tk.config[CACHE_ENABLED]
@@ -88,11 +148,146 @@ def render_module() -> str | None:
     return tk.config[RENDER_MODULE]
 
 
+def echarts_url() -> str:
+    """URL (or path under the site root) of the ECharts build loaded by the echarts view."""
+    return tk.config[ECHARTS_URL]
+
+
+def echarts_gl_url() -> str:
+    """URL (or path under the site root) of echarts-gl, loaded only for 3D and large 2D views."""
+    return tk.config[ECHARTS_GL_URL]
+
+
 def embedding_decimals() -> int:
     """Decimal places to round embedding coordinates."""
     return tk.config[EMBEDDING_DECIMALS]
 
 
+def model_store_enabled() -> bool:
+    """Whether fitted models are persisted for transforming new rows."""
+    return tk.config[MODEL_STORE_ENABLED]
+
+
+def model_store_path() -> str:
+    """Directory for persisted fitted models (defaults under ckan.storage_path)."""
+    path = tk.config[MODEL_STORE_PATH]
+    if path:
+        return path
+    storage_path = tk.config.get("ckan.storage_path")
+    return os.path.join(storage_path, "dimred", "models") if storage_path else ""
+
+
+def transform_max_rows() -> int:
+    """Maximum number of rows projected by a single transform request."""
+    return tk.config[TRANSFORM_MAX_ROWS]
+
+
+def incremental_enabled() -> bool:
+    """Whether rows appended to a resource are merged into cached embeddings."""
+    return tk.config[INCREMENTAL_ENABLED]
+
+
+def incremental_drift_threshold() -> float:
+    """Maximum scaler drift (in fitted std units) tolerated by incremental updates."""
+    value = tk.config[INCREMENTAL_DRIFT_THRESHOLD]
+    return float(value)
+
+
+def prewarm_enabled() -> bool:
+    """Whether resource and view changes enqueue background cache warm-up jobs."""
+    return tk.config[PREWARM_ENABLED]
+
+
+def prewarm_queue() -> str:
+    """Background job queue used for cache warm-up jobs."""
+    return tk.config[PREWARM_QUEUE]
+
+
+def prewarm_workers() -> int:
+    """Default number of views computed in parallel by `ckan dimred warm-cache`."""
+    return tk.config[PREWARM_WORKERS]
+
+
+def execution_backend() -> str:
+    """Where embeddings are computed: 'inline' (the calling thread) or 'process' (a worker pool)."""
+    return tk.config[EXECUTION_BACKEND]
+
+
+def process_workers() -> int:
+    """Number of worker processes of the 'process' execution backend."""
+    return tk.config[PROCESS_WORKERS]
+
+
+def process_timeout() -> int:
+    """Seconds an embedding may take in a worker process; 0 disables."""
+    return tk.config[PROCESS_TIMEOUT]
+
+
+def process_memory_limit_mb() -> int:
+    """Address space cap of a worker process while it computes an embedding; 0 disables."""
+    return tk.config[PROCESS_MEMORY_LIMIT_MB]
+
+
+def frame_cache_mb() -> int:
+    """Memory each worker process may use to keep parsed resource frames; 0 disables."""
+    return tk.config[FRAME_CACHE_MB]
+
+
+def frame_cache_ttl() -> int:
+    """Seconds a parsed resource frame is kept in a worker process."""
+    return tk.config[FRAME_CACHE_TTL]
+
+
+def batch_max_items() -> int:
+    """Maximum number of resource + view pairs in one dimred_get_dimred_previews call."""
+    return tk.config[BATCH_MAX_ITEMS]
+
+
+def batch_workers() -> int:
+    """Processes computing the missing embeddings of a dimred_get_dimred_previews call."""
+    return tk.config[BATCH_WORKERS]
+
+
+def progressive_enabled() -> bool:
+    """Whether cold views first get a quick provisional embedding while the full one is computed."""
+    return tk.config[PROGRESSIVE_ENABLED]
+
+
+def progressive_method() -> str:
+    """Fast method used for provisional embeddings."""
+    return tk.config[PROGRESSIVE_METHOD]
+
+
+def progressive_max_rows() -> int:
+    """Maximum number of rows of a provisional embedding; 0 uses max_rows."""
+    return tk.config[PROGRESSIVE_MAX_ROWS]
+
+
+def progressive_poll_interval() -> int:
+    """Seconds between browser checks for the final embedding."""
+    return tk.config[PROGRESSIVE_POLL_INTERVAL]
+
+
+def opentelemetry_enabled() -> bool:
+    """Whether pipeline stage timings are also exported as OpenTelemetry spans."""
+    return tk.config[OPENTELEMETRY_ENABLED]
+
+
+def metrics_enabled() -> bool:
+    """Whether cache, pipeline, download, export and failure metrics are collected in Redis."""
+    return tk.config[METRICS_ENABLED]
+
+
+def profiling_enabled() -> bool:
+    """Whether sysadmins may profile a pipeline run on demand."""
+    return tk.config[PROFILING_ENABLED]
+
+
+def profiling_interval() -> int:
+    """Minimum number of seconds between two profiles, over all processes."""
+    return tk.config[PROFILING_INTERVAL]
+
+
 def umap_n_neighbors() -> int:
     """Default UMAP n_neighbors value."""
     return tk.config[UMAP_N_NEIGHBORS]
@@ -127,3 +322,8 @@ def pca_n_components() -> int:
 def pca_whiten() -> bool:
     """Whether to whiten PCA output."""
     return tk.config[PCA_WHITEN]
+
+
+def svd_n_components() -> int:
+    """Number of output components for truncated SVD."""
+    return tk.config[SVD_N_COMPONENTS]
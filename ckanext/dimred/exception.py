@@ -28,6 +28,12 @@ class DimredFeatureError(DimredError):
     default_message = "Not enough features for dimred."
 
 
+class DimredNotFittedError(DimredFeatureError):
+    """Raised when rows are encoded with a feature preprocessor that was never fitted."""
+
+    default_message = "Feature preprocessor is not fitted."
+
+
 class DimredResourceUrlError(DimredError):
     """Raised when resource URL/path is missing."""
 
@@ -46,6 +52,21 @@ class DimredPreviewError(DimredError):
     default_message = "Dimred preview failed."
 
 
+class DimredWorkerTaskError(DimredPreviewError):
+    """Raised when a worker process task fails with an unexpected exception."""
+
+    default_message = "{}: {}"
+
+    def __init__(self, error_type: str, error: str) -> None:
+        super().__init__(self.default_message.format(error_type, error))
+        self.error_type = error_type
+        self.error = error
+
+    def __reduce__(self) -> tuple[type, tuple[str, str]]:
+        # sent back from the worker process, rebuilt from its parts
+        return type(self), (self.error_type, self.error)
+
+
 class DimredResourceSizeError(DimredError):
     """Raised when resource exceeds configured size limit."""
 
@@ -62,3 +83,87 @@ class DimredTabularLoadError(DimredError):
     """Raised when tabular data cannot be loaded."""
 
     default_message = "Failed to load tabular data."
+
+
+class DimredExportFormatError(DimredError):
+    """Raised when an embedding cannot be exported in the requested format."""
+
+    default_message = "Export format is not available."
+
+
+class DimredExportDependencyError(DimredExportFormatError):
+    """Raised when an export format needs an optional package that is not installed."""
+
+    default_message = "This export format requires pyarrow to be installed (pip install ckanext-dimred[arrow])."
+
+
+class DimredTransformError(DimredError):
+    """Raised when new rows cannot be projected into an existing embedding."""
+
+    default_message = "This embedding cannot project new rows."
+
+
+class DimredTransformMethodError(DimredTransformError):
+    """Raised when the method of an embedding has no transform for new rows."""
+
+    default_message = "This method cannot project new rows into a fitted embedding; only PCA and UMAP can."
+
+
+class DimredModelNotFoundError(DimredTransformError):
+    """Raised when no fitted model is stored for the settings of a view."""
+
+    default_message = (
+        "No fitted model is stored for this view; it is saved when the preview is built "
+        "with ckanext.dimred.model_store_enabled on."
+    )
+
+
+class DimredMemoryLimitError(DimredError):
+    """Raised when building a preview would exceed the memory limit."""
+
+    default_message = "The resource is too large to build a preview within the memory limit."
+
+
+class DimredProfileError(DimredError):
+    """Raised when a profile cannot be taken in the requested format."""
+
+    default_message = "Profile format is not available."
+
+
+class DimredProfileDependencyError(DimredProfileError):
+    """Raised when an HTML profile is requested without pyinstrument installed."""
+
+    default_message = "HTML profiles need pyinstrument (pip install ckanext-dimred[profiling])."
+
+
+class DimredRateLimitError(DimredError):
+    """Raised when a rate-limited operation is requested too often."""
+
+    default_message = "Too many requests, try again later."
+
+
+class DimredProfileRateLimitError(DimredRateLimitError):
+    """Raised when a profile is requested before the profiling interval has passed."""
+
+    default_message = "Only one profile may be taken every {} seconds."
+
+    def __init__(self, interval: int) -> None:
+        super().__init__(self.default_message.format(interval))
+
+
+class DimredRateLimitUnavailableError(DimredRateLimitError):
+    """Raised when a rate limit cannot be enforced because Redis is unreachable."""
+
+    default_message = "Profiling needs Redis for rate limiting."
+
+
+class DimredTimeoutError(DimredError):
+    """Raised when computing an embedding exceeds the configured time limit."""
+
+    default_message = "Computing the embedding took too long."
+
+
+class DimredWorkerError(DimredError):
+    """Raised when the worker process computing an embedding dies."""
+
+    default_message = "The worker process computing the embedding stopped unexpectedly."
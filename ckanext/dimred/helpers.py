@@ -3,11 +3,14 @@ from __future__ import annotations
 from typing import Any
 
 import ckan.plugins.toolkit as tk
+from ckan import authz
 
 from ckanext.dimred import config as dimred_config
 from ckanext.dimred import utils as dimred_utils
 from ckanext.dimred.exception import DimredError
 from ckanext.dimred.methods import get_projection_method
+from ckanext.dimred.utils import colors as dimred_colors
+from ckanext.dimred.utils.export import available_export_formats
 
 
 def dimred_allowed_methods() -> list[str]:
@@ -84,6 +87,11 @@ def dimred_export_enabled() -> bool:
     return dimred_config.export_enabled()
 
 
+def dimred_export_formats() -> list[str]:
+    """Return the export formats offered for download (those the installed packages can produce)."""
+    return available_export_formats()
+
+
 def dimred_method_default_params(method_name: str) -> dict[str, Any]:
     """Return default params for a given dimred method."""
     try:
@@ -123,6 +131,7 @@ def dimred_method_labels() -> dict[str, str]:
         "umap": "UMAP",
         "tsne": "t-SNE",
         "pca": "PCA",
+        "svd": "Truncated SVD",
     }
 
 
@@ -167,7 +176,36 @@ def dimred_render_module(render_backend: str | None = None) -> str | None:
     return None
 
 
+def dimred_echarts_urls() -> dict[str, str]:
+    """Return the URLs of the ECharts and echarts-gl builds loaded on demand by the echarts view."""
+    return {
+        "echarts": tk.h.url_for_static_or_external(dimred_config.echarts_url()),
+        "echarts_gl": tk.h.url_for_static_or_external(dimred_config.echarts_gl_url()),
+    }
+
+
+def dimred_show_timings() -> bool:
+    """Whether the current user sees the pipeline stage timings in the summary (sysadmins only)."""
+    return authz.is_sysadmin(tk.current_user.name)
+
+
+def dimred_chart_meta(meta: dict[str, Any], render_backend: str | None = None) -> dict[str, Any]:
+    """Return the embedding metadata passed to the render module.
+
+    The built-in echarts view colors points from the compact encodings, so
+    the raw color values are left out of the page. Custom modules get them.
+    """
+    if dimred_render_module(render_backend) != "dimred-view-echarts":
+        return meta
+    return dimred_colors.strip_encoded_values(meta)
+
+
 def _use_echarts(render_backend: str | None = None) -> bool:
     """True if echarts backend is selected."""
     backend = render_backend or dimred_config.render_backend()
     return backend == "echarts"
+
+
+def dimred_progressive_poll_interval() -> int:
+    """Return the seconds between browser checks for a final embedding."""
+    return dimred_config.progressive_poll_interval()
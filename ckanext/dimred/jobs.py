@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+import ckan.plugins.toolkit as tk
+from ckan import model
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.exception import DimredError
+from ckanext.dimred.utils import cache as dimred_cache
+from ckanext.dimred.utils import memory as dimred_memory
+from ckanext.dimred.utils.frames import get_frame_cache
+from ckanext.dimred.utils.models import get_model_store
+
+log = logging.getLogger(__name__)
+
+VIEW_TYPE = "dimred_view"
+
+
+def enqueue_warmup(resource_id: str, view_ids: list[str] | None = None) -> None:
+    """Enqueue a background job computing the embeddings of a resource's dimred views.
+
+    Does nothing unless ``ckanext.dimred.prewarm_enabled`` is set.
+    """
+    if not dimred_config.prewarm_enabled():
+        return
+    _enqueue(warm_resource, [resource_id, view_ids], f"Warm dimred cache for resource {resource_id}")
+
+
+def enqueue_final_embedding(resource_id: str, view_id: str) -> None:
+    """Enqueue a background job replacing a provisional embedding with the final one.
+
+    Unlike enqueue_warmup it does not depend on ``ckanext.dimred.prewarm_enabled``.
+    Nothing is enqueued while a job holds the warm-up lock of the view.
+    """
+    if dimred_cache.get_cache().is_locked(resource_id, view_id):
+        log.debug("Dimred view %s is already being warmed", view_id)
+        return
+    _enqueue(warm_resource, [resource_id, [view_id]], f"Compute final dimred embedding of view {view_id}")
+
+
+def enqueue_incremental_update(resource_id: str) -> bool:
+    """Enqueue a background job merging the rows appended to a resource's file into its cached embeddings.
+
+    Returns False if the job could not be enqueued.
+    """
+    return _enqueue(update_resource, [resource_id], f"Update dimred embeddings of resource {resource_id}")
+
+
+def _enqueue(job: Callable[..., Any], args: list[Any], title: str) -> bool:
+    try:
+        tk.enqueue_job(job, args, title=title, queue=dimred_config.prewarm_queue())
+    except Exception:  # noqa: BLE001 - jobs are best effort, never fail the request
+        log.exception("Cannot enqueue dimred job for resource %s", args[0])
+        return False
+    return True
+
+
+def invalidate_resource(resource_id: str) -> None:
+    """Drop cached embeddings, persisted models and this worker's parsed frames of a resource."""
+    dimred_cache.get_cache().delete_for_resource(resource_id)
+    get_model_store().delete_for_resource(resource_id)
+    get_frame_cache().discard(resource_id)
+
+
+def update_resource(resource_id: str) -> dict[str, list[str]] | None:
+    """Bring the cached embeddings of a resource up to date after rows were appended to its file.
+
+    Background job entry point, see dimred_update_resource_embeddings.
+    Everything derived from the resource is dropped if the update fails.
+    The views that were not updated are then warmed (with
+    ``ckanext.dimred.prewarm_enabled``). Returns the result of the update,
+    or None if it failed.
+    """
+    result = None
+    try:
+        with dimred_memory.address_space_limit(dimred_config.job_memory_limit_mb()):
+            result = tk.get_action("dimred_update_resource_embeddings")(_site_context(), {"id": resource_id})
+    except (DimredError, tk.ValidationError, tk.ObjectNotFound, MemoryError) as err:
+        log.warning("Dimred incremental update of %s failed: %s", resource_id, err)
+        invalidate_resource(resource_id)
+    finally:
+        model.Session.remove()
+
+    if result is None or result["invalidated"]:
+        enqueue_warmup(resource_id, result["invalidated"] if result else None)
+    return result
+
+
+def warm_resource(resource_id: str, view_ids: list[str] | None = None) -> dict[str, bool]:
+    """Compute (and cache) the embedding of every dimred view of a resource.
+
+    Background job entry point. Returns view id -> success. The process
+    address space is capped by ``ckanext.dimred.job_memory_limit_mb`` for
+    the duration of the job.
+    """
+    context = _site_context()
+    try:
+        views = tk.get_action("resource_view_list")(context, {"id": resource_id})
+    except tk.ObjectNotFound:
+        log.info("Dimred warm-up skipped, resource %s no longer exists", resource_id)
+        return {}
+
+    with dimred_memory.address_space_limit(dimred_config.job_memory_limit_mb()):
+        return {
+            view["id"]: warm_view(resource_id, view)
+            for view in views
+            if view.get("view_type") == VIEW_TYPE and (view_ids is None or view["id"] in view_ids)
+        }
+
+
+def warm_view(resource_id: str, view: dict[str, Any]) -> bool:
+    """Compute the embedding (and PNG for the matplotlib backend) of one view.
+
+    A short Redis lock per view keeps concurrent jobs (e.g. one queued by the
+    resource update and one by the view update) from computing the same
+    embedding twice. Returns False if the view could not be computed.
+    """
+    cache = dimred_cache.get_cache()
+    if not cache.acquire_lock(resource_id, view["id"]):
+        log.debug("Dimred view %s is already being warmed", view["id"])
+        return True
+
+    context = _site_context()
+    data_dict = {"id": resource_id, "view_id": view["id"]}
+    try:
+        tk.get_action("dimred_get_dimred_preview")(context, data_dict)
+        backend = view.get("render_backend") or dimred_config.render_backend()
+        if backend == "matplotlib":
+            tk.get_action("dimred_get_dimred_image")(context, data_dict)
+    except (DimredError, tk.ValidationError, tk.ObjectNotFound) as err:
+        log.warning("Dimred warm-up of view %s failed: %s", view["id"], err)
+        return False
+    except MemoryError:
+        log.warning("Dimred warm-up of view %s ran out of memory", view["id"])
+        return False
+    finally:
+        cache.release_lock(resource_id, view["id"])
+        model.Session.remove()
+
+    return True
+
+
+def iter_dimred_views(
+    dataset_ids: list[str] | None = None, resource_ids: list[str] | None = None
+) -> list[tuple[str, dict[str, Any]]]:
+    """Return (resource id, view) pairs for all dimred views of active resources.
+
+    Args:
+        dataset_ids: limit to these datasets (ids); all datasets if empty.
+        resource_ids: limit to these resources (ids); all resources if empty.
+    """
+    query = (
+        model.Session.query(model.ResourceView)
+        .join(model.Resource, model.Resource.id == model.ResourceView.resource_id)
+        .filter(model.ResourceView.view_type == VIEW_TYPE, model.Resource.state == "active")
+    )
+    if dataset_ids:
+        query = query.filter(model.Resource.package_id.in_(dataset_ids))
+    if resource_ids:
+        query = query.filter(model.Resource.id.in_(resource_ids))
+
+    return [
+        (view.resource_id, {"id": view.id, "view_type": view.view_type, **(view.config or {})})
+        for view in query.order_by(model.ResourceView.resource_id)
+    ]
+
+
+def _site_context() -> dict[str, Any]:
+    site_user = tk.get_action("get_site_user")({"ignore_auth": True}, {})
+    return {"ignore_auth": True, "user": site_user["name"]}
@@ -1,27 +1,49 @@
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
+import logging
 from typing import Any
 
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 
-from ckan import types
+from ckan import model, types
 from ckan.logic import validate
 from ckan.plugins import toolkit as tk
 
 from ckanext.dimred import config as dimred_config
+from ckanext.dimred import jobs as dimred_jobs
 from ckanext.dimred import utils as dimred_utils
+from ckanext.dimred.adapters import BaseAdapter
 from ckanext.dimred.exception import (
     DimredAdapterNotFoundError,
+    DimredError,
     DimredFeatureError,
+    DimredMemoryLimitError,
+    DimredModelNotFoundError,
     DimredNumericColumnError,
+    DimredTimeoutError,
+    DimredTransformMethodError,
 )
 from ckanext.dimred.logic import schema
 from ckanext.dimred.methods import BaseProjectionMethod, get_projection_method
 from ckanext.dimred.utils import cache as dimred_cache
-from ckanext.dimred.utils.export import embedding_to_csv
+from ckanext.dimred.utils import colors as dimred_colors
+from ckanext.dimred.utils import execution as dimred_execution
+from ckanext.dimred.utils import memory as dimred_memory
+from ckanext.dimred.utils import profiling as dimred_profiling
+from ckanext.dimred.utils import sampling as dimred_sampling
+from ckanext.dimred.utils import timing as dimred_timing
+from ckanext.dimred.utils.export import EXPORT_FORMATS, embedding_to_binary, embedding_to_csv, iter_embedding_csv
+from ckanext.dimred.utils.features import FeaturePreprocessor, bounded_nunique, categorize_columns, column_kinds
+from ckanext.dimred.utils.frames import get_frame_cache
+from ckanext.dimred.utils.metrics import METRICS_CONTENT_TYPE, get_metrics, row_bucket
+from ckanext.dimred.utils.models import FittedModel, get_model_store
+from ckanext.dimred.utils.render import PNG_CONTENT_TYPE
+
+log = logging.getLogger(__name__)
 
 
 @tk.side_effect_free
@@ -32,6 +54,12 @@ def dimred_get_dimred_preview(context: types.Context, data_dict: types.DataDict)
     Expected data_dict keys:
     - id: resource id
     - view_id: resource_view id
+
+    Optional data_dict keys:
+    - progressive: if the embedding is not cached yet, return a quick
+      provisional one (``meta["provisional"]``) and compute the final one in
+      a background job (see ``ckanext.dimred.progressive_enabled``). Call
+      again later to get the final embedding.
     """
     resource = tk.get_action("resource_show")(context, {"id": data_dict["id"]})
     resource_view = tk.get_action("resource_view_show")(context, {"id": data_dict["view_id"]})
@@ -41,6 +69,7 @@ def dimred_get_dimred_preview(context: types.Context, data_dict: types.DataDict)
         {
             "resource": resource,
             "resource_view": resource_view,
+            "progressive": data_dict.get("progressive", False),
         },
     )
 
@@ -49,7 +78,10 @@ def dimred_get_dimred_preview(context: types.Context, data_dict: types.DataDict)
 def dimred_run_dimred_pipeline(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
     """Execute the dimred pipeline and return embedding + metadata.
 
-    Accepts either pre-fetched resource/resource_view or ids.
+    Accepts either pre-fetched resource/resource_view or ids. With a true
+    ``progressive`` key a cache miss returns a provisional embedding, see
+    dimred_get_dimred_preview; otherwise provisional results are ignored
+    and the final embedding is computed.
     """
     resource = data_dict.get("resource")
     resource_view = data_dict.get("resource_view")
@@ -62,57 +94,829 @@ def dimred_run_dimred_pipeline(context: types.Context, data_dict: types.DataDict
     resource_id = resource["id"]
     resource_view_id = resource_view["id"]
 
-    method_params = _parse_method_params(resource_view.get("method_params"))
-    resource_view = dict(resource_view)
-    resource_view["method_params"] = method_params
+    resource_view = _normalize_resource_view(resource_view)
 
     settings = _cache_settings(resource_view)
     cache = dimred_cache.get_cache()
     settings_sig = cache.settings_signature(settings)
 
-    cached = cache.get(resource_id, resource_view_id, settings_sig)
-    if cached:
-        return cached
+    progressive = _use_progressive(resource_view) and bool(data_dict.get("progressive"))
+
+    with dimred_timing.recording(dimred_config.opentelemetry_enabled()) as recorder:
+        # hits keep the timings of their computation and are not reported
+        with dimred_timing.span("cache_get"):
+            cached = cache.get(resource_id, resource_view_id, settings_sig)
+            if cached and (progressive or not cached["meta"].get("provisional")):
+                return cached
+
+            # another view with the same settings may already have used this file
+            content_id = cache.get_content_id(resource_id)
+            cached = cache.get_content(content_id, settings_sig) if content_id else None
+            if cached:
+                cache.link(resource_id, resource_view_id, settings_sig, content_id)
+                return cached
+
+        try:
+            embedding, meta = _run_build(resource, resource_view, progressive)
+        except DimredError as err:
+            get_metrics().inc("dimred_failures_total", error=type(err).__name__)
+            raise
+        with dimred_timing.span("serialize"):
+            decimals = dimred_config.embedding_decimals()
+            embedding = np.round(np.asarray(embedding, dtype=float), decimals)
+            embedding_serializable = embedding.tolist()
+
+        # a result reused from another resource keeps the timings of its computation;
+        # the cache write below is only in the log, it happens after meta is stored
+        meta.setdefault("timings", recorder.report())
+        result = {"embedding": embedding_serializable, "meta": meta}
+        with dimred_timing.span("cache_save"):
+            _save_result(cache, resource, resource_view_id, settings_sig, result)
+
+    _report_run(recorder.report(), resource_id, resource_view_id, meta)
+    if meta.get("provisional"):
+        dimred_jobs.enqueue_final_embedding(resource_id, resource_view_id)
+    return result
 
-    embedding, meta = _build_dimred_preview(resource, resource_view)
-    decimals = dimred_config.embedding_decimals()
-    embedding = np.round(np.asarray(embedding, dtype=float), decimals)
-    embedding_serializable = embedding.tolist()
 
-    result = {"embedding": embedding_serializable, "meta": meta}
-    cache.save(resource_id, resource_view_id, settings_sig, result)
+@tk.side_effect_free
+@validate(schema.dimred_get_dimred_previews_schema)
+def dimred_get_dimred_previews(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Return the embeddings of many resource + view pairs in one call.
 
-    return result
+    Expected data_dict keys:
+    - items: list of ``{"id": resource id, "view_id": resource_view id}``
+
+    Resources and their views are fetched once per resource, cached
+    results are read in a single Redis round trip, and the embeddings
+    missing from the cache are computed with each resource's file read
+    once for all its views, one resource per process (see
+    ``ckanext.dimred.batch_workers``). Missing embeddings are always
+    computed in full, never provisionally.
+
+    Returns ``results`` in the order of items; each has ``id``,
+    ``view_id`` and either ``embedding`` and ``meta`` or ``error``
+    (``type`` and ``message``), so one failing item does not fail the
+    others.
+    """
+    items = data_dict.get("items") or []
+    if not items:
+        raise tk.ValidationError({"items": ["Missing value"]})
+    max_items = dimred_config.batch_max_items()
+    if max_items and len(items) > max_items:
+        raise tk.ValidationError({"items": [f"At most {max_items} items can be requested at once."]})
+
+    resources, views, errors = _resolve_preview_items(context, items)
+    pairs = [pair for pair in dict.fromkeys((item["id"], item["view_id"]) for item in items) if pair not in errors]
+
+    cache = dimred_cache.get_cache()
+    signatures = {pair: cache.settings_signature(_cache_settings(views[pair])) for pair in pairs}
+    cached = cache.get_many([(*pair, signatures[pair]) for pair in pairs])
+    results = {pair: hit for pair, hit in zip(pairs, cached, strict=True) if hit and not hit["meta"].get("provisional")}
+    # another view with the same settings may already have used the file
+    missing = _get_shared_previews(cache, [pair for pair in pairs if pair not in results], views, signatures, results)
+
+    for resource_id, outcomes in _compute_missing_previews(resources, missing).items():
+        for view_id, outcome in outcomes.items():
+            pair = (resource_id, view_id)
+            if "error" in outcome:
+                errors[pair] = outcome["error"]
+                continue
+            _save_result(cache, resources[resource_id], view_id, signatures[pair], outcome)
+            _report_run(outcome["meta"]["timings"], resource_id, view_id, outcome["meta"])
+            results[pair] = outcome
+
+    response = []
+    for item in items:
+        pair = (item["id"], item["view_id"])
+        outcome = results[pair] if pair in results else {"error": errors[pair]}
+        response.append({"id": item["id"], "view_id": item["view_id"], **outcome})
+    return {"results": response}
 
 
 @tk.side_effect_free
 @validate(schema.dimred_export_embedding_schema)
 def dimred_export_embedding(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
-    """Return CSV export for a dimred preview."""
+    """Return an export file for a dimred preview.
+
+    Optional data_dict keys:
+    - format: ``csv`` (default), ``parquet``, ``arrow`` or ``npy``
+    - include_candidates: add every color candidate column to the export
+    - stream: return CSV ``content`` as an iterator of chunks instead of a
+      string (used by the export route to stream the response); binary
+      formats always return bytes
+    """
     if not dimred_config.export_enabled():
         raise tk.ValidationError({"export": ["Dimred export is disabled."]})
 
-    result = tk.get_action("dimred_get_dimred_preview")(context, data_dict)
+    result = tk.get_action("dimred_get_dimred_preview")(
+        context, {"id": data_dict["id"], "view_id": data_dict["view_id"]}
+    )
     if not result or "embedding" not in result:
         raise DimredFeatureError
 
-    csv_content = embedding_to_csv(result["embedding"], result["meta"])
+    export_format = data_dict.get("format") or "csv"
+    include_candidates = data_dict.get("include_candidates", False)
+    embedding = np.asarray(result["embedding"], dtype=float)
+
+    if export_format != "csv":
+        content = embedding_to_binary(embedding, result["meta"], export_format, include_candidates=include_candidates)
+    elif data_dict.get("stream"):
+        content = iter_embedding_csv(embedding, result["meta"], include_candidates=include_candidates)
+    else:
+        content = embedding_to_csv(embedding, result["meta"], include_candidates=include_candidates)
+
     resource_id = data_dict["id"]
     view_id = data_dict["view_id"]
-    filename = f"dimred-{resource_id}-{view_id}.csv"
+    content_type, extension = EXPORT_FORMATS[export_format]
+    get_metrics().inc("dimred_exports_total", format=export_format)
+
+    return {
+        "filename": f"dimred-{resource_id}-{view_id}.{extension}",
+        "content": content,
+        "content_type": content_type,
+    }
+
+
+@tk.side_effect_free
+@validate(schema.dimred_get_dimred_image_schema)
+def dimred_get_dimred_image(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Return a PNG rendering of the embedding for a resource + view pair.
+
+    The PNG is cached next to the embedding (keyed by the settings signature
+    and the render options), so repeat page views skip matplotlib entirely.
+    """
+    resource = tk.get_action("resource_show")(context, {"id": data_dict["id"]})
+    resource_view = tk.get_action("resource_view_show")(context, {"id": data_dict["view_id"]})
+
+    resource_id = resource["id"]
+    resource_view_id = resource_view["id"]
+
+    cache = dimred_cache.get_cache()
+    settings_sig = cache.settings_signature(_cache_settings(_normalize_resource_view(resource_view)))
+    render_sig = dimred_utils.render_signature()
 
+    content = cache.get_image(resource_id, resource_view_id, settings_sig, render_sig)
+    if content is None:
+        result = dimred_run_dimred_pipeline(context, {"resource": resource, "resource_view": resource_view})
+        content = dimred_utils.embedding_to_png(np.asarray(result["embedding"], dtype=float), result["meta"])
+        cache.save_image(resource_id, resource_view_id, settings_sig, render_sig, content)
+
+    return {
+        "filename": f"dimred-{resource_id}-{resource_view_id}.png",
+        "content": content,
+        "content_type": PNG_CONTENT_TYPE,
+        "etag": hashlib.sha1(content, usedforsecurity=False).hexdigest(),
+    }
+
+
+@tk.side_effect_free
+def dimred_metrics(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Return the dimred metrics in the Prometheus text exposition format (sysadmins only).
+
+    Collected while ``ckanext.dimred.metrics_enabled`` is on, by every web
+    and job worker sharing the Redis instance.
+    """
+    tk.check_access("sysadmin", context, data_dict)
+    return {"content": get_metrics().render(), "content_type": METRICS_CONTENT_TYPE}
+
+
+@tk.side_effect_free
+@validate(schema.dimred_profile_view_schema)
+def dimred_profile_view(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Recompute the embedding of a view under a profiler and return the profile (sysadmins only).
+
+    The resource is read and the model fitted as for a cache miss, but no
+    cache (embeddings or parsed frames) is read or written and no model is
+    saved, so the profile covers the whole pipeline and leaves the stored
+    results untouched. At most one profile runs every
+    ``ckanext.dimred.profiling_interval`` seconds.
+
+    Optional data_dict keys:
+    - format: ``speedscope`` (default, open in https://www.speedscope.app),
+      ``html`` (pyinstrument report) or ``text`` (cProfile statistics)
+    - top: number of top allocation sites to report (default 20, 0 to
+      skip memory tracing)
+    """
+    tk.check_access("sysadmin", context, data_dict)
+    if not dimred_config.profiling_enabled():
+        raise tk.ValidationError({"profile": ["Dimred profiling is disabled."]})
+
+    resource = tk.get_action("resource_show")(context, {"id": data_dict["id"]})
+    resource_view = _normalize_resource_view(tk.get_action("resource_view_show")(context, {"id": data_dict["view_id"]}))
+    profile_format = data_dict.get("format") or "speedscope"
+    top = data_dict.get("top", 20)
+
+    dimred_profiling.acquire_profile_slot(dimred_config.profiling_interval())
+
+    spans: list[dict[str, Any]] = []
+
+    def run() -> None:
+        with dimred_timing.recording() as recorder:
+            loaded = _read_resource(resource, resource_view, cached=False)
+            embedding, _meta, _model = _fit_dimred_model(resource, resource_view, loaded)
+            with dimred_timing.span("serialize"):
+                np.round(np.asarray(embedding, dtype=float), dimred_config.embedding_decimals()).tolist()
+        spans.extend(recorder.spans)
+
+    name = f"dimred {resource['id']}/{resource_view['id']}"
+    report = dimred_profiling.profile_call(run, profile_format, name=name, top_allocations=top)
+    log.info(
+        "dimred profile resource_id=%s view_id=%s format=%s elapsed=%.0fms",
+        resource["id"],
+        resource_view["id"],
+        profile_format,
+        report["elapsed_ms"],
+    )
+
+    content_type, extension = dimred_profiling.PROFILE_FORMATS[profile_format]
     return {
-        "filename": filename,
-        "content": csv_content,
-        "content_type": "text/csv; charset=utf-8",
+        "filename": f"dimred-profile-{resource['id']}-{resource_view['id']}.{extension}",
+        "content": dimred_profiling.with_allocations(report, profile_format),
+        "content_type": content_type,
+        "allocations": report["allocations"],
+        "peak_mb": report["peak_mb"],
+        "timings": {"total_ms": report["elapsed_ms"], "spans": spans},
+    }
+
+
+@validate(schema.dimred_transform_rows_schema)
+def dimred_transform_rows(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Project new rows into an existing embedding without refitting.
+
+    Uses the preprocessing and reducer persisted when the embedding was
+    built; raises DimredModelNotFoundError if the model store has no copy
+    (or is disabled). Only methods that support ``transform`` (PCA, UMAP)
+    can be used. Requires permission to update the resource.
+
+    Expected data_dict keys:
+    - id: resource id
+    - view_id: resource_view id
+    - rows: list of row objects (column name -> value), or
+    - source_id: id of a resource whose rows are projected (e.g. appended data)
+    """
+    tk.check_access("resource_update", context, {"id": data_dict["id"]})
+
+    resource = tk.get_action("resource_show")(context, {"id": data_dict["id"]})
+    resource_view = tk.get_action("resource_view_show")(context, {"id": data_dict["view_id"]})
+    resource_view = _normalize_resource_view(resource_view)
+
+    df = _load_transform_rows(context, data_dict, resource_view)
+    max_rows = dimred_config.transform_max_rows()
+    if max_rows and len(df) > max_rows:
+        raise tk.ValidationError({"rows": [f"At most {max_rows} rows can be projected at once."]})
+
+    model = _get_fitted_model(resource, resource_view)
+    embedding = np.round(np.asarray(model.transform(df), dtype=float), dimred_config.embedding_decimals())
+    color_by, color_values = _extract_color_info(df, resource_view)
+
+    return {
+        "embedding": embedding.tolist(),
+        "meta": {
+            "method": model.method,
+            "n_rows": len(df),
+            "color_by": color_by or None,
+            "color_values": color_values,
+        },
+    }
+
+
+@validate(schema.dimred_update_resource_embeddings_schema)
+def dimred_update_resource_embeddings(context: types.Context, data_dict: types.DataDict) -> types.ActionResult:
+    """Bring the cached embeddings of a resource up to date after its file changed.
+
+    When rows were only appended to a CSV/TSV file, the new rows are read
+    (without re-reading the rest of the file), projected with the persisted
+    model and merged into the cached embedding of every dimred view. Other
+    views are invalidated and recomputed on next access: no persisted model
+    or cached embedding, file rewritten, schema change, sampled embedding,
+    too many rows, or scaler drift above
+    ``ckanext.dimred.incremental_drift_threshold``.
+
+    Expected data_dict keys:
+    - id: resource id
+
+    Returns the ids of the ``updated`` and ``invalidated`` views.
+    """
+    tk.check_access("resource_update", context, {"id": data_dict["id"]})
+
+    resource = tk.get_action("resource_show")(context, {"id": data_dict["id"]})
+    resource_id = resource["id"]
+    views = [
+        _normalize_resource_view(view)
+        for view in tk.get_action("resource_view_list")(context, {"id": resource_id})
+        if view.get("view_type") == "dimred_view"
+    ]
+
+    cache = dimred_cache.get_cache()
+    projected: dict[str, tuple[FittedModel, pd.DataFrame, np.ndarray] | None] = {}
+    appended_rows: dict[tuple[int, str], tuple[pd.DataFrame, dict[str, Any]] | None] = {}
+    merged: dict[str, tuple[str, dict[str, Any]]] = {}
+
+    for view in views:
+        sig = _model_signature(view)
+        if sig not in projected:
+            try:
+                projected[sig] = _project_appended_rows(resource, view, sig, appended_rows)
+            except (DimredError, tk.ValidationError) as err:
+                log.info("Dimred incremental update of %s failed: %s", resource_id, err)
+                projected[sig] = None
+
+        update = projected[sig]
+        cache_sig = cache.settings_signature(_cache_settings(view))
+        cached = cache.get(resource_id, view["id"], cache_sig)
+        if update is None or not cached or cached["meta"].get("provisional"):
+            continue
+
+        model, df_new, embedding_new = update
+        if len(cached["embedding"]) + len(df_new) != model.prepare_info.get("n_rows_used"):
+            continue
+        result = _merge_appended_rows(cached, df_new, embedding_new, view)
+        result["meta"]["prepare_info"]["content_hash"] = model.fingerprint["sha256"]
+        merged[view["id"]] = (cache_sig, result)
+
+    # drop everything derived from the previous file (PNGs included), then
+    # put back what was brought up to date
+    store = get_model_store()
+    cache.delete_for_resource(resource_id)
+    store.delete_for_resource(resource_id)
+    for sig, update in projected.items():
+        if update is not None:
+            store.save(resource_id, sig, update[0])
+    for view_id, (sig, result) in merged.items():
+        content_id = _content_id(resource, result["meta"]["prepare_info"]["content_hash"])
+        cache.save(resource_id, view_id, sig, result, content_id=content_id)
+
+    return {
+        "updated": sorted(merged),
+        "invalidated": sorted(view["id"] for view in views if view["id"] not in merged),
+    }
+
+
+@tk.chained_action
+def resource_view_create(
+    next_action: types.Action, context: types.Context, data_dict: types.DataDict
+) -> types.ActionResult:
+    """Warm the cache of new dimred views in the background."""
+    view = next_action(context, data_dict)
+    if view.get("view_type") == dimred_jobs.VIEW_TYPE:
+        dimred_jobs.enqueue_warmup(view["resource_id"], [view["id"]])
+    return view
+
+
+@tk.chained_action
+def resource_view_update(
+    next_action: types.Action, context: types.Context, data_dict: types.DataDict
+) -> types.ActionResult:
+    """Drop the cached entries of updated dimred views and warm them again.
+
+    New settings would miss the cache anyway; dropping the old entries
+    frees their memory right away instead of at TTL expiry.
+    """
+    view = next_action(context, data_dict)
+    if view.get("view_type") == dimred_jobs.VIEW_TYPE:
+        dimred_cache.get_cache().delete_for_view(view["resource_id"], view["id"])
+        _prune_models(view["resource_id"])
+        dimred_jobs.enqueue_warmup(view["resource_id"], [view["id"]])
+    return view
+
+
+@tk.chained_action
+def resource_view_delete(
+    next_action: types.Action, context: types.Context, data_dict: types.DataDict
+) -> types.ActionResult:
+    """Drop the cached entries and unused models of deleted dimred views."""
+    view = model.ResourceView.get(data_dict.get("id"))
+    result = next_action(context, data_dict)
+    if view and view.view_type == dimred_jobs.VIEW_TYPE:
+        dimred_cache.get_cache().delete_for_view(view.resource_id, view.id)
+        _prune_models(view.resource_id)
+    return result
+
+
+def _prune_models(resource_id: str) -> None:
+    """Delete the persisted models of a resource that no dimred view uses any more.
+
+    Models are keyed by settings, so one may serve several views; it is
+    kept as long as one of them still has those settings.
+    """
+    store = get_model_store()
+    if not store.enabled:
+        return
+    in_use = {
+        _model_signature(_normalize_resource_view(view))
+        for _, view in dimred_jobs.iter_dimred_views(resource_ids=[resource_id])
+    }
+    store.prune(resource_id, in_use)
+
+
+def _project_appended_rows(
+    resource: dict[str, Any],
+    resource_view: dict[str, Any],
+    model_sig: str,
+    appended_rows: dict[tuple[int, str], tuple[pd.DataFrame, dict[str, Any]] | None],
+) -> tuple[FittedModel, pd.DataFrame, np.ndarray] | None:
+    """Project rows appended since the model was fitted; None if a full recompute is needed.
+
+    ``appended_rows`` memoizes the file read per previous fingerprint, as
+    views with different settings may share it. The returned model carries
+    the fingerprint and row counts of the new file.
+    """
+    model = _appendable_model(resource["id"], model_sig)
+    if model is None:
+        return None
+
+    fingerprint = model.fingerprint
+    key = (fingerprint["size"], fingerprint["sha256"])
+    if key not in appended_rows:
+        adapter_cls = dimred_utils.get_adapter_for_resource(resource)
+        adapter = adapter_cls(resource, resource_view) if adapter_cls else None
+        appended_rows[key] = adapter.read_appended_rows(fingerprint) if adapter else None
+    if appended_rows[key] is None:
+        return None
+
+    df_new, new_fingerprint = appended_rows[key]
+    info = model.prepare_info
+    n_rows = info["n_rows_used"] + len(df_new)
+    max_rows = dimred_config.max_rows()
+    if max_rows and n_rows > max_rows:
+        return None
+
+    x_new = _encode_appended_rows(resource["id"], df_new, model.preprocessor)
+    if x_new is None:
+        return None
+    embedding_new = model.reducer.transform(x_new) if len(df_new) else np.empty((0, 0))
+
+    model = copy.copy(model)
+    model.fingerprint = new_fingerprint
+    model.prepare_info = {**info, "n_rows_original": n_rows, "n_rows_used": n_rows}
+    return model, df_new, embedding_new
+
+
+def _appendable_model(resource_id: str, model_sig: str) -> FittedModel | None:
+    """Return the persisted model if appended rows can be merged into its embedding."""
+    model = get_model_store().load(resource_id, model_sig)
+    if model is None or not getattr(model, "fingerprint", None):
+        return None
+    info = model.prepare_info
+    if info.get("n_rows_used") != info.get("n_rows_original"):
+        # the embedding is a sample of the file, appending would skew it
+        return None
+    return model
+
+
+def _encode_appended_rows(
+    resource_id: str, df_new: pd.DataFrame, preprocessor: FeaturePreprocessor
+) -> np.ndarray | None:
+    """Encode appended rows with the fitted preprocessor; None on a schema change or too much drift."""
+    if _has_schema_change(df_new, preprocessor):
+        return None
+    x_new = preprocessor.transform(df_new)
+    drift = preprocessor.drift(x_new)
+    if drift > dimred_config.incremental_drift_threshold():
+        log.info("Dimred incremental update of %s skipped: drift %.3f", resource_id, drift)
+        return None
+    return x_new
+
+
+def _has_schema_change(df_new: pd.DataFrame, preprocessor: FeaturePreprocessor) -> bool:
+    """Return True if appended rows do not fit the encoding the model was fitted with."""
+    for col in preprocessor.numeric_cols:
+        series = df_new[col]
+        if (series.notna() & pd.to_numeric(series, errors="coerce").isna()).any():
+            return True
+    return bool(preprocessor.unknown_features(df_new))
+
+
+def _merge_appended_rows(
+    cached: dict[str, Any],
+    df_new: pd.DataFrame,
+    embedding_new: np.ndarray,
+    resource_view: dict[str, Any],
+) -> dict[str, Any]:
+    """Return a copy of a cached preview result with the appended rows added."""
+    n_new = len(df_new)
+    meta = copy.deepcopy(cached["meta"])
+    if not n_new:
+        return {"embedding": cached["embedding"], "meta": meta}
+
+    info = meta["prepare_info"]
+    info["n_rows_original"] += n_new
+    info["n_rows_used"] += n_new
+    info["n_rows_appended"] = info.get("n_rows_appended", 0) + n_new
+
+    if info.get("color_values") is not None:
+        _, color_values = _extract_color_info(df_new, resource_view)
+        info["color_values"].extend(color_values or [None] * n_new)
+
+    max_categories = max(dimred_config.max_categories_for_ohe(), 1)
+    for candidate in info.get("color_candidates") or []:
+        series = df_new[candidate["name"]]
+        if candidate["kind"] == "categorical":
+            values, unique_values = _serialize_categorical_values(series, max_categories)
+            known = candidate.setdefault("unique_values", [])
+            known.extend([v for v in unique_values if v not in known][: max(max_categories - len(known), 0)])
+        else:
+            values, min_val, max_val = _serialize_numeric_values(series)
+            candidate["min"] = _merge_bound(candidate.get("min"), min_val, min)
+            candidate["max"] = _merge_bound(candidate.get("max"), max_val, max)
+        candidate["values"].extend(values)
+    dimred_colors.encode_color_candidates(info.get("color_candidates") or [])
+
+    embedding_new = np.round(np.asarray(embedding_new, dtype=float), dimred_config.embedding_decimals())
+    return {"embedding": cached["embedding"] + embedding_new.tolist(), "meta": meta}
+
+
+def _merge_bound(current: float | None, new: float | None, pick: Any) -> float | None:
+    values = [v for v in (current, new) if v is not None]
+    return pick(values) if values else None
+
+
+def _load_transform_rows(
+    context: types.Context,
+    data_dict: types.DataDict,
+    resource_view: dict[str, Any],
+) -> pd.DataFrame:
+    """Return the rows to project, from posted records or another resource."""
+    if data_dict.get("rows"):
+        return pd.DataFrame.from_records(data_dict["rows"])
+    if data_dict.get("source_id"):
+        source = tk.get_action("resource_show")(context, {"id": data_dict["source_id"]})
+        return _load_dataframe(source, resource_view)
+    raise tk.ValidationError({"rows": ["Provide rows or source_id."]})
+
+
+def _get_fitted_model(resource: dict[str, Any], resource_view: dict[str, Any]) -> FittedModel:
+    """Load the persisted model for resource + view settings."""
+    method_name = (resource_view.get("method") or "").strip() or dimred_config.default_method()
+    if method_name not in dimred_config.allowed_methods():
+        raise tk.ValidationError({"method": [f"Method '{method_name}' is not allowed."]})
+    if not get_projection_method(method_name).supports_transform:
+        raise DimredTransformMethodError
+
+    # fitting here would let any caller start a full refit on every request
+    model = get_model_store().load(resource["id"], _model_signature(resource_view))
+    if model is None:
+        raise DimredModelNotFoundError
+    return model
+
+
+def _model_signature(resource_view: dict[str, Any]) -> str:
+    return dimred_cache.settings_signature(_cache_settings(resource_view))
+
+
+def _save_result(
+    cache: dimred_cache.DimredCacheManager,
+    resource: dict[str, Any],
+    resource_view_id: str,
+    settings_sig: str,
+    result: dict[str, Any],
+) -> None:
+    """Cache a computed result, content-addressed when the file content is known."""
+    resource_id = resource["id"]
+    meta = result["meta"]
+    if meta.get("provisional"):
+        cache.save(resource_id, resource_view_id, settings_sig, result, ttl=dimred_cache.PROVISIONAL_TTL)
+        return
+    content_id = _content_id(resource, meta.get("prepare_info", {}).get("content_hash"))
+    if content_id:
+        cache.save(resource_id, resource_view_id, settings_sig, result, content_id=content_id)
+    else:
+        cache.save(resource_id, resource_view_id, settings_sig, result)
+
+
+def _report_run(report: dict[str, Any], resource_id: str, resource_view_id: str, meta: dict[str, Any]) -> None:
+    """Record the duration metric and log the stage timings of a computed embedding."""
+    get_metrics().observe(
+        "dimred_pipeline_duration_seconds",
+        report["total_ms"] / 1000,
+        method=meta.get("method") or "",
+        rows=row_bucket(meta.get("prepare_info", {}).get("n_rows_used") or 0),
+    )
+    dimred_timing.log_report(
+        report,
+        resource_id=resource_id,
+        view_id=resource_view_id,
+        method=meta.get("method"),
+        provisional=bool(meta.get("provisional")),
+    )
+
+
+def _resolve_preview_items(
+    context: types.Context, items: list[dict[str, str]]
+) -> tuple[dict[str, dict[str, Any]], dict[tuple[str, str], dict[str, Any]], dict[tuple[str, str], dict[str, str]]]:
+    """Fetch the resource and the views of every resource in items, once per resource.
+
+    Returns resource id -> resource, (resource id, view id) -> normalized
+    view, and (resource id, view id) -> error for items that cannot be
+    previewed (missing, not authorized, or a view of another resource).
+    """
+    resources: dict[str, dict[str, Any]] = {}
+    views: dict[tuple[str, str], dict[str, Any]] = {}
+    for resource_id in dict.fromkeys(item["id"] for item in items):
+        try:
+            resource = tk.get_action("resource_show")(dict(context), {"id": resource_id})
+            resource_views = tk.get_action("resource_view_list")(dict(context), {"id": resource_id})
+        except (tk.ObjectNotFound, tk.NotAuthorized) as err:
+            log.debug("Dimred batch preview skips resource %s: %s", resource_id, err)
+            continue
+        resources[resource_id] = resource
+        views.update({(resource_id, view["id"]): _normalize_resource_view(view) for view in resource_views})
+
+    errors: dict[tuple[str, str], dict[str, str]] = {}
+    for item in items:
+        pair = (item["id"], item["view_id"])
+        if item["id"] not in resources:
+            errors[pair] = {"type": "ObjectNotFound", "message": "Resource not found"}
+        elif pair not in views:
+            errors[pair] = {"type": "ObjectNotFound", "message": "Resource view not found"}
+    return resources, views, errors
+
+
+def _get_shared_previews(
+    cache: dimred_cache.DimredCacheManager,
+    pairs: list[tuple[str, str]],
+    views: dict[tuple[str, str], dict[str, Any]],
+    signatures: dict[tuple[str, str], str],
+    results: dict[tuple[str, str], dict[str, Any]],
+) -> dict[str, list[dict[str, Any]]]:
+    """Add to results the pairs another view with the same file and settings already computed.
+
+    Found pairs are linked to the shared entry. Returns the views still
+    missing, by resource id.
+    """
+    content_ids: dict[str, str | None] = {}
+    missing: dict[str, list[dict[str, Any]]] = {}
+    for pair in pairs:
+        resource_id, view_id = pair
+        if resource_id not in content_ids:
+            content_ids[resource_id] = cache.get_content_id(resource_id)
+        content_id = content_ids[resource_id]
+        hit = cache.get_content(content_id, signatures[pair]) if content_id else None
+        if hit:
+            cache.link(resource_id, view_id, signatures[pair], content_id)
+            results[pair] = hit
+        else:
+            missing.setdefault(resource_id, []).append(views[pair])
+    return missing
+
+
+def _compute_missing_previews(
+    resources: dict[str, dict[str, Any]], missing: dict[str, list[dict[str, Any]]]
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """Compute the embeddings of the given views, one resource per process.
+
+    With the ``process`` execution backend the resources are shared out
+    between its persistent workers, otherwise between the batch_workers
+    persistent workers of the batch backend (or computed in this process
+    if batch_workers or the number of resources is 1). Returns resource
+    id -> view id -> result or ``{"error": ...}``. A worker process that
+    dies (e.g. killed by the OOM killer) fails only the views of its
+    resource.
+    """
+    if dimred_config.execution_backend() == dimred_execution.PROCESS:
+        backend = dimred_execution.get_process_backend()
+    elif min(dimred_config.batch_workers(), len(missing)) > 1:
+        backend = dimred_execution.get_batch_backend()
+    else:
+        return {
+            resource_id: _compute_resource_previews(resources[resource_id], resource_views)
+            for resource_id, resource_views in missing.items()
+        }
+
+    tasks = {
+        resource_id: backend.submit(_compute_resource_previews, resources[resource_id], resource_views, timed=False)
+        for resource_id, resource_views in missing.items()
     }
+    outcomes = {}
+    for resource_id, task in tasks.items():
+        try:
+            outcomes[resource_id] = backend.result(task)
+        except (DimredError, tk.ValidationError) as err:
+            error = _batch_error(err)
+            outcomes[resource_id] = {view["id"]: {"error": error} for view in missing[resource_id]}
+    return outcomes
+
+
+def _compute_resource_previews(
+    resource: dict[str, Any], resource_views: list[dict[str, Any]]
+) -> dict[str, dict[str, Any]]:
+    """Read a resource once and compute the final result of each of its views.
+
+    Returns view id -> ``{"embedding", "meta"}`` or ``{"error": ...}``.
+    Usually runs in a worker process, which may read the content cache
+    and persist fitted models, but leaves saving the results to the
+    caller. A DimredTimeoutError ends the whole task.
+    """
+    opentelemetry = dimred_config.opentelemetry_enabled()
+    with dimred_timing.recording(opentelemetry) as read_recorder:
+        try:
+            loaded = _read_resource(resource, resource_views[0])
+        except DimredError as err:
+            get_metrics().inc("dimred_failures_total", error=type(err).__name__)
+            return {view["id"]: {"error": _batch_error(err)} for view in resource_views}
+    read_report = read_recorder.report()
+
+    outcomes: dict[str, dict[str, Any]] = {}
+    for resource_view in resource_views:
+        with dimred_timing.recording(opentelemetry) as recorder:
+            try:
+                embedding, meta = _build_dimred_preview(resource, resource_view, loaded=loaded)
+            except DimredTimeoutError:
+                # a worker's timeout covers the whole task, the other views
+                # would run without one
+                raise
+            except (DimredError, tk.ValidationError) as err:
+                get_metrics().inc("dimred_failures_total", error=type(err).__name__)
+                outcomes[resource_view["id"]] = {"error": _batch_error(err)}
+                continue
+            with dimred_timing.span("serialize"):
+                decimals = dimred_config.embedding_decimals()
+                embedding_serializable = np.round(np.asarray(embedding, dtype=float), decimals).tolist()
+
+        # every view is charged the shared read
+        report = recorder.report()
+        meta.setdefault(
+            "timings",
+            {
+                "total_ms": round(read_report["total_ms"] + report["total_ms"], 1),
+                "spans": [*read_report["spans"], *report["spans"]],
+            },
+        )
+        outcomes[resource_view["id"]] = {"embedding": embedding_serializable, "meta": meta}
+    return outcomes
+
+
+def _batch_error(err: Exception) -> dict[str, str]:
+    return {"type": type(err).__name__, "message": str(err)}
+
+
+def _use_progressive(resource_view: dict[str, Any]) -> bool:
+    """Return True if the view's method is slow enough to show a provisional embedding first.
+
+    The provisional embedding only lives in the cache, so progressive mode
+    needs the cache enabled.
+    """
+    if not dimred_config.progressive_enabled() or not dimred_cache.get_cache().enabled:
+        return False
+    method_name = (resource_view.get("method") or "").strip() or dimred_config.default_method()
+    return method_name != dimred_config.progressive_method()
+
+
+def _run_build(
+    resource: dict[str, Any], resource_view: dict[str, Any], provisional: bool = False
+) -> tuple[np.ndarray, dict[str, Any]]:
+    """Run _build_dimred_preview with the configured execution backend."""
+    if dimred_config.execution_backend() != dimred_execution.PROCESS:
+        return _build_dimred_preview(resource, resource_view, provisional=provisional)
+    with dimred_timing.span("worker"):
+        return dimred_execution.get_process_backend().run(_build_dimred_preview, resource, resource_view, provisional)
 
 
 def _build_dimred_preview(
     resource: dict[str, Any],
     resource_view: dict[str, Any],
+    provisional: bool = False,
+    loaded: tuple[pd.DataFrame, BaseAdapter] | None = None,
 ) -> tuple[np.ndarray, dict[str, Any]]:
-    """Run the dimred pipeline for a given resource + view."""
+    """Run the dimred pipeline for a given resource + view.
+
+    If a file with the same content was already embedded with the same
+    settings (e.g. the same upload in another dataset), that result is
+    reused right after reading the file, without fitting. Otherwise, with
+    ``provisional``, a quick provisional embedding is returned instead of
+    the final one. The fitted model is persisted when the method can
+    transform new rows. ``loaded`` is the (dataframe, adapter) pair of an
+    already read resource.
+    """
+    df, adapter = loaded or _read_resource(resource, resource_view)
+
+    content_id = _content_id(resource, (adapter.content_fingerprint or {}).get("sha256"))
+    if content_id:
+        cache = dimred_cache.get_cache()
+        cached = cache.get_content(content_id, cache.settings_signature(_cache_settings(resource_view)))
+        if cached:
+            return np.asarray(cached["embedding"], dtype=float), cached["meta"]
+
+    if provisional:
+        return _fit_provisional_embedding(df, resource_view)
+
+    embedding, meta, model = _fit_dimred_model(resource, resource_view, (df, adapter))
+    if model.reducer.supports_transform:
+        with dimred_timing.span("model_save"):
+            get_model_store().save(resource["id"], _model_signature(resource_view), model)
+    return embedding, meta
+
+
+def _fit_dimred_model(
+    resource: dict[str, Any],
+    resource_view: dict[str, Any],
+    loaded: tuple[pd.DataFrame, BaseAdapter] | None = None,
+) -> tuple[np.ndarray, dict[str, Any], FittedModel]:
+    """Fit preprocessing + reducer and return the embedding, metadata and model.
+
+    ``loaded`` is the (dataframe, adapter) pair of an already read resource.
+    """
     method_name = (resource_view.get("method") or "").strip() or dimred_config.default_method()
     allowed_methods = set(dimred_config.allowed_methods())
 
@@ -128,19 +932,89 @@ def _build_dimred_preview(
 
     reducer: BaseProjectionMethod = method_cls(**method_params)
 
-    x_matrix, prepare_info = _prepare_matrix_from_resource(resource, resource_view)
+    peak_before = dimred_memory.peak_rss_bytes()
+    df, adapter = loaded or _read_resource(resource, resource_view)
+    with dimred_timing.span("prepare"):
+        x_matrix, prepare_info, preprocessor = _prepare_matrix(df, resource_view)
+    prepare_info["content_hash"] = (adapter.content_fingerprint or {}).get("sha256")
 
-    embedding = reducer.fit_transform(x_matrix)
+    with dimred_timing.span("fit", method=method_name, rows=x_matrix.shape[0], features=x_matrix.shape[1]):
+        embedding = reducer.fit_transform(x_matrix)
+    prepare_info["memory_peak_growth_mb"] = dimred_memory.peak_growth_mb(peak_before)
 
     meta: dict[str, Any] = {
         "method": method_name,
         "method_params": reducer.params,
         "prepare_info": prepare_info,
     }
+    model_info = {k: v for k, v in prepare_info.items() if k not in ("color_values", "color_candidates")}
+    fingerprint = _append_fingerprint(adapter, df) if reducer.supports_transform else None
+    model = FittedModel(method_name, preprocessor, reducer, model_info, fingerprint)
+
+    return embedding, meta, model
+
+
+def _fit_provisional_embedding(df: pd.DataFrame, resource_view: dict[str, Any]) -> tuple[np.ndarray, dict[str, Any]]:
+    """Embed df with the fast ``ckanext.dimred.progressive_method``.
 
+    Default parameters of that method are used (the view's method_params
+    belong to its own method), with the view's number of components. The
+    metadata is marked provisional and names the method still running.
+    """
+    method_name = dimred_config.progressive_method()
+    provisional_view = {**resource_view, "method": method_name, "method_params": {}}
+    params = {}
+    n_components = _parse_n_components(resource_view.get("n_components"))
+    if n_components is not None:
+        params["n_components"] = n_components
+    reducer: BaseProjectionMethod = get_projection_method(method_name)(**params)
+
+    max_rows = min(filter(None, [dimred_config.progressive_max_rows(), dimred_config.max_rows()]), default=None)
+    with dimred_timing.span("prepare"):
+        x_matrix, prepare_info, _ = _prepare_matrix(df, provisional_view, max_rows=max_rows)
+    with dimred_timing.span("fit", method=method_name, rows=x_matrix.shape[0], features=x_matrix.shape[1]):
+        embedding = reducer.fit_transform(x_matrix)
+    meta: dict[str, Any] = {
+        "method": method_name,
+        "method_params": reducer.params,
+        "prepare_info": prepare_info,
+        "provisional": True,
+        "final_method": (resource_view.get("method") or "").strip() or dimred_config.default_method(),
+    }
     return embedding, meta
 
 
+def _append_fingerprint(adapter: BaseAdapter, df: pd.DataFrame) -> dict[str, Any] | None:
+    """Return the fingerprint used to detect later appends to the file, if applicable.
+
+    It comes from the read the model was fitted on, and records the header
+    and column dtype kinds that appended rows are parsed with. Only local
+    files are considered: reading the appended rows of a remote file would
+    mean downloading it again anyway.
+    """
+    if not dimred_config.incremental_enabled() or adapter.remote or not adapter.supports_append:
+        return None
+    if adapter.content_fingerprint is None:
+        return None
+    return {**adapter.content_fingerprint, "columns": df.columns.tolist(), "kinds": column_kinds(df)}
+
+
+def _content_id(resource: dict[str, Any], content_hash: str | None) -> str | None:
+    """Return the content-addressed cache id of a file (its hash, qualified by format)."""
+    if not content_hash:
+        return None
+    res_format = (resource.get("format") or "").lower() or "unknown"
+    return f"{res_format}:{content_hash}"
+
+
+def _normalize_resource_view(resource_view: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of resource_view with method_params parsed into a dict."""
+    method_params = _parse_method_params(resource_view.get("method_params"))
+    resource_view = dict(resource_view)
+    resource_view["method_params"] = method_params
+    return resource_view
+
+
 def _cache_settings(resource_view: dict[str, Any]) -> dict[str, Any]:
     """Build settings dict that affects cache identity."""
     method_name = (resource_view.get("method") or "").strip() or dimred_config.default_method()
@@ -151,6 +1025,8 @@ def _cache_settings(resource_view: dict[str, Any]) -> dict[str, Any]:
         "color_by": resource_view.get("color_by"),
         "n_components": resource_view.get("n_components"),
         "max_rows": dimred_config.max_rows(),
+        "sampling_strategy": dimred_config.sampling_strategy(),
+        "sampling_class_cap": dimred_config.sampling_class_cap(),
         "enable_categorical": dimred_config.enable_categorical(),
         "max_categories_for_ohe": dimred_config.max_categories_for_ohe(),
     }
@@ -193,77 +1069,209 @@ def _parse_n_components(raw_value: Any) -> int | None:
     return parsed
 
 
-def _prepare_matrix_from_resource(
-    resource: dict[str, Any],
+def _prepare_matrix(
+    df: pd.DataFrame,
     resource_view: dict[str, Any],
-) -> tuple[np.ndarray, dict[str, Any]]:
-    """Load a tabular resource, select suitable columns and return a feature matrix.
+    max_rows: int | None = None,
+) -> tuple[np.ndarray, dict[str, Any], FeaturePreprocessor]:
+    """Select suitable columns of a loaded resource and return a feature matrix.
 
     Features:
     - numeric columns are always included;
     - optional low-cardinality categorical columns are one-hot encoded
       if enabled in config;
     - optional 'color_by' column is passed through to metadata.
-    """
-    df = _load_dataframe(resource, resource_view)
-    df, n_rows_original = _maybe_limit_rows(df)
 
-    color_by, color_values = _extract_color_info(df, resource_view)
+    max_rows overrides ``ckanext.dimred.max_rows``.
+    """
+    n_rows_original = len(df)
     selected_features = _extract_selected_features(df, resource_view)
-
     numeric_cols = _select_numeric_columns(df, selected_features)
-    categorical_cols = _select_categorical_columns(df, numeric_cols, color_by, selected_features)
-    color_candidates = _build_color_candidates(df, color_by, numeric_cols, categorical_cols)
-
-    df_features = _build_feature_frame(df, numeric_cols, categorical_cols)
-
-    scaler = StandardScaler()
-    x_matrix = scaler.fit_transform(df_features.values)
+    color_by_col = _color_by_column(df, resource_view)
+    categorical_cols = _select_categorical_columns(df, numeric_cols, color_by_col, selected_features)
+
+    with dimred_timing.span("sample"):
+        df, sampling = _maybe_limit_rows(df, numeric_cols, color_by_col, max_rows)
+        sparse = _use_sparse_features(
+            resource_view,
+            len(numeric_cols) + len(categorical_cols),
+            dimred_memory.encoded_width(df, numeric_cols, categorical_cols),
+        )
+        df, memory_estimate, memory_sampled = _fit_memory_budget(
+            df, numeric_cols, categorical_cols, sparse, color_by_col
+        )
+
+    with dimred_timing.span("colors"):
+        color_by, color_values = _extract_color_info(df, resource_view)
+        color_candidates = _build_color_candidates(df, color_by, numeric_cols, categorical_cols)
+
+    preprocessor = FeaturePreprocessor(numeric_cols, categorical_cols, sparse=sparse)
+    with dimred_timing.span("features"):
+        x_matrix = preprocessor.fit_transform(df)
 
     info: dict[str, Any] = {
         "n_rows_original": n_rows_original,
         "n_rows_used": len(df),
+        "sampling": sampling,
         "n_features": x_matrix.shape[1],
+        "sparse": sparse,
         "numeric_used": numeric_cols,
         "categorical_used": categorical_cols,
         "color_by": color_by or None,
         "color_values": color_values,
         "feature_columns": selected_features or None,
         "color_candidates": color_candidates,
+        "memory_estimate_mb": round(memory_estimate / dimred_memory.MB, 1),
+        "memory_sampled": memory_sampled,
     }
 
-    return x_matrix, info
+    return x_matrix, info, preprocessor
 
 
 def _load_dataframe(resource: dict[str, Any], resource_view: dict[str, Any]) -> pd.DataFrame:
     """Load dataframe via adapter with validation."""
+    return _read_resource(resource, resource_view)[0]
+
+
+def _read_resource(
+    resource: dict[str, Any], resource_view: dict[str, Any], cached: bool = True
+) -> tuple[pd.DataFrame, BaseAdapter]:
+    """Load dataframe via adapter with validation; the adapter holds the content fingerprint.
+
+    Unless ``cached`` is false, the pair is shared through the worker's
+    frame cache when the file has a source signature, so the frame must
+    not be modified.
+    """
     adapter_cls = dimred_utils.get_adapter_for_resource(resource)
     if adapter_cls is None:
         res_format = (resource.get("format") or "").lower()
         raise DimredAdapterNotFoundError(res_format)
 
     adapter = adapter_cls(resource, resource_view)
-    df = adapter.get_dataframe()
+    max_categories = dimred_config.max_categories_for_ohe()
+    signature = adapter.source_signature() if cached else None
+    if signature is None:
+        return _parse_resource(adapter, max_categories)[0]
+
+    return get_frame_cache().get_or_load(
+        resource["id"], f"{signature}|{max_categories}", lambda: _parse_resource(adapter, max_categories)
+    )
+
+
+def _parse_resource(adapter: BaseAdapter, max_categories: int) -> tuple[tuple[pd.DataFrame, BaseAdapter], int]:
+    """Read and categorize the adapter's content; returns the (frame, adapter) pair and the frame's size."""
+    with dimred_timing.span("read"):
+        df = adapter.get_dataframe()
 
     if df.empty:
         raise DimredFeatureError
 
-    return df
+    with dimred_timing.span("categorize"):
+        df = categorize_columns(df, max_categories)
+    return (df, adapter), dimred_memory.frame_bytes(df)
 
 
-def _maybe_limit_rows(df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
-    """Apply max_rows sampling if configured."""
-    n_rows_original = len(df)
-    max_rows = dimred_config.max_rows()
-    if max_rows and n_rows_original > max_rows:
-        df = df.sample(max_rows, random_state=42).reset_index(drop=True)
-    return df, n_rows_original
+def _maybe_limit_rows(
+    df: pd.DataFrame,
+    numeric_cols: list[str],
+    color_by: str = "",
+    max_rows: int | None = None,
+) -> tuple[pd.DataFrame, str | None]:
+    """Apply max_rows sampling if configured.
+
+    Returns the (possibly sampled) frame and the sampling strategy used, or
+    None if all rows were kept. With a per-class cap, stratified and
+    density sampling also apply to frames below max_rows.
+    """
+    max_rows = max_rows or dimred_config.max_rows() or len(df)
+    strategy = dimred_config.sampling_strategy()
+    class_cap = dimred_config.sampling_class_cap() if strategy != dimred_sampling.UNIFORM else 0
+    if len(df) <= max_rows and not class_cap:
+        return df, None
+
+    sampled, strategy = _sample_rows(df, max_rows, numeric_cols, color_by)
+    return sampled, strategy if len(sampled) < len(df) else None
+
+
+def _sample_rows(
+    df: pd.DataFrame, n_rows: int, numeric_cols: list[str], color_by: str = ""
+) -> tuple[pd.DataFrame, str]:
+    """Pick at most n_rows rows with the configured sampling strategy."""
+    return dimred_sampling.sample_rows(
+        df,
+        n_rows,
+        strategy=dimred_config.sampling_strategy(),
+        stratify_by=color_by,
+        numeric_cols=numeric_cols,
+        class_cap=dimred_config.sampling_class_cap(),
+    )
+
+
+def _use_sparse_features(resource_view: dict[str, Any], n_values: int, width: int) -> bool:
+    """Return True if the view's method should get a sparse, uncentered feature matrix.
+
+    n_values is the number of non-zero features per row (one per numeric
+    and per categorical column), width the number of encoded features.
+    Parameters the method cannot honour on sparse input (e.g. a UMAP
+    metric outside SPARSE_METRICS) keep the dense matrix.
+    """
+    max_density = dimred_config.sparse_max_density()
+    if not max_density or not width:
+        return False
+    method_name = (resource_view.get("method") or "").strip() or dimred_config.default_method()
+    try:
+        method_cls = get_projection_method(method_name)
+    except KeyError:
+        return False
+    method_params = _parse_method_params(resource_view.get("method_params"))
+    return method_cls.accepts_sparse_params(method_params) and n_values / width <= max_density
+
+
+def _fit_memory_budget(
+    df: pd.DataFrame,
+    numeric_cols: list[str],
+    categorical_cols: list[str],
+    sparse: bool = False,
+    color_by: str = "",
+) -> tuple[pd.DataFrame, int, bool]:
+    """Sample df down so the estimated pipeline peak fits ``ckanext.dimred.max_memory_mb``.
+
+    Rows are picked with the configured sampling strategy, like for max_rows.
+
+    Returns the (possibly sampled) frame, the estimated peak in bytes and
+    whether rows were dropped. Raises DimredMemoryLimitError if not even
+    a small sample would fit.
+    """
+    base, per_row = dimred_memory.estimate_peak_bytes(df, numeric_cols, categorical_cols, sparse)
+    estimate = base + per_row * len(df)
+    limit = dimred_config.max_memory_mb() * dimred_memory.MB
+    if not limit or estimate <= limit:
+        return df, estimate, False
+
+    rows_fit = (limit - base) // per_row if per_row else 0
+    if rows_fit < min(len(df), dimred_memory.MIN_SAMPLE_ROWS):
+        log.info(
+            "Dimred preview needs about %s MB, above the %s MB limit",
+            estimate // dimred_memory.MB,
+            dimred_config.max_memory_mb(),
+        )
+        raise DimredMemoryLimitError
+
+    log.info("Dimred sampling %s of %s rows to stay within the memory limit", rows_fit, len(df))
+    df, _ = _sample_rows(df, rows_fit, numeric_cols, color_by)
+    return df, base + per_row * len(df), True
+
+
+def _color_by_column(df: pd.DataFrame, resource_view: dict[str, Any]) -> str:
+    """Return the color_by column of the view if df has it, else an empty string."""
+    color_by = (resource_view.get("color_by") or "").strip()
+    return color_by if color_by in df.columns else ""
 
 
 def _extract_color_info(df: pd.DataFrame, resource_view: dict[str, Any]) -> tuple[str, list[str] | None]:
     """Extract color_by and corresponding values."""
-    color_by = (resource_view.get("color_by") or "").strip()
-    if color_by and color_by in df.columns:
+    color_by = _color_by_column(df, resource_view)
+    if color_by:
         series = df[color_by]
         kind = _infer_color_kind(series)
         if kind == "numeric":
@@ -321,8 +1329,8 @@ def _select_categorical_columns(
             continue
         if selected_features and col not in selected_features:
             continue
-        n_unique = df[col].nunique(dropna=True)
-        if 1 < n_unique <= max_cat:
+        n_unique = bounded_nunique(df[col], max_cat)
+        if n_unique is not None and n_unique > 1:
             categorical_cols.append(col)
     return categorical_cols
 
@@ -333,7 +1341,11 @@ def _build_color_candidates(
     numeric_cols: list[str],
     categorical_cols: list[str],
 ) -> list[dict[str, Any]]:
-    """Prepare color candidates metadata for the frontend dropdown."""
+    """Prepare color candidates metadata for the frontend dropdown.
+
+    Every candidate carries its values and their compact ``encoding`` (see
+    ``encode_color_candidate``), which is all the chart needs.
+    """
     candidates: list[dict[str, Any]] = []
     seen: set[str] = set()
     max_categories = max(dimred_config.max_categories_for_ohe(), 1)
@@ -348,8 +1360,8 @@ def _build_color_candidates(
         kind = _infer_color_kind(series)
 
         if kind == "categorical":
-            n_unique = series.nunique(dropna=True)
-            if not force and (n_unique <= 1 or n_unique > max_categories):
+            n_unique = bounded_nunique(series, max_categories)
+            if not force and (n_unique is None or n_unique <= 1):
                 return
             values, unique_values = _serialize_categorical_values(series, max_categories)
             candidates.append(
@@ -385,6 +1397,7 @@ def _build_color_candidates(
     for col in numeric_cols:
         add_candidate(col)
 
+    dimred_colors.encode_color_candidates(candidates)
     return candidates
 
 
@@ -433,21 +1446,3 @@ def _serialize_numeric_values(series: pd.Series) -> tuple[list[Any], float | Non
     min_val = float(np.min(finite_values))
     max_val = float(np.max(finite_values))
     return values, min_val, max_val
-
-
-def _build_feature_frame(df: pd.DataFrame, numeric_cols: list[str], categorical_cols: list[str]) -> pd.DataFrame:
-    """Assemble feature frame with one-hot encoding and basic cleaning."""
-    feature_cols = numeric_cols + categorical_cols
-    df_features = df[feature_cols].copy()
-
-    if categorical_cols:
-        df_features = pd.get_dummies(df_features, columns=categorical_cols, dummy_na=False, drop_first=False)
-
-    df_features = df_features.astype(float)
-    df_features = df_features.fillna(df_features.mean())
-    df_features = df_features.fillna(0.0)
-
-    if df_features.shape[1] < 2:  # noqa PLR2004
-        raise DimredFeatureError
-
-    return df_features
@@ -6,11 +6,28 @@ from ckan.logic.schema import validator_args
 def dimred_get_dimred_preview_schema(
     not_empty: types.Validator,
     unicode_safe: types.Validator,
+    ignore_missing: types.Validator,
+    boolean_validator: types.Validator,
 ) -> types.Schema:
     """Validation schema for the dimred_get_dimred_preview action."""
     return {
         "id": [not_empty, unicode_safe],
         "view_id": [not_empty, unicode_safe],
+        "progressive": [ignore_missing, boolean_validator],
+    }
+
+
+@validator_args
+def dimred_get_dimred_previews_schema(
+    not_empty: types.Validator,
+    unicode_safe: types.Validator,
+) -> types.Schema:
+    """Validation schema for batch dimred previews."""
+    return {
+        "items": {
+            "id": [not_empty, unicode_safe],
+            "view_id": [not_empty, unicode_safe],
+        },
     }
 
 
@@ -39,9 +56,71 @@ def dimred_form_schema(  # noqa PLR0913
 def dimred_export_embedding_schema(
     not_empty: types.Validator,
     unicode_safe: types.Validator,
+    ignore_missing: types.Validator,
+    boolean_validator: types.Validator,
+    dimred_export_format: types.Validator,
 ) -> types.Schema:
     """Validation schema for exporting embedding."""
     return {
         "id": [not_empty, unicode_safe],
         "view_id": [not_empty, unicode_safe],
+        "format": [ignore_missing, dimred_export_format],
+        "include_candidates": [ignore_missing, boolean_validator],
+        "stream": [ignore_missing, boolean_validator],
+    }
+
+
+@validator_args
+def dimred_get_dimred_image_schema(
+    not_empty: types.Validator,
+    unicode_safe: types.Validator,
+) -> types.Schema:
+    """Validation schema for the embedding PNG image."""
+    return {
+        "id": [not_empty, unicode_safe],
+        "view_id": [not_empty, unicode_safe],
+    }
+
+
+@validator_args
+def dimred_transform_rows_schema(
+    not_empty: types.Validator,
+    unicode_safe: types.Validator,
+    ignore_missing: types.Validator,
+    dimred_rows_list: types.Validator,
+) -> types.Schema:
+    """Validation schema for projecting new rows into an embedding."""
+    return {
+        "id": [not_empty, unicode_safe],
+        "view_id": [not_empty, unicode_safe],
+        "rows": [ignore_missing, dimred_rows_list],
+        "source_id": [ignore_missing, unicode_safe],
+    }
+
+
+@validator_args
+def dimred_update_resource_embeddings_schema(
+    not_empty: types.Validator,
+    unicode_safe: types.Validator,
+) -> types.Schema:
+    """Validation schema for updating the embeddings of a changed resource."""
+    return {
+        "id": [not_empty, unicode_safe],
+    }
+
+
+@validator_args
+def dimred_profile_view_schema(
+    not_empty: types.Validator,
+    unicode_safe: types.Validator,
+    ignore_missing: types.Validator,
+    natural_number_validator: types.Validator,
+    dimred_profile_format: types.Validator,
+) -> types.Schema:
+    """Validation schema for profiling the pipeline of a view."""
+    return {
+        "id": [not_empty, unicode_safe],
+        "view_id": [not_empty, unicode_safe],
+        "format": [ignore_missing, dimred_profile_format],
+        "top": [ignore_missing, natural_number_validator],
     }
@@ -8,6 +8,8 @@ import ckan.plugins.toolkit as tk
 from ckan import types
 
 from ckanext.dimred import config as dimred_config
+from ckanext.dimred.utils.export import EXPORT_FORMATS
+from ckanext.dimred.utils.profiling import PROFILE_FORMATS
 
 log = logging.getLogger(__name__)
 
@@ -108,3 +110,41 @@ def dimred_n_components(value: Any, context: types.Context) -> int | Any:
         raise tk.Invalid(tk._("n_components must be 2 or 3."))
 
     return parsed
+
+
+def dimred_export_format(value: Any, context: types.Context) -> str:
+    """Validate that the export format is supported."""
+    if value in (None, ""):
+        return "csv"
+
+    export_format = str(value).strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        raise tk.Invalid(tk._("Export format must be one of: {formats}.").format(formats=", ".join(EXPORT_FORMATS)))
+
+    return export_format
+
+
+def dimred_profile_format(value: Any, context: types.Context) -> str:
+    """Validate that the profile format is supported."""
+    if value in (None, ""):
+        return "speedscope"
+
+    profile_format = str(value).strip().lower()
+    if profile_format not in PROFILE_FORMATS:
+        raise tk.Invalid(tk._("Profile format must be one of: {formats}.").format(formats=", ".join(PROFILE_FORMATS)))
+
+    return profile_format
+
+
+def dimred_rows_list(value: Any, context: types.Context) -> list[dict[str, Any]]:
+    """Validate that rows is a list of objects (or a JSON string of one)."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError as err:
+            raise tk.Invalid(tk._("Invalid JSON in rows.")) from err
+
+    if not isinstance(value, list) or not all(isinstance(row, dict) for row in value):
+        raise tk.Invalid(tk._("rows must be a list of objects."))
+
+    return value
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from ckanext.dimred.methods.base import BaseProjectionMethod
 from ckanext.dimred.methods.pca import PCAProjection
+from ckanext.dimred.methods.svd import SVDProjection
 from ckanext.dimred.methods.tsne import TSNEProjection
 from ckanext.dimred.methods.umap import UMAPProjection
 
@@ -9,6 +10,7 @@ PROJECTION_METHODS: dict[str, type[BaseProjectionMethod]] = {
     UMAPProjection.name: UMAPProjection,
     TSNEProjection.name: TSNEProjection,
     PCAProjection.name: PCAProjection,
+    SVDProjection.name: SVDProjection,
 }
 
 
@@ -25,6 +27,7 @@ __all__ = [
     "UMAPProjection",
     "TSNEProjection",
     "PCAProjection",
+    "SVDProjection",
     "PROJECTION_METHODS",
     "get_projection_method",
 ]
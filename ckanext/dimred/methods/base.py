@@ -5,15 +5,24 @@ from typing import Any
 
 import numpy as np
 
+from ckanext.dimred.exception import DimredTransformMethodError
+
 
 class BaseProjectionMethod(ABC):
     """Base class for all dimensionality reduction methods (UMAP, t-SNE, PCA, ...).
 
     - default_params() should return method-specific default parameters.
     - __init__ merges defaults with the parameters passed from the caller.
+    - methods that can place new points into a fitted embedding set
+      supports_transform and implement transform().
+    - methods that work on scipy sparse matrices set accepts_sparse; they
+      are fed uncentered sparse features when most features are one-hot,
+      unless accepts_sparse_params() turns down the view's parameters.
     """
 
     name: str = "base"
+    supports_transform: bool = False
+    accepts_sparse: bool = False
 
     def __init__(self, **params: Any) -> None:
         self.params: dict[str, Any] = self._merge_with_defaults(params)
@@ -24,6 +33,11 @@ class BaseProjectionMethod(ABC):
         """Return a dictionary of default parameters for the method."""
         raise NotImplementedError
 
+    @classmethod
+    def accepts_sparse_params(cls, params: dict[str, Any]) -> bool:
+        """Return True if the method, run with params, may be fed sparse features."""
+        return cls.accepts_sparse
+
     def _merge_with_defaults(self, params: dict[str, Any]) -> dict[str, Any]:
         """Merge the method's default parameters with the given params.
 
@@ -43,3 +57,11 @@ class BaseProjectionMethod(ABC):
         :return: Embedding matrix.
         """
         raise NotImplementedError
+
+    def transform(self, x_matrix: np.ndarray):
+        """Project new rows into the embedding learned by fit_transform().
+
+        :param x_matrix: Input data matrix, encoded like the fitted one.
+        :return: Embedding matrix for the new rows.
+        """
+        raise DimredTransformMethodError
@@ -13,6 +13,7 @@ class PCAProjection(BaseProjectionMethod):
     """Wrapper around sklearn.decomposition.PCA."""
 
     name = "pca"
+    supports_transform = True
 
     def __init__(self, **params: Any) -> None:
         super().__init__(**params)
@@ -34,3 +35,7 @@ class PCAProjection(BaseProjectionMethod):
     def fit_transform(self, x_matrix: np.ndarray):
         """Run PCA and return the embedding matrix."""
         return self._reducer.fit_transform(x_matrix)
+
+    def transform(self, x_matrix: np.ndarray):
+        """Project new rows with the fitted PCA model."""
+        return self._reducer.transform(x_matrix)
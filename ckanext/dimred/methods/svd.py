@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.methods.base import BaseProjectionMethod
+
+
+class SVDProjection(BaseProjectionMethod):
+    """Wrapper around sklearn.decomposition.TruncatedSVD.
+
+    A PCA alternative that works on sparse matrices, as it does not center
+    the data.
+    """
+
+    name = "svd"
+    supports_transform = True
+    accepts_sparse = True
+
+    def __init__(self, **params: Any) -> None:
+        super().__init__(**params)
+        self._reducer = TruncatedSVD(
+            n_components=self.params["n_components"],
+            random_state=self.params.get("random_state", 42),
+        )
+
+    @classmethod
+    def default_params(cls) -> dict[str, Any]:
+        """Return default parameters for truncated SVD."""
+        return {
+            "n_components": dimred_config.svd_n_components(),
+            "random_state": 42,
+        }
+
+    def fit_transform(self, x_matrix: np.ndarray):
+        """Run truncated SVD and return the embedding matrix."""
+        return self._reducer.fit_transform(x_matrix)
+
+    def transform(self, x_matrix: np.ndarray):
+        """Project new rows with the fitted SVD model."""
+        return self._reducer.transform(x_matrix)
@@ -11,11 +11,27 @@ from ckanext.dimred.methods.base import BaseProjectionMethod
 
 log = logging.getLogger(__name__)
 
+# metrics umap-learn computes on sparse input that, like euclidean
+# distances, do not depend on centering
+SPARSE_METRICS = (
+    "euclidean",
+    "manhattan",
+    "l1",
+    "taxicab",
+    "chebyshev",
+    "linf",
+    "linfinity",
+    "linfty",
+    "minkowski",
+)
+
 
 class UMAPProjection(BaseProjectionMethod):
     """Wrapper around umap-learn."""
 
     name = "umap"
+    supports_transform = True
+    accepts_sparse = True
 
     def __init__(self, **params: Any) -> None:
         super().__init__(**params)
@@ -24,6 +40,7 @@ class UMAPProjection(BaseProjectionMethod):
             n_neighbors=self.params["n_neighbors"],
             min_dist=self.params["min_dist"],
             n_components=self.params["n_components"],
+            metric=self.params.get("metric", "euclidean"),
             random_state=self.params.get("random_state", 42),
         )
 
@@ -37,6 +54,15 @@ class UMAPProjection(BaseProjectionMethod):
             "random_state": 42,
         }
 
+    @classmethod
+    def accepts_sparse_params(cls, params: dict[str, Any]) -> bool:
+        """Return True unless params pick a metric that differs on uncentered features."""
+        return (params.get("metric") or "euclidean") in SPARSE_METRICS
+
     def fit_transform(self, x_matrix: np.ndarray):
         """Run UMAP and return the embedding matrix."""
         return self._reducer.fit_transform(x_matrix)
+
+    def transform(self, x_matrix: np.ndarray):
+        """Project new rows with the fitted UMAP model."""
+        return self._reducer.transform(x_matrix)
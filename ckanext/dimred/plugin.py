@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any
+import logging
+from typing import Any, cast
 
 import numpy as np
 
@@ -10,14 +11,22 @@ from ckan import types
 from ckan.common import CKANConfig
 
 from ckanext.dimred import config as dimred_config
+from ckanext.dimred import jobs
 from ckanext.dimred import utils as dimred_utils
 from ckanext.dimred.adapters import adapter_registry
 from ckanext.dimred.exception import DimredError, DimredPreviewError
 from ckanext.dimred.logic import schema
-from ckanext.dimred.utils import cache as dimred_cache
+from ckanext.dimred.utils.models import get_model_store
+
+log = logging.getLogger(__name__)
+
+# context key mapping resources whose file changed to whether the cached
+# embeddings may be updated incrementally
+PENDING_UPDATES_KEY = "dimred_pending_updates"
 
 
 @tk.blanket.actions
+@tk.blanket.cli
 @tk.blanket.config_declarations
 @tk.blanket.helpers
 @tk.blanket.validators
@@ -73,7 +82,7 @@ class DimredPlugin(p.SingletonPlugin):
 
         if not resource_view.get("id"):
             return {
-                "image_data_url": None,
+                "image_url": None,
                 "embedding": None,
                 "meta": {},
                 "error": None,
@@ -86,7 +95,12 @@ class DimredPlugin(p.SingletonPlugin):
         try:
             result = tk.get_action("dimred_get_dimred_preview")(
                 {},
-                {"id": resource["id"], "view_id": resource_view["id"]},
+                {
+                    "id": resource["id"],
+                    "view_id": resource_view["id"],
+                    # only the JS backends can swap in the final embedding
+                    "progressive": render_backend != "matplotlib",
+                },
             )
 
             _raise_if_error(result)
@@ -97,20 +111,25 @@ class DimredPlugin(p.SingletonPlugin):
             summary = dimred_utils.build_display_summary(meta, summary_raw)
 
             if render_backend == "matplotlib":
-                image_data_url = dimred_utils.embedding_to_png_data_url(np.array(embedding), meta)
+                # the PNG is rendered (and cached) by the image route on demand
+                image_url = tk.url_for(
+                    "dimred.embedding_image",
+                    resource_id=resource["id"],
+                    view_id=resource_view["id"],
+                )
                 embedding = None  # avoid passing large arrays to the template when unused
             else:
-                image_data_url = None
+                image_url = None
             error = None
         except (DimredError, tk.ValidationError, tk.NotAuthorized) as exc:
-            image_data_url = None
+            image_url = None
             embedding = None
             meta = {}
             summary = {}
             error = str(exc)
 
         return {
-            "image_data_url": image_data_url,
+            "image_url": image_url,
             "render_backend": render_backend,
             "embedding": embedding,
             "meta": meta,
@@ -129,14 +148,42 @@ class DimredPlugin(p.SingletonPlugin):
 
     # IResourceController
 
+    def after_resource_create(self, context: types.Context, resource: dict[str, Any]):
+        jobs.enqueue_warmup(resource["id"])
+
     def before_resource_update(self, context: types.Context, current: dict[str, Any], resource: dict[str, Any]):
-        if _resource_data_changed(current, resource):
-            cache = dimred_cache.get_cache()
-            cache.delete_for_resource(current["id"])
+        if not _resource_data_changed(current, resource):
+            return
+
+        # the new file is only on disk after the update, so incremental
+        # updates and warm-up happen in after_resource_update
+        incremental = (
+            dimred_config.incremental_enabled()
+            and get_model_store().enabled
+            and _is_upload_replacement(current, resource)
+        )
+        pending = cast(dict[str, Any], context).setdefault(PENDING_UPDATES_KEY, {})
+        pending[current["id"]] = incremental
+
+        if not incremental:
+            jobs.invalidate_resource(current["id"])
+
+    def after_resource_update(self, context: types.Context, resource: dict[str, Any]):
+        pending = cast(dict[str, Any], context).get(PENDING_UPDATES_KEY) or {}
+        if resource["id"] not in pending:
+            return
+
+        if pending.pop(resource["id"]):
+            # reading and hashing the new file is left to a job, which also
+            # warms the views it could not update
+            if jobs.enqueue_incremental_update(resource["id"]):
+                return
+            jobs.invalidate_resource(resource["id"])
+
+        jobs.enqueue_warmup(resource["id"])
 
     def before_resource_delete(self, context: types.Context, resource: dict[str, Any]):
-        cache = dimred_cache.get_cache()
-        cache.delete_for_resource(resource["id"])
+        jobs.invalidate_resource(resource["id"])
 
 
 def _raise_if_error(result: dict[str, Any] | None) -> None:
@@ -147,6 +194,12 @@ def _raise_if_error(result: dict[str, Any] | None) -> None:
         raise DimredPreviewError(str(result["error"]))
 
 
+def _is_upload_replacement(current: dict[str, Any] | None, resource: dict[str, Any]) -> bool:
+    """Return True if an uploaded file is replaced by a new upload (same location)."""
+    uploading = bool(resource.get("upload") or resource.get("upload_file"))
+    return uploading and (current or {}).get("url_type") == "upload"
+
+
 def _resource_data_changed(current: dict[str, Any] | None, resource: dict[str, Any]) -> bool:
     """Return True if the resource file/URL changed (not just metadata)."""
     if resource.get("upload") or resource.get("upload_file"):
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import pytest
+
+from ckanext.dimred.tests.benchmarks.datasets import cached_dataset
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:  # the suite needs the dev extra
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(scope="session")
+def csv_path(tmp_path_factory):
+    """Return a function writing a dataset to CSV (once) and returning its path."""
+    root = tmp_path_factory.mktemp("dimred-bench")
+
+    def write(shape: str, n_rows: int) -> str:
+        path = root / f"{shape}-{n_rows}.csv"
+        if not path.exists():
+            cached_dataset(shape, n_rows).to_csv(path, index=False)
+        return str(path)
+
+    return write
@@ -0,0 +1,81 @@
+"""Synthetic datasets for the benchmark suite.
+
+Every generator is seeded, so a (shape, rows) pair always produces the
+same frame and results are comparable between commits.
+"""
+
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+SHAPES = ("numeric", "mixed", "wide", "tall", "imbalanced")
+ROW_COUNTS = (1_000, 10_000, 50_000, 200_000)
+
+WIDE_COLUMNS = 200
+IMBALANCED_LABELS = ("major", "minor_a", "minor_b", "minor_c", "minor_d")
+IMBALANCED_SHARES = (0.95, 0.0125, 0.0125, 0.0125, 0.0125)
+
+
+class UnknownShapeError(ValueError):
+    def __init__(self, shape: str) -> None:
+        super().__init__(f"Unknown dataset shape: {shape}")
+
+
+def bench_row_counts() -> list[int]:
+    """Row counts to benchmark; ``DIMRED_BENCH_ROWS=1000,10000`` narrows them down."""
+    raw = os.environ.get("DIMRED_BENCH_ROWS")
+    return [int(value) for value in raw.split(",")] if raw else list(ROW_COUNTS)
+
+
+def rows_id(n_rows: int) -> str:
+    return f"{n_rows // 1000}k" if n_rows >= 1000 else str(n_rows)  # noqa PLR2004
+
+
+@lru_cache(maxsize=8)
+def cached_dataset(shape: str, n_rows: int) -> pd.DataFrame:
+    """Return make_dataset(shape, n_rows), generated once per session. Do not modify it."""
+    return make_dataset(shape, n_rows)
+
+
+def make_dataset(shape: str, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Return a frame of n_rows rows of the given shape.
+
+    - ``numeric``: 10 numeric columns, about 1% missing values;
+    - ``mixed``: 6 numeric and 3 categorical columns (4, 12 and 30 levels);
+    - ``wide``: 200 numeric columns;
+    - ``tall``: 3 numeric columns, the cheapest per row;
+    - ``imbalanced``: 6 numeric columns and a ``label`` column where one of
+      five classes holds 95% of the rows.
+    """
+    rng = np.random.default_rng(seed)
+    if shape == "numeric":
+        return _with_missing(_numeric(rng, n_rows, 10), rng, 0.01)
+    if shape == "mixed":
+        df = _numeric(rng, n_rows, 6)
+        for name, levels in (("kind", 4), ("region", 12), ("code", 30)):
+            df[name] = rng.choice([f"{name}_{i}" for i in range(levels)], size=n_rows)
+        return df
+    if shape == "wide":
+        return _numeric(rng, n_rows, WIDE_COLUMNS)
+    if shape == "tall":
+        return _numeric(rng, n_rows, 3)
+    if shape == "imbalanced":
+        df = _numeric(rng, n_rows, 6)
+        df["label"] = rng.choice(IMBALANCED_LABELS, size=n_rows, p=IMBALANCED_SHARES)
+        return df
+    raise UnknownShapeError(shape)
+
+
+def _numeric(rng: np.random.Generator, n_rows: int, n_cols: int) -> pd.DataFrame:
+    # a few clusters, so the projections have structure to find
+    centers = rng.normal(0, 5, size=(8, n_cols))
+    values = centers[rng.integers(0, len(centers), size=n_rows)] + rng.normal(size=(n_rows, n_cols))
+    return pd.DataFrame(values, columns=[f"num{i}" for i in range(n_cols)])
+
+
+def _with_missing(df: pd.DataFrame, rng: np.random.Generator, share: float) -> pd.DataFrame:
+    return df.mask(rng.random(df.shape) < share)
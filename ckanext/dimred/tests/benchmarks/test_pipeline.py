@@ -0,0 +1,142 @@
+"""Benchmarks of the dimred pipeline stages on synthetic datasets.
+
+Run with the dev extra installed, saving results as JSON for comparisons
+between commits (see README, "Benchmarks")::
+
+    pytest ckanext/dimred/tests/benchmarks -m benchmark --benchmark-autosave
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import pytest
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.adapters.tabular import TabularAdapter
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.methods import PROJECTION_METHODS
+from ckanext.dimred.tests.benchmarks.datasets import SHAPES, bench_row_counts, cached_dataset, rows_id
+from ckanext.dimred.utils.export import embedding_to_csv
+from ckanext.dimred.utils.features import categorize_columns
+from ckanext.dimred.utils.render import embedding_to_png
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.usefixtures("with_plugins"),
+    # benchmark every row count in full, without sampling or size limits
+    pytest.mark.ckan_config("ckanext.dimred.max_rows", "0"),
+    pytest.mark.ckan_config("ckanext.dimred.max_file_size_mb", "4096"),
+    pytest.mark.ckan_config("ckanext.dimred.max_memory_mb", "0"),
+]
+
+ROUNDS = 3
+# 200 columns x 200k rows is a 700 MB CSV; wide frames stop here
+WIDE_MAX_ROWS = 50_000
+# t-SNE and UMAP take minutes above this
+SLOW_METHODS = ("tsne", "umap")
+SLOW_METHOD_MAX_ROWS = 10_000
+
+ROWS = pytest.mark.parametrize("n_rows", bench_row_counts(), ids=rows_id)
+SHAPE = pytest.mark.parametrize("shape", SHAPES)
+
+
+def _run(benchmark, func, *args: Any) -> Any:
+    return benchmark.pedantic(func, args=args, rounds=ROUNDS, iterations=1, warmup_rounds=0)
+
+
+def _skip_large(shape: str, n_rows: int) -> None:
+    if shape == "wide" and n_rows > WIDE_MAX_ROWS:
+        pytest.skip(f"wide datasets are benchmarked up to {WIDE_MAX_ROWS} rows")
+
+
+def _view(shape: str) -> dict[str, Any]:
+    return {"color_by": "label"} if shape == "imbalanced" else {}
+
+
+@lru_cache(maxsize=4)
+def _prepared(shape: str, n_rows: int) -> tuple[Any, dict[str, Any]]:
+    """Return the feature matrix and prepare info of a dataset."""
+    df = categorize_columns(cached_dataset(shape, n_rows).copy(), dimred_config.max_categories_for_ohe())
+    x_matrix, info, _ = dimred_action._prepare_matrix(df, _view(shape))
+    return x_matrix, info
+
+
+def _result(n_rows: int) -> tuple[np.ndarray, dict[str, Any]]:
+    """Return a 2D embedding of a mixed dataset with its metadata, as the cache stores it."""
+    _, info = _prepared("mixed", n_rows)
+    embedding = np.round(np.random.default_rng(0).normal(size=(n_rows, 2)), dimred_config.embedding_decimals())
+    return embedding, {"method": "pca", "method_params": {}, "prepare_info": info}
+
+
+@pytest.mark.benchmark(group="load")
+@SHAPE
+@ROWS
+def test_adapter_load(benchmark, csv_path, shape, n_rows):
+    _skip_large(shape, n_rows)
+    path = csv_path(shape, n_rows)
+
+    def load():
+        return TabularAdapter({"id": "bench", "format": "csv"}, {}, filepath=path).get_dataframe()
+
+    assert len(_run(benchmark, load)) == n_rows
+
+
+@pytest.mark.benchmark(group="prepare")
+@SHAPE
+@ROWS
+def test_prepare_matrix(benchmark, shape, n_rows):
+    _skip_large(shape, n_rows)
+    df = categorize_columns(cached_dataset(shape, n_rows).copy(), dimred_config.max_categories_for_ohe())
+
+    x_matrix, _, _ = _run(benchmark, dimred_action._prepare_matrix, df, _view(shape))
+
+    assert x_matrix.shape[0] == n_rows
+
+
+@pytest.mark.benchmark(group="project")
+@pytest.mark.parametrize("method", sorted(PROJECTION_METHODS))
+@ROWS
+def test_projection(benchmark, method, n_rows):
+    if method in SLOW_METHODS and n_rows > SLOW_METHOD_MAX_ROWS:
+        pytest.skip(f"{method} is benchmarked up to {SLOW_METHOD_MAX_ROWS} rows")
+    x_matrix, _ = _prepared("mixed", n_rows)
+
+    def project():
+        return PROJECTION_METHODS[method]().fit_transform(x_matrix)
+
+    assert _run(benchmark, project).shape == (n_rows, 2)
+
+
+@pytest.mark.benchmark(group="cache")
+@ROWS
+def test_cache_serialization(benchmark, n_rows):
+    embedding, meta = _result(n_rows)
+    result = {"embedding": embedding.tolist(), "meta": meta}
+
+    def roundtrip():
+        # what DimredCacheManager.save() and get() do besides the Redis calls
+        return json.loads(json.dumps(result))
+
+    assert len(_run(benchmark, roundtrip)["embedding"]) == n_rows
+
+
+@pytest.mark.benchmark(group="export")
+@ROWS
+def test_csv_export(benchmark, n_rows):
+    embedding, meta = _result(n_rows)
+
+    content = _run(benchmark, embedding_to_csv, embedding, meta, True)
+
+    assert content.count("\n") == n_rows + 1
+
+
+@pytest.mark.benchmark(group="render")
+@ROWS
+def test_png_render(benchmark, n_rows):
+    embedding, meta = _result(n_rows)
+
+    assert _run(benchmark, embedding_to_png, embedding, meta).startswith(b"\x89PNG")
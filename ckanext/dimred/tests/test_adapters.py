@@ -4,6 +4,7 @@ import pandas as pd
 import pytest
 
 from ckanext.dimred.adapters import tabular
+from ckanext.dimred.utils.features import column_kinds
 
 
 @pytest.mark.usefixtures("with_plugins")
@@ -38,3 +39,65 @@ def test_tabular_adapter_get_columns(tmp_path):
     cols = adapter.get_columns()
 
     assert cols == ["col1", "col2", "col3"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_tabular_adapter_reads_appended_rows(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    adapter = tabular.TabularAdapter({"format": "csv", "size": 10}, {}, filepath=str(csv_path))
+    fingerprint = {**adapter.fingerprint(), "columns": adapter.get_columns()}
+
+    with csv_path.open("a", encoding="utf-8") as dest:
+        dest.write("5,6\n7,8\n")
+
+    df_new, new_fingerprint = adapter.read_appended_rows(fingerprint)
+
+    assert df_new.to_dict("list") == {"a": [5, 7], "b": [6, 8]}
+    assert new_fingerprint == {**adapter.fingerprint(), "columns": ["a", "b"]}
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_tabular_adapter_parses_appended_rows_with_file_dtypes(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("code,size\nA1,2.5\nB2,3.5\n", encoding="utf-8")
+    adapter = tabular.TabularAdapter({"format": "csv", "size": 10}, {}, filepath=str(csv_path))
+    df = adapter.get_dataframe()
+    fingerprint = {**adapter.fingerprint(), "columns": df.columns.tolist(), "kinds": column_kinds(df)}
+
+    with csv_path.open("a", encoding="utf-8") as dest:
+        dest.write("007,4\n")
+
+    df_new, _ = adapter.read_appended_rows(fingerprint)
+
+    assert df_new["code"].tolist() == ["007"]
+    assert df_new["size"].dtype == float
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_tabular_adapter_detects_rewritten_file(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    adapter = tabular.TabularAdapter({"format": "csv", "size": 10}, {}, filepath=str(csv_path))
+    fingerprint = {**adapter.fingerprint(), "columns": adapter.get_columns()}
+
+    csv_path.write_text("a,b\n1,2\n3,9\n5,6\n", encoding="utf-8")
+    assert adapter.read_appended_rows(fingerprint) is None
+
+    csv_path.write_text("a,b\n1,2\n3,4\n5,6,7\n", encoding="utf-8")
+    assert adapter.read_appended_rows(fingerprint) is None
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_tabular_adapter_append_requires_line_boundary(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b\n1,2", encoding="utf-8")
+    adapter = tabular.TabularAdapter({"format": "csv", "size": 10}, {}, filepath=str(csv_path))
+    fingerprint = {**adapter.fingerprint(), "columns": adapter.get_columns()}
+
+    csv_path.write_text("a,b\n1,23\n", encoding="utf-8")
+    assert adapter.read_appended_rows(fingerprint) is None
+
+    csv_path.write_text("a,b\n1,2\n3,4\n", encoding="utf-8")
+    df_new, _ = adapter.read_appended_rows(fingerprint)
+    assert df_new.to_dict("list") == {"a": [3], "b": [4]}
@@ -89,6 +89,15 @@ def test_render_asset_respects_backend_arg(monkeypatch):
     assert helpers.dimred_render_asset("matplotlib") is None
 
 
+@pytest.mark.usefixtures("with_plugins", "with_request_context")
+@pytest.mark.ckan_config("ckanext.dimred.echarts_gl_url", "https://cdn.example.com/echarts-gl.min.js")
+def test_echarts_urls():
+    urls = helpers.dimred_echarts_urls()
+
+    assert urls["echarts"].endswith("/dimred/vendor/echarts.min.js")
+    assert urls["echarts_gl"] == "https://cdn.example.com/echarts-gl.min.js"
+
+
 def test_render_backend_default(monkeypatch):
     monkeypatch.setattr(dimred_config, "render_backend", lambda: "matplotlib")
 
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import pytest
+
+import ckan.plugins.toolkit as tk
+from ckan.cli.cli import ckan
+
+from ckanext.dimred import jobs
+
+
+class FakeLocks:
+    def __init__(self, held=()):
+        self.held = set(held)
+        self.released = []
+
+    def acquire_lock(self, resource_id, view_id):
+        if view_id in self.held:
+            return False
+        self.held.add(view_id)
+        return True
+
+    def is_locked(self, resource_id, view_id):
+        return view_id in self.held
+
+    def release_lock(self, resource_id, view_id):
+        self.held.discard(view_id)
+        self.released.append(view_id)
+
+
+@pytest.fixture
+def actions(monkeypatch):
+    calls = []
+    views = [
+        {"id": "v1", "view_type": "dimred_view", "render_backend": "matplotlib"},
+        {"id": "v2", "view_type": "dimred_view"},
+        {"id": "v3", "view_type": "image_view"},
+    ]
+
+    def get_action(name):
+        if name == "get_site_user":
+            return lambda ctx, data: {"name": "site"}
+        if name == "resource_view_list":
+            return lambda ctx, data: views
+        return lambda ctx, data: calls.append((name, data["view_id"]))
+
+    monkeypatch.setattr(tk, "get_action", get_action)
+    return calls
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_enqueue_warmup_disabled_by_default(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda *args, **kwargs: enqueued.append(args))
+
+    jobs.enqueue_warmup("r1")
+
+    assert enqueued == []
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.prewarm_enabled", "true")
+@pytest.mark.ckan_config("ckanext.dimred.prewarm_queue", "dimred")
+def test_enqueue_warmup(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append((fn, args, kwargs["queue"])))
+
+    jobs.enqueue_warmup("r1", ["v1"])
+
+    assert enqueued == [(jobs.warm_resource, ["r1", ["v1"]], "dimred")]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_enqueue_final_embedding_ignores_prewarm_setting(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append((fn, args)))
+
+    jobs.enqueue_final_embedding("r1", "v1")
+
+    assert enqueued == [(jobs.warm_resource, ["r1", ["v1"]])]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_enqueue_final_embedding_skips_view_being_warmed(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append((fn, args)))
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: FakeLocks(held={"v1"}))
+
+    jobs.enqueue_final_embedding("r1", "v1")
+    jobs.enqueue_final_embedding("r1", "v2")
+
+    assert enqueued == [(jobs.warm_resource, ["r1", ["v2"]])]
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.prewarm_enabled", "true")
+def test_update_resource_warms_views_not_updated(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append((fn, args)))
+    monkeypatch.setattr(jobs, "_site_context", dict)
+    result = {"updated": ["v1"], "invalidated": ["v2"]}
+    monkeypatch.setattr(tk, "get_action", lambda name: lambda ctx, data: result)
+
+    assert jobs.update_resource("r1") == result
+    assert enqueued == [(jobs.warm_resource, ["r1", ["v2"]])]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_update_resource_failure_invalidates_resource(monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(jobs, "invalidate_resource", invalidated.append)
+    monkeypatch.setattr(jobs, "_site_context", dict)
+
+    def fail(ctx, data):
+        raise tk.ObjectNotFound
+
+    monkeypatch.setattr(tk, "get_action", lambda name: fail)
+
+    assert jobs.update_resource("r1") is None
+    assert invalidated == ["r1"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_warm_resource_computes_dimred_views(monkeypatch, actions):
+    locks = FakeLocks()
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: locks)
+
+    result = jobs.warm_resource("r1")
+
+    assert result == {"v1": True, "v2": True}
+    assert actions == [
+        ("dimred_get_dimred_preview", "v1"),
+        ("dimred_get_dimred_image", "v1"),
+        ("dimred_get_dimred_preview", "v2"),
+    ]
+    assert locks.held == set()
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_warm_resource_skips_locked_and_unselected_views(monkeypatch, actions):
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: FakeLocks(held={"v1"}))
+
+    jobs.warm_resource("r1", ["v1"])
+
+    assert actions == []
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_warm_cache_command(monkeypatch, cli):
+    views = [("r1", {"id": "v1"}), ("r1", {"id": "v2"}), ("r2", {"id": "v3"})]
+    monkeypatch.setattr(jobs, "iter_dimred_views", lambda dataset_ids: views)
+    monkeypatch.setattr(jobs, "warm_view", lambda resource_id, view: view["id"] != "v2")
+
+    result = cli.invoke(ckan, ["dimred", "warm-cache", "--workers", "2"])
+
+    assert result.exit_code == 0, result.output
+    assert "1 view(s) failed" in result.output
+    assert "Warmed 2 view(s)" in result.output
@@ -10,10 +10,12 @@ from ckan.tests.helpers import call_action
 from ckanext.dimred.adapters.tabular import TabularAdapter
 from ckanext.dimred.exception import (
     DimredFeatureError,
+    DimredModelNotFoundError,
     DimredNumericColumnError,
     DimredResourceSizeError,
 )
 from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils.models import ModelStore
 
 IRIS_CSV = pathlib.Path(__file__).resolve().parent.parent / "data" / "iris.csv"
 
@@ -305,6 +307,133 @@ def test_dimred_export_embedding(package, create_with_upload):
     assert "x" in result["content"]
 
 
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_dimred_export_embedding_stream(package, create_with_upload):
+    with open(IRIS_CSV, "rb") as csv:
+        resource = create_with_upload(csv.read(), "iris.csv", format="csv", package_id=package["id"])
+
+    view = call_action(
+        "resource_view_create",
+        {},
+        resource_id=resource["id"],
+        view_type="dimred_view",
+        title="Dimred",
+        method="pca",
+        color_by="Species",
+    )
+
+    result = call_action(
+        "dimred_export_embedding",
+        id=resource["id"],
+        view_id=view["id"],
+        stream=True,
+        include_candidates=True,
+    )
+    lines = "".join(result["content"]).splitlines()
+
+    assert lines[0].startswith("x,y,Species,")
+    assert "Sepal.Length" in lines[0]
+    assert len(lines) == 151
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "true")
+def test_dimred_transform_rows(package, create_with_upload, monkeypatch, tmp_path):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    with open(IRIS_CSV, "rb") as csv:
+        resource = create_with_upload(csv.read(), "iris.csv", format="csv", package_id=package["id"])
+
+    view = call_action(
+        "resource_view_create",
+        {},
+        resource_id=resource["id"],
+        view_type="dimred_view",
+        title="Dimred",
+        method="pca",
+        color_by="Species",
+    )
+    preview = call_action("dimred_get_dimred_preview", id=resource["id"], view_id=view["id"])
+
+    monkeypatch.setattr(dimred_action, "_fit_dimred_model", lambda *args: pytest.fail("model was fitted"))
+    rows = [
+        {
+            "rownames": 1,
+            "Sepal.Length": 5.1,
+            "Sepal.Width": 3.5,
+            "Petal.Length": 1.4,
+            "Petal.Width": 0.2,
+            "Species": "setosa",
+        },
+        {"Sepal.Length": 6.5, "Sepal.Width": 3.0, "Petal.Length": 5.2, "Petal.Width": 2.0, "Species": "virginica"},
+    ]
+    result = call_action("dimred_transform_rows", id=resource["id"], view_id=view["id"], rows=rows)
+
+    assert len(result["embedding"]) == 2
+    # the first row is row 1 of iris.csv
+    assert result["embedding"][0] == pytest.approx(preview["embedding"][0], abs=2e-3)
+    assert result["meta"]["method"] == "pca"
+    assert result["meta"]["color_values"] == ["setosa", "virginica"]
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_dimred_transform_rows_needs_stored_model(package, create_with_upload):
+    with open(IRIS_CSV, "rb") as csv:
+        resource = create_with_upload(csv.read(), "iris.csv", format="csv", package_id=package["id"])
+
+    view = call_action(
+        "resource_view_create",
+        {},
+        resource_id=resource["id"],
+        view_type="dimred_view",
+        title="Dimred",
+        method="pca",
+    )
+    rows = [{"Sepal.Length": 5.1, "Sepal.Width": 3.5, "Petal.Length": 1.4, "Petal.Width": 0.2}]
+
+    with pytest.raises(DimredModelNotFoundError):
+        call_action("dimred_transform_rows", id=resource["id"], view_id=view["id"], rows=rows)
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+def test_dimred_transform_rows_requires_rows(package, create_with_upload):
+    with open(IRIS_CSV, "rb") as csv:
+        resource = create_with_upload(csv.read(), "iris.csv", format="csv", package_id=package["id"])
+
+    view = call_action(
+        "resource_view_create",
+        {},
+        resource_id=resource["id"],
+        view_type="dimred_view",
+        title="Dimred",
+        method="pca",
+    )
+
+    with pytest.raises(tk.ValidationError):
+        call_action("dimred_transform_rows", id=resource["id"], view_id=view["id"])
+
+
+@pytest.mark.usefixtures("clean_db", "with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.prewarm_enabled", "true")
+def test_dimred_view_create_enqueues_warmup(package, create_with_upload, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append(args))
+
+    with open(IRIS_CSV, "rb") as csv:
+        resource = create_with_upload(csv.read(), "iris.csv", format="csv", package_id=package["id"])
+    enqueued.clear()
+
+    view = call_action(
+        "resource_view_create",
+        {},
+        resource_id=resource["id"],
+        view_type="dimred_view",
+        title="Dimred",
+        method="pca",
+    )
+
+    assert enqueued == [[resource["id"], [view["id"]]]]
+
+
 @pytest.mark.usefixtures("clean_db", "with_plugins")
 @pytest.mark.ckan_config("ckanext.dimred.export_enabled", "false")
 def test_dimred_export_disabled(package, create_with_upload):
@@ -57,3 +57,19 @@ def test_method_params_object_rejects_invalid_json():
         validator("{bad json}", {})
     with pytest.raises(tk.Invalid):
         validator("[1, 2]", {})
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_export_format_normalizes_and_defaults():
+    validator = tk.get_validator("dimred_export_format")
+
+    assert validator(" Parquet ", {}) == "parquet"
+    assert validator("", {}) == "csv"
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_export_format_rejects_unknown():
+    validator = tk.get_validator("dimred_export_format")
+
+    with pytest.raises(tk.Invalid):
+        validator("xlsx", {})
@@ -30,4 +30,4 @@ def test_setup_template_variables_returns_error(monkeypatch, sysadmin):
     )
 
     assert out["error"] == "bad"
-    assert out["image_data_url"] is None
+    assert out["image_url"] is None
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import threading
+
 import numpy as np
 import pytest
 
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred import jobs
+from ckanext.dimred.adapters.tabular import TabularAdapter
 from ckanext.dimred.logic import action as dimred_action
 from ckanext.dimred.plugin import DimredPlugin
+from ckanext.dimred.utils import execution as dimred_execution
+from ckanext.dimred.utils.cache import DimredCacheManager
+from ckanext.dimred.utils.frames import get_frame_cache
+from ckanext.dimred.utils.models import ModelStore
 
 
 class FakeCache:
     def __init__(self):
         self.store = {}
+        self.images = {}
         self.deleted: list[str] = []
         self.enabled = True
 
@@ -19,9 +31,24 @@ class FakeCache:
     def get(self, resource_id, view_id, sig):
         return self.store.get((resource_id, view_id, sig))
 
-    def save(self, resource_id, view_id, sig, result):
+    def save(self, resource_id, view_id, sig, result, content_id=None, ttl=None):
         self.store[(resource_id, view_id, sig)] = result
 
+    def get_content(self, content_id, sig):
+        return None
+
+    def get_content_id(self, resource_id):
+        return None
+
+    def link(self, resource_id, view_id, sig, content_id):
+        pass
+
+    def get_image(self, resource_id, view_id, sig, render_sig):
+        return self.images.get((resource_id, view_id, sig, render_sig))
+
+    def save_image(self, resource_id, view_id, sig, render_sig, content):
+        self.images[(resource_id, view_id, sig, render_sig)] = content
+
     def delete_for_resource(self, resource_id):
         self.deleted.append(resource_id)
 
@@ -34,7 +61,7 @@ def test_pipeline_uses_cache(monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_build(resource, resource_view):
+    def fake_build(resource, resource_view, provisional=False):
         calls["count"] += 1
         return np.array([[1.0, 2.0]]), {"method": resource_view["method"], "prepare_info": {}}
 
@@ -60,7 +87,7 @@ def test_cache_signature_changes_with_method(monkeypatch):
 
     calls = {"count": 0}
 
-    def fake_build(resource, resource_view):
+    def fake_build(resource, resource_view, provisional=False):
         calls["count"] += 1
         val = float(calls["count"])
         return np.array([[val, val]]), {"method": resource_view["method"], "prepare_info": {}}
@@ -104,3 +131,382 @@ def test_resource_cache_invalidation_on_delete(monkeypatch):
     plugin.before_resource_delete({}, {"id": "r1"})
 
     assert fake_cache.deleted == ["r1"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_image_rendered_once_and_cached(monkeypatch):
+    fake_cache = FakeCache()
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: fake_cache)
+
+    resource = {"id": "r1", "format": "csv"}
+    view = {"id": "v1", "method": "umap"}
+
+    def fake_get_action(name):
+        if name == "resource_show":
+            return lambda ctx, data: resource
+        if name == "resource_view_show":
+            return lambda ctx, data: view
+        raise AssertionError(name)
+
+    monkeypatch.setattr("ckanext.dimred.logic.action.tk.get_action", fake_get_action)
+
+    calls = {"render": 0}
+
+    def fake_render(embedding, meta):
+        calls["render"] += 1
+        return b"png-bytes"
+
+    monkeypatch.setattr("ckanext.dimred.logic.action.dimred_utils.embedding_to_png", fake_render)
+    monkeypatch.setattr(
+        dimred_action,
+        "_build_dimred_preview",
+        lambda resource, resource_view, provisional=False: (
+            np.array([[1.0, 2.0]]),
+            {"method": "umap", "prepare_info": {}},
+        ),
+    )
+
+    first = dimred_action.dimred_get_dimred_image({}, {"id": "r1", "view_id": "v1"})
+    second = dimred_action.dimred_get_dimred_image({}, {"id": "r1", "view_id": "v1"})
+
+    assert calls["render"] == 1
+    assert first["content"] == second["content"] == b"png-bytes"
+    assert first["content_type"] == "image/png"
+    assert first["etag"] == second["etag"]
+    assert len(fake_cache.images) == 1
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "true")
+def test_upload_replacement_defers_invalidation(monkeypatch):
+    fake_cache = FakeCache()
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: fake_cache)
+    enqueued = []
+    monkeypatch.setattr(tk, "enqueue_job", lambda fn, args, **kwargs: enqueued.append((fn, args)))
+
+    plugin = DimredPlugin()
+    context = {}
+    current = {"id": "r1", "url": "data.csv", "url_type": "upload"}
+    plugin.before_resource_update(context, current, {"id": "r1", "url": "data.csv", "upload": "<file>"})
+
+    assert fake_cache.deleted == []
+
+    plugin.after_resource_update(context, {"id": "r1"})
+
+    # the file is read in a job, not in the update request
+    assert enqueued == [(jobs.update_resource, ["r1"])]
+    assert fake_cache.deleted == []
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.incremental_drift_threshold", "10")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "true")
+def test_appended_rows_merged_into_cached_embedding(monkeypatch, tmp_path):
+    fake_cache = FakeCache()
+    monkeypatch.setattr("ckanext.dimred.utils.cache.get_cache", lambda: fake_cache)
+    store = ModelStore(str(tmp_path / "models"))
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: store)
+
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c,kind\n1,2,3,x\n2,1,3,y\n3,3,1,x\n4,2,2,y\n5,1,1,x\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+
+    resource = {"id": "r1", "format": "csv"}
+    view = {"id": "v1", "view_type": "dimred_view", "method": "pca", "color_by": "kind"}
+    actions = {
+        "resource_show": lambda ctx, data: resource,
+        "resource_view_list": lambda ctx, data: [view],
+    }
+    monkeypatch.setattr(dimred_action.tk, "get_action", actions.__getitem__)
+    monkeypatch.setattr(dimred_action.tk, "check_access", lambda *args, **kwargs: True)
+
+    dimred_action.dimred_run_dimred_pipeline({}, {"resource": resource, "resource_view": view})
+    with csv_path.open("a", encoding="utf-8") as dest:
+        dest.write("3,2,2,y\n")
+
+    result = dimred_action.dimred_update_resource_embeddings({}, {"id": "r1"})
+
+    assert result == {"updated": ["v1"], "invalidated": []}
+    cached = fake_cache.get("r1", "v1", "pca")
+    assert len(cached["embedding"]) == 6
+    assert cached["meta"]["prepare_info"]["n_rows_used"] == 6
+    assert cached["meta"]["prepare_info"]["color_values"][-1] == "y"
+
+    # a rewritten file falls back to a full recompute
+    csv_path.write_text("a,b,c,kind\n9,9,9,x\n", encoding="utf-8")
+    fake_cache.store.clear()
+    result = dimred_action.dimred_update_resource_embeddings({}, {"id": "r1"})
+
+    assert result == {"updated": [], "invalidated": ["v1"]}
+
+
+@pytest.mark.usefixtures("reset_redis")
+def test_delete_for_resource_uses_index():
+    cache = DimredCacheManager()
+    result = {"embedding": [[0.0, 1.0]], "meta": {}}
+    cache.save("res-1", "view-1", "sig", result)
+    cache.save_image("res-1", "view-1", "sig", "render", b"png")
+    cache.save("res-2", "view-1", "sig", result)
+
+    assert cache.client.scard(cache._index_key("res-1")) == 2
+    assert cache.client.ttl(cache._index_key("res-1")) > 0
+
+    cache.delete_for_resource("res-1")
+
+    assert cache.get("res-1", "view-1", "sig") is None
+    assert cache.get_image("res-1", "view-1", "sig", "render") is None
+    assert not cache.client.exists(cache._index_key("res-1"))
+    assert cache.get("res-2", "view-1", "sig") == result
+
+
+@pytest.mark.usefixtures("reset_redis")
+def test_delete_for_view_keeps_other_views():
+    cache = DimredCacheManager()
+    result = {"embedding": [[0.0, 1.0]], "meta": {}}
+    cache.save("res-1", "view-1", "sig", result)
+    cache.save("res-1", "view-2", "sig", result)
+
+    cache.delete_for_view("res-1", "view-1")
+
+    assert cache.get("res-1", "view-1", "sig") is None
+    assert cache.get("res-1", "view-2", "sig") == result
+    assert cache.client.scard(cache._index_key("res-1")) == 1
+
+
+@pytest.mark.usefixtures("reset_redis")
+def test_config_change_invalidates_entries(ckan_config, monkeypatch):
+    cache = DimredCacheManager()
+    result = {"embedding": [[0.0, 1.0]], "meta": {}}
+    cache.save("res-config", "view-config", "sig", result)
+    assert cache.get("res-config", "view-config", "sig") == result
+
+    monkeypatch.setitem(ckan_config, "ckanext.dimred.metrics_enabled", True)
+    assert cache.get("res-config", "view-config", "sig") == result
+
+    monkeypatch.setitem(ckan_config, "ckanext.dimred.umap.n_neighbors", 5)
+    assert cache.get("res-config", "view-config", "sig") is None
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+def test_same_content_shares_embedding(monkeypatch, tmp_path):
+    store = ModelStore(str(tmp_path / "models"))
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: store)
+
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+    fits = {"count": 0}
+    fit = dimred_action._fit_dimred_model
+
+    def counting_fit(*args, **kwargs):
+        fits["count"] += 1
+        return fit(*args, **kwargs)
+
+    monkeypatch.setattr(dimred_action, "_fit_dimred_model", counting_fit)
+
+    def run(resource_id, view_id):
+        resource = {"id": resource_id, "format": "csv"}
+        view = {"id": view_id, "method": "pca"}
+        return dimred_action.dimred_run_dimred_pipeline({}, {"resource": resource, "resource_view": view})
+
+    first = run("r1", "v1")
+    assert run("r1", "v2") == first  # same resource, identical settings: no read
+    assert run("r2", "v3") == first  # same file in another resource: read, no fit
+
+    assert fits["count"] == 1
+    assert first["meta"]["prepare_info"]["content_hash"]
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca svd")
+@pytest.mark.ckan_config("ckanext.dimred.progressive_enabled", "true")
+def test_progressive_preview_is_replaced_by_final(monkeypatch, tmp_path):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    csv_path = tmp_path / "data.csv"
+    rows = "\n".join(f"{i},{i % 7},{(i * 3) % 5},{i % 2}" for i in range(50))
+    csv_path.write_text("a,b,c,d\n" + rows + "\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+    enqueued = []
+    monkeypatch.setattr(dimred_action.dimred_jobs, "enqueue_final_embedding", lambda *args: enqueued.append(args))
+
+    def run(progressive):
+        data_dict = {
+            "resource": {"id": "r1", "format": "csv"},
+            "resource_view": {"id": "v1", "method": "svd"},
+            "progressive": progressive,
+        }
+        return dimred_action.dimred_run_dimred_pipeline({}, data_dict)
+
+    provisional = run(True)
+    assert provisional["meta"]["provisional"]
+    assert provisional["meta"]["method"] == "pca"
+    assert provisional["meta"]["final_method"] == "svd"
+    assert run(True) == provisional
+    assert enqueued == [("r1", "v1")]
+
+    # the background job asks for the final embedding, which replaces it
+    final = run(False)
+    assert final["meta"]["method"] == "svd"
+    assert not final["meta"].get("provisional")
+    assert run(True) == final
+    assert len(enqueued) == 1
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.progressive_enabled", "true")
+@pytest.mark.ckan_config("ckanext.dimred.cache_enabled", "false")
+def test_progressive_needs_the_cache():
+    assert not dimred_action._use_progressive({"id": "v1", "method": "umap"})
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+def test_get_many_follows_content_pointers():
+    cache = DimredCacheManager()
+    result = {"embedding": [[0.0, 1.0]], "meta": {}}
+    cache.save("many-r1", "v1", "sig", result)
+    cache.save("many-r2", "v1", "sig", result, content_id="many-content")
+
+    assert cache.get_many([("many-r1", "v1", "sig"), ("many-r2", "v1", "sig"), ("many-r3", "v1", "sig")]) == [
+        result,
+        result,
+        None,
+    ]
+
+
+@pytest.fixture
+def batch_backend():
+    # forked on first use, so the workers see the test's patches
+    backend = dimred_execution.ProcessBackend(2)
+    yield backend
+    backend.shutdown()
+
+
+def _serve_batch_metadata(monkeypatch, csv_path, resources):
+    """Serve resource_show/resource_view_list for {resource id: [(view id, method)]} from memory."""
+
+    def get_action(name):
+        def action(context, data_dict):
+            if data_dict["id"] not in resources:
+                raise dimred_action.tk.ObjectNotFound
+            if name == "resource_show":
+                return {"id": data_dict["id"], "format": "csv"}
+            return [{"id": view_id, "method": method} for view_id, method in resources[data_dict["id"]]]
+
+        return action
+
+    monkeypatch.setattr(dimred_action.tk, "get_action", get_action)
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca svd")
+@pytest.mark.ckan_config("ckanext.dimred.batch_workers", "1")
+def test_batch_previews_read_each_resource_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    csv_path = tmp_path / "data.csv"
+    rows = "\n".join(f"{i},{i % 7},{(i * 3) % 5}" for i in range(30))
+    csv_path.write_text("a,b,c\n" + rows + "\n", encoding="utf-8")
+    _serve_batch_metadata(monkeypatch, csv_path, {"batch-r1": [("batch-v1", "pca"), ("batch-v2", "svd")]})
+    reads = {"count": 0}
+    read = dimred_action._read_resource
+
+    def counting_read(*args, **kwargs):
+        reads["count"] += 1
+        return read(*args, **kwargs)
+
+    monkeypatch.setattr(dimred_action, "_read_resource", counting_read)
+
+    items = [
+        {"id": "batch-r1", "view_id": "batch-v1"},
+        {"id": "batch-r1", "view_id": "batch-v2"},
+        {"id": "batch-r1", "view_id": "batch-v9"},
+        {"id": "batch-gone", "view_id": "batch-v1"},
+    ]
+    results = dimred_action.dimred_get_dimred_previews({}, {"items": items})["results"]
+
+    assert reads["count"] == 1
+    assert [result["meta"]["method"] for result in results[:2]] == ["pca", "svd"]
+    assert len(results[0]["embedding"]) == 30
+    assert results[0]["meta"]["timings"]["spans"][0]["name"] == "read"
+    assert results[2]["error"]["message"] == "Resource view not found"
+    assert results[3]["error"]["message"] == "Resource not found"
+
+    # the second call is served from the cache
+    again = dimred_action.dimred_get_dimred_previews({}, {"items": items[:2]})["results"]
+    assert reads["count"] == 1
+    assert again == results[:2]
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.batch_workers", "2")
+def test_batch_previews_in_worker_processes(monkeypatch, tmp_path, batch_backend):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    monkeypatch.setattr(dimred_execution, "get_batch_backend", lambda: batch_backend)
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    _serve_batch_metadata(monkeypatch, csv_path, {"pool-r1": [("pool-v1", "pca")], "pool-r2": [("pool-v2", "umap")]})
+
+    items = [{"id": "pool-r1", "view_id": "pool-v1"}, {"id": "pool-r2", "view_id": "pool-v2"}]
+    first, second = dimred_action.dimred_get_dimred_previews({}, {"items": items})["results"]
+
+    assert len(first["embedding"]) == 4
+    assert second["error"]["type"] == "ValidationError"
+    # results computed in the workers are cached by the calling process
+    cache = dimred_action.dimred_cache.get_cache()
+    view = dimred_action._normalize_resource_view({"id": "pool-v1", "method": "pca"})
+    sig = cache.settings_signature(dimred_action._cache_settings(view))
+    assert cache.get("pool-r1", "pool-v1", sig)["embedding"] == first["embedding"]
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.batch_workers", "2")
+@pytest.mark.ckan_config("ckanext.dimred.process_timeout", "5")
+def test_batch_workers_forked_during_a_frame_load(monkeypatch, tmp_path, batch_backend):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    monkeypatch.setattr(dimred_execution, "get_batch_backend", lambda: batch_backend)
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n5,1,2\n1,4,3\n2,2,5\n3,5,1\n", encoding="utf-8")
+    _serve_batch_metadata(monkeypatch, csv_path, {"fork-r1": [("fork-v1", "pca")], "fork-r2": [("fork-v2", "pca")]})
+
+    # another request thread is reading fork-r1 when the workers are forked
+    adapter = TabularAdapter({"id": "fork-r1", "format": "csv"}, {}, filepath=str(csv_path))
+    key = f"{adapter.source_signature()}|{dimred_config.max_categories_for_ohe()}"
+    started, release = threading.Event(), threading.Event()
+
+    def load():
+        started.set()
+        release.wait(30)
+        return (None, adapter), 10
+
+    reader = threading.Thread(target=get_frame_cache().get_or_load, args=("fork-r1", key, load))
+    reader.start()
+    started.wait(5)
+    try:
+        items = [{"id": "fork-r1", "view_id": "fork-v1"}, {"id": "fork-r2", "view_id": "fork-v2"}]
+        results = dimred_action.dimred_get_dimred_previews({}, {"items": items})["results"]
+    finally:
+        release.set()
+        reader.join()
+        get_frame_cache().clear()
+
+    assert [len(result["embedding"]) for result in results] == [4, 4]
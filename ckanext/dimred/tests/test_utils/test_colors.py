@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ckanext.dimred.utils import colors as dimred_colors
+
+
+def test_categorical_codes_follow_known_labels():
+    candidate = {"kind": "categorical", "values": ["b", "a", None, "c", "a"], "unique_values": ["a", "b"]}
+
+    encoding = dimred_colors.encode_color_candidate(candidate)
+
+    assert encoding["dtype"] == "uint8"
+    assert encoding["labels"] == ["a", "b", "c"]
+    np.testing.assert_array_equal(dimred_colors.decode_codes(encoding), [1, 0, 255, 2, 0])
+
+
+def test_many_categories_use_uint16():
+    candidate = {"kind": "categorical", "values": [f"v{i}" for i in range(300)] + [None], "unique_values": []}
+
+    encoding = dimred_colors.encode_color_candidate(candidate)
+    codes = dimred_colors.decode_codes(encoding)
+
+    assert encoding["dtype"] == "uint16"
+    assert codes[299] == 299  # noqa PLR2004
+    assert codes[-1] == dimred_colors.UINT16_MISSING
+
+
+def test_numeric_values_are_quantized():
+    candidate = {"kind": "numeric", "values": [0.0, None, 5.0, 10.0], "min": 0.0, "max": 10.0}
+
+    encoding = dimred_colors.encode_color_candidate(candidate)
+
+    assert encoding["levels"] == dimred_colors.NUMERIC_LEVELS
+    np.testing.assert_array_equal(dimred_colors.decode_codes(encoding), [0, 255, 127, 254])
+    assert dimred_colors.encode_color_candidate({"kind": "numeric", "values": [None], "min": None, "max": None}) is None
+
+
+def test_strip_encoded_values():
+    candidates = [{"name": "kind", "kind": "categorical", "values": ["a", "b"], "unique_values": ["a", "b"]}]
+    dimred_colors.encode_color_candidates(candidates)
+    meta = {"method": "pca", "prepare_info": {"color_values": ["a", "b"], "color_candidates": candidates}}
+
+    stripped = dimred_colors.strip_encoded_values(meta)
+
+    assert "color_values" not in stripped["prepare_info"]
+    assert "values" not in stripped["prepare_info"]["color_candidates"][0]
+    assert "encoding" in stripped["prepare_info"]["color_candidates"][0]
+    # the cached result is left alone
+    assert meta["prepare_info"]["color_candidates"][0]["values"] == ["a", "b"]
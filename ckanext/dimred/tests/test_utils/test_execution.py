@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred.adapters.tabular import TabularAdapter
+from ckanext.dimred.exception import DimredPreviewError, DimredTimeoutError, DimredWorkerError
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils import execution as dimred_execution
+from ckanext.dimred.utils.frames import get_frame_cache
+from ckanext.dimred.utils.models import ModelStore
+
+
+def _square(arr):
+    return arr**2, {"pid": os.getpid()}
+
+
+def _fail(kind):
+    if kind == "invalid":
+        raise tk.ValidationError({"method": ["Method 'x' is not allowed."]})
+    if kind == "crash":
+        os._exit(1)
+    if kind == "slow":
+        time.sleep(5)
+    raise ValueError("boom")
+
+
+def _load_frame(resource_id):
+    return get_frame_cache().get_or_load(resource_id, "sig", lambda: ("loaded in worker", 10))
+
+
+@pytest.fixture
+def loading_frame():
+    """Keep another thread in the middle of loading frame ("loading-r", "sig") of the frame cache."""
+    started, release = threading.Event(), threading.Event()
+
+    def load():
+        started.set()
+        release.wait(30)
+        return "loaded in parent", 10
+
+    thread = threading.Thread(target=get_frame_cache().get_or_load, args=("loading-r", "sig", load))
+    thread.start()
+    started.wait(5)
+    yield
+    release.set()
+    thread.join()
+
+
+@pytest.fixture
+def backend():
+    backend = dimred_execution.ProcessBackend(1)
+    yield backend
+    backend.shutdown()
+
+
+def test_shared_array_round_trip():
+    arr = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+    shared = dimred_execution.SharedArray.publish(arr)
+
+    np.testing.assert_array_equal(shared.collect(), arr)
+
+
+def test_abandoned_shared_arrays_are_freed():
+    names = dimred_execution._block_names("abandoned")
+    published = [dimred_execution.SharedArray.publish(np.ones(3), next(names)) for _ in range(2)]
+
+    dimred_execution._discard_blocks("abandoned")
+
+    for shared in published:
+        with pytest.raises(FileNotFoundError):
+            shared.collect()
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+def test_process_backend_runs_in_worker(backend):
+    squared, info = backend.run(_square, np.arange(4.0))
+
+    np.testing.assert_array_equal(squared, [0.0, 1.0, 4.0, 9.0])
+    assert info["pid"] != os.getpid()
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.process_timeout", "1")
+def test_process_backend_maps_failures(backend):
+    with pytest.raises(tk.ValidationError):
+        backend.run(_fail, "invalid")
+    with pytest.raises(DimredPreviewError, match="ValueError: boom"):
+        backend.run(_fail, "error")
+    with pytest.raises(DimredTimeoutError):
+        backend.run(_fail, "slow")
+    with pytest.raises(DimredWorkerError):
+        backend.run(_fail, "crash")
+
+    # the pool is recreated after a worker died
+    assert backend.run(_square, np.ones(2))[0].tolist() == [1.0, 1.0]
+
+
+@pytest.mark.usefixtures("with_plugins", "loading_frame")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.process_timeout", "2")
+def test_worker_forked_during_a_frame_load_does_not_wait_for_it(backend):
+    assert backend.run(_load_frame, "loading-r") == "loaded in worker"
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+@pytest.mark.ckan_config("ckanext.dimred.execution_backend", "process")
+def test_pipeline_in_worker_process(monkeypatch, tmp_path, backend):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+    monkeypatch.setattr(dimred_execution, "get_process_backend", lambda: backend)
+
+    result = dimred_action.dimred_run_dimred_pipeline(
+        {}, {"resource": {"id": "pooled-r", "format": "csv"}, "resource_view": {"id": "pooled-v", "method": "pca"}}
+    )
+
+    assert len(result["embedding"]) == 4
+    names = [span["name"] for span in result["meta"]["timings"]["spans"]]
+    assert names.index("worker.fit") < names.index("worker")
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_batch_task_stops_at_timeout(monkeypatch):
+    built = []
+
+    def build(resource, resource_view, loaded=None):
+        built.append(resource_view["id"])
+        raise DimredTimeoutError
+
+    monkeypatch.setattr(dimred_action, "_read_resource", lambda resource, view: None)
+    monkeypatch.setattr(dimred_action, "_build_dimred_preview", build)
+
+    with pytest.raises(DimredTimeoutError):
+        dimred_action._compute_resource_previews({"id": "r"}, [{"id": "v1"}, {"id": "v2"}])
+    assert built == ["v1"]
@@ -1,6 +1,28 @@
 from __future__ import annotations
 
-from ckanext.dimred.utils.export import embedding_to_csv
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+from ckanext.dimred.exception import DimredExportFormatError
+from ckanext.dimred.utils import export as export_utils
+from ckanext.dimred.utils.export import embedding_to_binary, embedding_to_csv, iter_embedding_csv
+
+CANDIDATES_META = {
+    "method": "pca",
+    "method_params": {"n_components": 2},
+    "prepare_info": {
+        "color_by": "label",
+        "color_values": ["a", None],
+        "color_candidates": [
+            {"name": "label", "kind": "categorical", "values": ["a", None], "unique_values": ["a"]},
+            {"name": "size", "kind": "numeric", "values": [1.5, None], "min": 1.5, "max": 1.5},
+        ],
+    },
+}
 
 
 def test_embedding_to_csv_basic():
@@ -20,3 +42,105 @@ def test_embedding_to_csv_with_color():
     assert lines[0] == "x,y,label"
     assert lines[1].endswith(",a")
     assert lines[2].endswith(",b")
+
+
+def test_embedding_to_csv_matches_csv_writer_quoting():
+    labels = ["plain", "with,comma", 'with "quote"', None, "multi\nline"]
+    embedding = [[float(i), i / 3] for i in range(len(labels))]
+    meta = {"prepare_info": {"color_by": "label", "color_values": labels}}
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["x", "y", "label"])
+    for coords, label in zip(embedding, labels, strict=True):
+        writer.writerow([*coords, label])
+
+    assert embedding_to_csv(embedding, meta) == buf.getvalue()
+
+
+def test_iter_embedding_csv_yields_header_and_chunks():
+    embedding = [[float(i), float(i)] for i in range(5)]
+
+    chunks = list(iter_embedding_csv(embedding, {"prepare_info": {}}, chunk_rows=2))
+
+    assert chunks[0] == "x,y\r\n"
+    assert len(chunks) == 4
+    assert "".join(chunks[1:]).splitlines() == [f"{float(i)},{float(i)}" for i in range(5)]
+
+
+def test_embedding_to_csv_includes_candidates():
+    meta = {
+        "prepare_info": {
+            "color_by": "label",
+            "color_values": ["a", "b"],
+            "color_candidates": [
+                {"name": "label", "kind": "categorical", "values": ["a", "b"]},
+                {"name": "size", "kind": "numeric", "values": [1.5, None]},
+                {"name": "group", "kind": "categorical", "values": ["g1", "g2"]},
+            ],
+        }
+    }
+
+    lines = embedding_to_csv([[1.0, 2.0], [3.0, 4.0]], meta, include_candidates=True).splitlines()
+
+    assert lines[0] == "x,y,label,size,group"
+    assert lines[1] == "1.0,2.0,a,1.5,g1"
+    assert lines[2] == "3.0,4.0,b,,g2"
+
+
+def test_embedding_to_csv_skips_candidates_by_default():
+    meta = {"prepare_info": {"color_candidates": [{"name": "size", "kind": "numeric", "values": [1.0]}]}}
+
+    assert embedding_to_csv([[1.0, 2.0]], meta).splitlines()[0] == "x,y"
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_embedding_to_binary_arrow_formats(export_format):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    content = embedding_to_binary([[1.0, 2.0], [3.0, 4.0]], CANDIDATES_META, export_format, include_candidates=True)
+
+    read = pq.read_table if export_format == "parquet" else lambda data: pa.ipc.open_file(data).read_all()
+    table = read(io.BytesIO(content))
+
+    assert table.column_names == ["x", "y", "label", "size"]
+    assert table.column("x").to_pylist() == [1.0, 3.0]
+    assert table.column("label").to_pylist() == ["a", None]
+    assert table.column("size").to_pylist() == [1.5, None]
+
+    file_meta = json.loads(table.schema.metadata[b"dimred"])
+    assert file_meta["method"] == "pca"
+    assert file_meta["method_params"] == {"n_components": 2}
+    assert "color_values" not in file_meta["prepare_info"]
+    assert all("values" not in c for c in file_meta["prepare_info"]["color_candidates"])
+
+
+def test_embedding_to_binary_npy():
+    content = embedding_to_binary([[1.0, 2.0], [3.0, 4.0]], CANDIDATES_META, "npy", include_candidates=True)
+
+    record = np.load(io.BytesIO(content), allow_pickle=False)
+
+    assert record.dtype.names == ("x", "y", "label", "size")
+    assert record["y"].tolist() == [2.0, 4.0]
+    assert record["label"].tolist() == ["a", ""]
+    assert record["size"][0] == 1.5
+    assert np.isnan(record["size"][1])
+
+
+def test_embedding_to_binary_requires_pyarrow(monkeypatch):
+    monkeypatch.setattr(export_utils, "pa", None)
+
+    with pytest.raises(DimredExportFormatError, match="pyarrow"):
+        embedding_to_binary([[1.0, 2.0]], {"prepare_info": {}}, "parquet")
+
+
+def test_available_export_formats_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(export_utils, "pa", None)
+
+    assert export_utils.available_export_formats() == ["csv", "npy"]
+
+
+def test_embedding_to_binary_unknown_format():
+    with pytest.raises(DimredExportFormatError):
+        embedding_to_binary([[1.0, 2.0]], {"prepare_info": {}}, "xlsx")
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse as sp
+from sklearn.preprocessing import StandardScaler
+
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.methods import SVDProjection
+from ckanext.dimred.utils import features as dimred_features
+from ckanext.dimred.utils.features import FeaturePreprocessor, bounded_nunique, categorize_columns
+
+
+def _legacy_matrix(df: pd.DataFrame, numeric_cols: list[str], categorical_cols: list[str]) -> pd.DataFrame:
+    """The get_dummies + fillna + StandardScaler path FeaturePreprocessor replaced."""
+    df_features = df[numeric_cols + categorical_cols].copy()
+    df_features = pd.get_dummies(df_features, columns=categorical_cols, dummy_na=False, drop_first=False)
+    df_features = df_features.astype(float)
+    df_features = df_features.fillna(df_features.mean()).fillna(0.0)
+    scaled = StandardScaler().fit_transform(df_features.values)
+    return pd.DataFrame(scaled, columns=df_features.columns)
+
+
+def _frame(n_rows: int, n_numeric: int = 5, n_categories: int = 30, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data: dict[str, object] = {f"num{i}": rng.normal(i, i + 1, size=n_rows) for i in range(n_numeric)}
+    data["kind"] = rng.choice([f"k{i:02d}" for i in range(n_categories)], size=n_rows)
+    return pd.DataFrame(data)
+
+
+def test_matches_legacy_encoding():
+    df = pd.DataFrame(
+        {
+            "a": [1.0, 2.0, None, 4.0, 5.0, 6.0],
+            "b": [3, 3, 3, 3, 3, 3],
+            "c": [10.0, -8.0, 6.0, 4.0, None, 0.0],
+            "kind": ["x", "y", "x", None, "z", "x"],
+            "level": [2, 1, 2, 2, 1, None],
+        }
+    )
+    numeric_cols, categorical_cols = ["a", "b", "c"], ["kind", "level"]
+    expected = _legacy_matrix(df, numeric_cols, categorical_cols)
+    preprocessor = FeaturePreprocessor(numeric_cols, categorical_cols)
+
+    matrix = preprocessor.fit_transform(df)
+
+    assert matrix.dtype == np.float32
+    assert preprocessor.feature_names == expected.columns.tolist()
+    np.testing.assert_allclose(matrix, expected.values, atol=1e-6)
+    np.testing.assert_allclose(preprocessor.transform(df), matrix)
+
+
+def test_transform_unseen_category_and_text_labels():
+    df = pd.DataFrame({"a": [1.0, 2.0, 3.0, 4.0], "level": [1, 2, 1, 2]})
+    preprocessor = FeaturePreprocessor(["a"], ["level"])
+    preprocessor.fit_transform(df)
+
+    new_rows = pd.DataFrame({"a": [2.0, 2.0], "level": ["2", 3]})
+    encoded = preprocessor.transform(new_rows)
+
+    # "2" matches the fitted label 2; unseen 3 leaves both dummies at "0"
+    assert encoded[0, 2] > 0
+    assert encoded[1, 1] < 0
+    assert encoded[1, 2] < 0
+
+
+def test_sparse_matches_uncentered_scaling():
+    df = _frame(500, n_numeric=2, n_categories=40)
+    df.loc[3, "num0"] = None
+    df.loc[5, "kind"] = None
+    numeric_cols = ["num0", "num1"]
+
+    legacy = pd.get_dummies(df[numeric_cols + ["kind"]], columns=["kind"]).astype(float)
+    legacy = legacy.fillna(legacy.mean())
+    expected = StandardScaler(with_mean=False).fit_transform(legacy.values)
+
+    preprocessor = FeaturePreprocessor(numeric_cols, ["kind"], sparse=True)
+    matrix = preprocessor.fit_transform(df)
+
+    assert sp.isspmatrix_csr(matrix)
+    assert matrix.nnz == 500 * 3 - 1
+    np.testing.assert_allclose(matrix.toarray(), expected, rtol=1e-5)
+    assert preprocessor.drift(preprocessor.transform(df)) == pytest.approx(0.0, abs=1e-5)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_sparse_features_feed_svd():
+    df = _frame(300, n_numeric=2, n_categories=40)
+    preprocessor = FeaturePreprocessor(["num0", "num1"], ["kind"], sparse=True)
+    reducer = SVDProjection(n_components=2)
+
+    embedding = reducer.fit_transform(preprocessor.fit_transform(df))
+
+    assert embedding.shape == (300, 2)
+    np.testing.assert_allclose(reducer.transform(preprocessor.transform(df.head(3))), embedding[:3], rtol=1e-4)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_sparse_path_only_for_sparse_methods():
+    assert dimred_action._use_sparse_features({"method": "svd"}, 3, 42)
+    assert dimred_action._use_sparse_features({"method": "umap"}, 3, 42)
+    assert not dimred_action._use_sparse_features({"method": "pca"}, 3, 42)
+    assert not dimred_action._use_sparse_features({"method": "svd"}, 3, 4)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_sparse_path_only_for_centering_independent_metrics():
+    assert dimred_action._use_sparse_features({"method": "umap", "method_params": {"metric": "manhattan"}}, 3, 42)
+    assert dimred_action._use_sparse_features({"method": "umap", "method_params": '{"metric": "euclidean"}'}, 3, 42)
+    assert not dimred_action._use_sparse_features({"method": "umap", "method_params": {"metric": "cosine"}}, 3, 42)
+
+
+def test_bounded_nunique_stops_early():
+    text = pd.Series([f"row {i}" for i in range(50000)])
+    # sorted values: the spread sample sees few of them, the chunked scan the rest
+    grouped = pd.Series(np.repeat([f"g{i}" for i in range(40)], 125))
+
+    assert bounded_nunique(text, 30) is None
+    assert bounded_nunique(grouped, 30) is None
+    assert bounded_nunique(grouped, 40) == 40
+    assert bounded_nunique(pd.Series(["a", None, "b", "a"]), 30) == 2
+
+
+def test_categorize_columns_only_converts_low_cardinality():
+    df = pd.DataFrame(
+        {
+            "kind": ["x", "y", None, "x"] * 300,
+            "text": [f"row {i}" for i in range(1200)],
+            "value": np.arange(1200.0),
+        }
+    )
+
+    categorize_columns(df, 30)
+
+    assert isinstance(df["kind"].dtype, pd.CategoricalDtype)
+    assert not isinstance(df["text"].dtype, pd.CategoricalDtype)
+    assert df["value"].dtype == float
+    assert bounded_nunique(df["kind"], 30) == 2
+    assert len(df) > dimred_features.CARDINALITY_SAMPLE_ROWS
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_legacy_path():
+    df = _frame(200_000)
+    numeric_cols = [col for col in df.columns if col.startswith("num")]
+
+    def measure(build):
+        tracemalloc.start()
+        started = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak
+
+    legacy_time, legacy_peak = measure(lambda: _legacy_matrix(df, numeric_cols, ["kind"]))
+    new_time, new_peak = measure(lambda: FeaturePreprocessor(numeric_cols, ["kind"]).fit_transform(df))
+
+    print(  # noqa: T201
+        f"\nlegacy: {legacy_time:.3f}s, peak {legacy_peak / 2**20:.1f} MB"
+        f"\nfeature preprocessor: {new_time:.3f}s, peak {new_peak / 2**20:.1f} MB"
+    )
+    assert new_peak * 3 <= legacy_peak
+    assert new_time < legacy_time
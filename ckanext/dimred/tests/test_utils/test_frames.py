@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from ckanext.dimred.adapters.tabular import TabularAdapter
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils.frames import FrameCache
+from ckanext.dimred.utils.memory import MB
+from ckanext.dimred.utils.models import ModelStore
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.frame_cache_mb", "1")
+def test_least_recently_used_frames_are_evicted():
+    cache = FrameCache()
+    cache.put("r1", "sig", "one", MB // 2)
+    cache.put("r2", "sig", "two", MB // 2)
+    assert cache.get("r1", "sig") == "one"
+
+    cache.put("r3", "sig", "three", MB // 2)
+    cache.put("r4", "sig", "too large", 2 * MB)
+
+    assert cache.get("r2", "sig") is None
+    assert cache.get("r1", "sig") == "one"
+    assert cache.get("r3", "sig") == "three"
+    assert cache.get("r4", "sig") is None
+    assert cache.size == MB
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.frame_cache_ttl", "0")
+def test_expired_frames_are_dropped():
+    cache = FrameCache()
+    cache.put("r1", "sig", "one", 10)
+    time.sleep(0.01)
+
+    assert cache.get("r1", "sig") is None
+    assert cache.size == 0
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_concurrent_callers_share_one_load():
+    cache = FrameCache()
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return "frame", 10
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("r1", "sig", load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["frame"] * 4
+    assert len(loads) == 1
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_loaded_frame_is_stored_before_its_load_lock_is_dropped():
+    cache = FrameCache()
+    stored = []
+
+    class Loading(dict):
+        def pop(self, key, default=None):
+            # called with the cache lock held
+            stored.append(cache._get(key))
+            return super().pop(key, default)
+
+    cache._loading = Loading()
+    cache.get_or_load("r1", "sig", lambda: ("frame", 10))
+
+    assert stored == ["frame"]
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca svd")
+def test_views_of_a_resource_share_the_parsed_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+    parses = {"count": 0}
+    parse = dimred_action._parse_resource
+
+    def counting_parse(*args, **kwargs):
+        parses["count"] += 1
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(dimred_action, "_parse_resource", counting_parse)
+
+    def run(view_id, method):
+        resource = {"id": "framed-r", "format": "csv"}
+        view = {"id": view_id, "method": method}
+        return dimred_action.dimred_run_dimred_pipeline({}, {"resource": resource, "resource_view": view})
+
+    run("framed-v1", "pca")
+    run("framed-v2", "svd")
+    assert parses["count"] == 1
+
+    # a changed file has a new signature
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n5,5,5\n", encoding="utf-8")
+    df, _ = dimred_action._read_resource({"id": "framed-r", "format": "csv"}, {"id": "framed-v1"})
+    assert len(df) == 5
+    assert parses["count"] == 2
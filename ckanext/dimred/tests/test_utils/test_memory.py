@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ckanext.dimred.exception import DimredMemoryLimitError
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils import memory as dimred_memory
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n_rows = 20000
+    return pd.DataFrame(
+        {
+            "a": rng.normal(size=n_rows),
+            "b": rng.normal(size=n_rows),
+            "kind": rng.choice([f"k{i}" for i in range(30)], size=n_rows),
+        }
+    )
+
+
+def test_estimate_counts_one_hot_width(frame):
+    base, per_row = dimred_memory.estimate_peak_bytes(frame, ["a", "b"], ["kind"])
+
+    assert dimred_memory.encoded_width(frame, ["a", "b"], ["kind"]) == 32
+    assert per_row == 32 * dimred_memory.FLOAT_BYTES * dimred_memory.MATRIX_COPIES
+    assert base == frame.memory_usage().sum()
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.max_memory_mb", "0")
+def test_memory_budget_disabled(frame):
+    df, estimate, sampled = dimred_action._fit_memory_budget(frame, ["a", "b"], ["kind"])
+
+    assert df is frame
+    assert not sampled
+    assert estimate > 0
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.max_memory_mb", "5")
+def test_memory_budget_samples_rows(frame):
+    df, estimate, sampled = dimred_action._fit_memory_budget(frame, ["a", "b"], ["kind"])
+
+    assert sampled
+    assert dimred_memory.MIN_SAMPLE_ROWS <= len(df) < len(frame)
+    assert estimate <= 5 * dimred_memory.MB
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.max_memory_mb", "1")
+def test_memory_budget_refuses_tiny_sample(frame, monkeypatch):
+    monkeypatch.setattr(dimred_memory, "MIN_SAMPLE_ROWS", 10000)
+
+    with pytest.raises(DimredMemoryLimitError):
+        dimred_action._fit_memory_budget(frame, ["a", "b"], ["kind"])
+
+
+@pytest.mark.skipif(dimred_memory.resource is None, reason="no rlimit support")
+def test_address_space_limit_is_restored():
+    resource = dimred_memory.resource
+    before = resource.getrlimit(resource.RLIMIT_AS)
+
+    with dimred_memory.address_space_limit(64 * 1024):
+        assert resource.getrlimit(resource.RLIMIT_AS)[0] <= 64 * 1024 * dimred_memory.MB
+
+    assert resource.getrlimit(resource.RLIMIT_AS) == before
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils.cache import DimredCacheManager
+from ckanext.dimred.utils.metrics import DimredMetrics, row_bucket
+
+
+def test_row_bucket():
+    assert row_bucket(500) == "1k"
+    assert row_bucket(10_000) == "10k"
+    assert row_bucket(2_000_000) == "more"
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.metrics_enabled", "true")
+def test_render_exposition():
+    metrics = DimredMetrics()
+    metrics.inc("dimred_exports_total", format="csv")
+    metrics.inc("dimred_exports_total", format="csv")
+    metrics.inc("dimred_download_bytes_total", 1024)
+    metrics.observe("dimred_pipeline_duration_seconds", 0.3, method="pca", rows="1k")
+    metrics.observe("dimred_pipeline_duration_seconds", 7, method="pca", rows="1k")
+
+    text = metrics.render()
+
+    assert "# TYPE dimred_exports_total counter" in text
+    assert 'dimred_exports_total{format="csv"} 2' in text
+    assert "dimred_download_bytes_total 1024" in text
+    assert 'dimred_pipeline_duration_seconds_bucket{method="pca",rows="1k",le="0.5"} 1' in text
+    assert 'dimred_pipeline_duration_seconds_bucket{method="pca",rows="1k",le="10"} 2' in text
+    assert 'dimred_pipeline_duration_seconds_bucket{method="pca",rows="1k",le="+Inf"} 2' in text
+    assert 'dimred_pipeline_duration_seconds_sum{method="pca",rows="1k"} 7.3' in text
+    assert 'dimred_pipeline_duration_seconds_count{method="pca",rows="1k"} 2' in text
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_redis")
+@pytest.mark.ckan_config("ckanext.dimred.metrics_enabled", "true")
+def test_cache_lookups_are_counted():
+    cache = DimredCacheManager()
+    cache.get("res-1", "view-1", "sig")
+    cache.save("res-1", "view-1", "sig", {"embedding": [[0.0, 1.0]], "meta": {}})
+    cache.get("res-1", "view-1", "sig")
+
+    text = dimred_action.dimred_metrics({"ignore_auth": True}, {})["content"]
+
+    assert 'dimred_cache_requests_total{result="hit",tier="view"} 1' in text
+    assert 'dimred_cache_requests_total{result="miss",tier="view"} 1' in text
+    assert 'dimred_payload_bytes_count{kind="preview"} 1' in text
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+def test_disabled_metrics_are_not_recorded():
+    metrics = DimredMetrics()
+    metrics.inc("dimred_exports_total", format="npy")
+
+    assert 'dimred_exports_total{format="npy"}' not in metrics.render()
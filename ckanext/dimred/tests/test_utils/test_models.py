@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred.exception import DimredModelNotFoundError, DimredTransformError
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.methods import PCAProjection, TSNEProjection
+from ckanext.dimred.utils.features import FeaturePreprocessor
+from ckanext.dimred.utils.models import FittedModel, ModelStore
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "a": [1.0, 2.0, None, 4.0, 5.0, 6.0],
+            "b": [10.0, 8.0, 6.0, 4.0, 2.0, 0.0],
+            "kind": ["x", "y", "x", "y", "x", None],
+        }
+    )
+
+
+def test_preprocessor_transform_matches_fit(frame):
+    preprocessor = FeaturePreprocessor(["a", "b"], ["kind"])
+
+    fitted = preprocessor.fit_transform(frame)
+
+    assert preprocessor.feature_names == ["a", "b", "kind_x", "kind_y"]
+    np.testing.assert_allclose(preprocessor.transform(frame), fitted)
+
+
+def test_preprocessor_handles_unseen_and_missing_values(frame):
+    preprocessor = FeaturePreprocessor(["a", "b"], ["kind"])
+    preprocessor.fit_transform(frame)
+
+    rows = pd.DataFrame.from_records([{"a": "3", "kind": "z"}, {"b": 5}])
+    matrix = preprocessor.transform(rows)
+
+    assert matrix.shape == (2, 4)
+    assert np.isfinite(matrix).all()
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_fitted_model_transforms_new_rows(frame):
+    preprocessor = FeaturePreprocessor(["a", "b"], ["kind"])
+    reducer = PCAProjection(n_components=2)
+    embedding = reducer.fit_transform(preprocessor.fit_transform(frame))
+    model = FittedModel("pca", preprocessor, reducer)
+
+    np.testing.assert_allclose(model.transform(frame.head(2)), embedding[:2], rtol=1e-5)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_tsne_cannot_transform():
+    with pytest.raises(DimredTransformError):
+        TSNEProjection(n_components=2).transform(np.zeros((2, 2)))
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca tsne")
+def test_fitted_model_requires_allowed_transform_method():
+    with pytest.raises(tk.ValidationError):
+        dimred_action._get_fitted_model({"id": "res"}, {"method": "umap"})
+    with pytest.raises(tk.ValidationError):
+        dimred_action._get_fitted_model({"id": "res"}, {"method": "unknown"})
+    with pytest.raises(DimredTransformError):
+        dimred_action._get_fitted_model({"id": "res"}, {"method": "tsne"})
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+def test_fitted_model_is_never_fitted_on_demand(monkeypatch, tmp_path):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path)))
+    monkeypatch.setattr(dimred_action, "_fit_dimred_model", lambda *args: pytest.fail("model was fitted"))
+
+    with pytest.raises(DimredModelNotFoundError):
+        dimred_action._get_fitted_model({"id": "res"}, {"method": "pca"})
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "true")
+def test_model_store_roundtrip(tmp_path, frame):
+    store = ModelStore(str(tmp_path))
+    preprocessor = FeaturePreprocessor(["a", "b"], ["kind"])
+    reducer = PCAProjection(n_components=2)
+    reducer.fit_transform(preprocessor.fit_transform(frame))
+
+    assert store.load("res", "sig") is None
+
+    store.save("res", "sig", FittedModel("pca", preprocessor, reducer))
+    loaded = store.load("res", "sig")
+
+    assert loaded is not None
+    assert loaded.method == "pca"
+    assert loaded.transform(frame).shape == (len(frame), 2)
+    assert list((tmp_path / "res").iterdir()) == [tmp_path / "res" / "sig.joblib"]
+
+    store.delete_for_resource("res")
+    assert store.load("res", "sig") is None
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "true")
+def test_model_store_prune_keeps_models_in_use(tmp_path, frame):
+    store = ModelStore(str(tmp_path))
+    preprocessor = FeaturePreprocessor(["a", "b"], [])
+    preprocessor.fit_transform(frame)
+    for sig in ("used", "stale"):
+        store.save("res", sig, FittedModel("pca", preprocessor, PCAProjection()))
+
+    store.prune("res", {"used"})
+
+    assert store.load("res", "used") is not None
+    assert store.load("res", "stale") is None
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.model_store_enabled", "false")
+def test_model_store_disabled(tmp_path, frame):
+    store = ModelStore(str(tmp_path))
+    preprocessor = FeaturePreprocessor(["a", "b"], [])
+    preprocessor.fit_transform(frame)
+
+    store.save("res", "sig", FittedModel("pca", preprocessor, PCAProjection()))
+
+    assert store.load("res", "sig") is None
+    assert not (tmp_path / "res").exists()
+
+
+def test_preprocessor_drift(frame):
+    preprocessor = FeaturePreprocessor(["a", "b"], [])
+    fitted = preprocessor.fit_transform(frame)
+
+    assert preprocessor.drift(fitted[:0]) == 0.0
+    assert preprocessor.drift(fitted[:1]) < 0.5
+
+    shifted = pd.DataFrame({"a": [100.0] * 6, "b": [100.0] * 6})
+    assert preprocessor.drift(preprocessor.transform(shifted)) > 1
+
+
+def test_preprocessor_unknown_features(frame):
+    preprocessor = FeaturePreprocessor(["a", "b"], ["kind"])
+    preprocessor.fit_transform(frame)
+
+    assert preprocessor.unknown_features(pd.DataFrame({"kind": ["x", None]})) == []
+    assert preprocessor.unknown_features(pd.DataFrame({"kind": ["z"]})) == ["kind_z"]
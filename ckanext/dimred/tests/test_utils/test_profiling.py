@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred.adapters import TabularAdapter
+from ckanext.dimred.exception import DimredRateLimitError
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils import profiling as dimred_profiling
+
+
+def _busy() -> list[bytes]:
+    blocks = []
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        blocks.append(bytes(1024))
+    return blocks
+
+
+def test_speedscope_profile():
+    report = dimred_profiling.profile_call(_busy, "speedscope", name="busy", top_allocations=5)
+    data = json.loads(dimred_profiling.with_allocations(report, "speedscope"))
+
+    profile = data["profiles"][0]
+    assert profile["type"] == "sampled"
+    assert profile["samples"]
+    assert len(profile["samples"]) == len(profile["weights"])
+    frame_names = {frame["name"] for frame in data["shared"]["frames"]}
+    assert "_busy" in frame_names
+    assert len(data["dimred"]["allocations"]) <= 5
+    assert report["elapsed_ms"] >= 50
+
+
+def test_text_profile_lists_functions_and_allocations():
+    report = dimred_profiling.profile_call(_busy, "text", top_allocations=3)
+    content = dimred_profiling.with_allocations(report, "text")
+
+    assert "_busy" in content
+    assert "Top allocations during the run" in content
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+def test_profile_slot_is_rate_limited():
+    dimred_profiling.acquire_profile_slot(60)
+
+    with pytest.raises(DimredRateLimitError):
+        dimred_profiling.acquire_profile_slot(60)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_profile_view_disabled():
+    with pytest.raises(tk.ValidationError):
+        dimred_action.dimred_profile_view({"ignore_auth": True}, {"id": "r", "view_id": "v"})
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.profiling_enabled", "true")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+def test_profile_view_skips_caches(monkeypatch, tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+    monkeypatch.setattr(dimred_profiling, "RATE_LIMIT_KEY", f"{dimred_profiling.RATE_LIMIT_KEY}:{tmp_path.name}")
+    shown = {
+        "resource_show": {"id": "profiled-r", "format": "csv"},
+        "resource_view_show": {"id": "profiled-v", "method": "pca"},
+    }
+    monkeypatch.setattr(tk, "get_action", lambda name: lambda context, data_dict: shown[name])
+    cache = dimred_action.dimred_cache.get_cache()
+    monkeypatch.setattr(cache, "save", pytest.fail)
+
+    result = dimred_action.dimred_profile_view({"ignore_auth": True}, {"id": "profiled-r", "view_id": "profiled-v"})
+
+    assert result["filename"] == "dimred-profile-profiled-r-profiled-v.speedscope.json"
+    assert json.loads(result["content"])["profiles"][0]["name"] == "dimred profiled-r/profiled-v"
+    names = [span["name"] for span in result["timings"]["spans"]]
+    assert "fit" in names
+    assert "model_save" not in names
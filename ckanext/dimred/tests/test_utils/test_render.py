@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from ckanext.dimred.exception import DimredEmbeddingError
+from ckanext.dimred.utils import render
+
+
+def test_embedding_to_png_returns_png_bytes():
+    embedding = np.array([[0.0, 1.0], [2.0, 3.0], [2.0, -1.0]])
+    meta = {"prepare_info": {"color_by": "label", "color_values": ["a", "b", "a"]}}
+
+    content = render.embedding_to_png(embedding, meta)
+
+    assert content.startswith(b"\x89PNG\r\n\x1a\n")
+
+
+def test_embedding_to_png_3d():
+    embedding = np.array([[0.0, 1.0, 2.0], [2.0, 3.0, 4.0]])
+
+    content = render.embedding_to_png(embedding, {"prepare_info": {}})
+
+    assert content.startswith(b"\x89PNG")
+
+
+def test_embedding_to_png_rejects_1d():
+    with pytest.raises(DimredEmbeddingError):
+        render.embedding_to_png(np.array([[1.0], [2.0]]), {})
+
+
+def test_embedding_to_png_data_url_prefix():
+    url = render.embedding_to_png_data_url(np.array([[0.0, 1.0], [1.0, 0.0]]), {})
+
+    assert url.startswith("data:image/png;base64,")
+
+
+def test_render_signature_is_stable():
+    assert render.render_signature() == render.render_signature()
+    assert render.render_signature({"dpi": 50}) != render.render_signature()
+
+
+def test_pooled_figures_are_reused_and_reset():
+    embedding = np.array([[0.0, 1.0], [2.0, 3.0], [2.0, -1.0]])
+    other = np.array([[5.0, 5.0], [6.0, 7.0]])
+
+    first = render.embedding_to_png(embedding, {})
+    render.embedding_to_png(other, {})
+    again = render.embedding_to_png(embedding, {})
+
+    assert first == again
+
+
+def test_figure_pool_reuses_released_template():
+    pool = render._FigurePool(lambda: render._FigureTemplate(is_3d=False), max_size=1)
+
+    template = pool.acquire()
+    pool.release(template)
+
+    assert pool.acquire() is template
+
+
+def test_compute_colors_follows_first_appearance():
+    colors = render._compute_colors("label", ["b", "a", "b", None], 4)
+
+    assert list(colors) == [render.PALETTE[0], render.PALETTE[1], render.PALETTE[0], render.PALETTE[2]]
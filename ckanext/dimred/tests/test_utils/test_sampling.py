@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils import sampling as dimred_sampling
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    # 9900 rows of "common", 100 of "rare"; the rare ones sit far away
+    kind = np.array(["common"] * 9900 + ["rare"] * 100)
+    shift = np.where(kind == "rare", 20.0, 0.0)
+    return pd.DataFrame(
+        {
+            "a": rng.normal(size=len(kind)) + shift,
+            "b": rng.normal(size=len(kind)) + shift,
+            "kind": kind,
+        }
+    )
+
+
+def test_balanced_quotas():
+    np.testing.assert_array_equal(dimred_sampling.balanced_quotas(np.array([5, 100, 40]), 60), [5, 27, 28])
+    np.testing.assert_array_equal(dimred_sampling.balanced_quotas(np.array([5, 100, 40]), 500), [5, 100, 40])
+    np.testing.assert_array_equal(dimred_sampling.balanced_quotas(np.array([5, 100, 40]), 500, 30), [5, 30, 30])
+
+
+def test_uniform_sampling_matches_sample(frame):
+    df, strategy = dimred_sampling.sample_rows(frame, 200)
+
+    assert strategy == "uniform"
+    pd.testing.assert_frame_equal(df, frame.sample(200, random_state=42).reset_index(drop=True))
+
+
+def test_stratified_keeps_rare_class(frame):
+    df, strategy = dimred_sampling.sample_rows(frame, 200, strategy="stratified", stratify_by="kind")
+
+    assert strategy == "stratified"
+    assert len(df) == 200
+    assert (df["kind"] == "rare").sum() == 100
+    # rows keep their original order
+    assert df["kind"].is_monotonic_increasing
+
+
+def test_stratified_class_cap_and_fallback(frame):
+    df, _ = dimred_sampling.sample_rows(frame, 5000, strategy="stratified", stratify_by="kind", class_cap=50)
+    assert df["kind"].value_counts().to_dict() == {"common": 50, "rare": 50}
+
+    df, strategy = dimred_sampling.sample_rows(frame, 200, strategy="stratified", stratify_by="missing")
+    assert strategy == "uniform"
+    assert len(df) == 200
+
+
+def test_stratified_bins_numeric_column(frame):
+    df, _ = dimred_sampling.sample_rows(frame, 500, strategy="stratified", stratify_by="a")
+
+    assert len(df) == 500
+    # balanced over quantile bins, i.e. about 50 rows per tenth of "a"
+    assert df["a"].between(frame["a"].quantile(0.9), np.inf).sum() == pytest.approx(50, abs=1)
+
+
+def test_density_keeps_sparse_region(frame):
+    df, strategy = dimred_sampling.sample_rows(frame, 200, strategy="density", numeric_cols=["a", "b"])
+
+    assert strategy == "density"
+    assert len(df) == 200
+    # uniform sampling would keep about 2 rows of the far-away cluster
+    assert (df["kind"] == "rare").sum() >= 20  # noqa PLR2004
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.ckan_config("ckanext.dimred.max_rows", "200")
+@pytest.mark.ckan_config("ckanext.dimred.sampling_strategy", "stratified")
+def test_prepare_matrix_reports_sampling(frame):
+    _, info, _ = dimred_action._prepare_matrix(frame, {"color_by": "kind"})
+
+    assert info["sampling"] == "stratified"
+    assert info["n_rows_used"] == 200
+    assert info["color_values"].count("rare") == 100
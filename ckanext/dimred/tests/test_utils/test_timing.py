@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+
+from ckanext.dimred.adapters.tabular import TabularAdapter
+from ckanext.dimred.logic import action as dimred_action
+from ckanext.dimred.utils import timing as dimred_timing
+from ckanext.dimred.utils.models import ModelStore
+
+
+def test_spans_nest_and_are_noop_outside_recording():
+    with dimred_timing.span("ignored"):
+        pass
+
+    with dimred_timing.recording() as recorder:
+        with dimred_timing.span("prepare"), dimred_timing.span("features"):
+            pass
+        # a nested recording reuses the active recorder
+        with dimred_timing.recording() as inner, dimred_timing.span("fit"):
+            pass
+
+    assert inner is recorder
+    report = recorder.report()
+    assert [span["name"] for span in report["spans"]] == ["prepare.features", "prepare", "fit"]
+    assert report["total_ms"] >= report["spans"][1]["ms"]
+
+
+@pytest.mark.usefixtures("with_plugins", "reset_redis")
+@pytest.mark.ckan_config("ckanext.dimred.allowed_methods", "pca")
+def test_pipeline_records_timings(monkeypatch, tmp_path, caplog):
+    monkeypatch.setattr(dimred_action, "get_model_store", lambda: ModelStore(str(tmp_path / "models")))
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("a,b,c\n1,2,3\n2,1,3\n3,3,1\n4,2,2\n", encoding="utf-8")
+    monkeypatch.setattr(
+        dimred_action.dimred_utils,
+        "get_adapter_for_resource",
+        lambda resource: lambda res, view: TabularAdapter(res, view, filepath=str(csv_path)),
+    )
+
+    # loading a logging config elsewhere in the session may have disabled existing loggers
+    monkeypatch.setattr(dimred_timing.log, "disabled", False)
+    with caplog.at_level(logging.INFO, logger=dimred_timing.__name__):
+        result = dimred_action.dimred_run_dimred_pipeline(
+            {}, {"resource": {"id": "timed-r", "format": "csv"}, "resource_view": {"id": "timed-v", "method": "pca"}}
+        )
+
+    names = [span["name"] for span in result["meta"]["timings"]["spans"]]
+    assert names[0] == "cache_get"
+    for stage in ("read", "prepare.features.encode", "prepare.features.scale", "fit", "model_save", "serialize"):
+        assert stage in names
+    record = caplog.records[-1]
+    assert record.dimred_timings["resource_id"] == "timed-r"
+    assert record.dimred_timings["spans"][-1]["name"] == "cache_save"
@@ -5,21 +5,24 @@ from ckanext.dimred.utils.core import (
     build_display_summary,
     collect_adapters_signal,
     embedding_summary,
-    embedding_to_png_data_url,
     get_adapter_for_resource,
     get_adapter_for_resource_signal,
     printable_file_size,
 )
-from ckanext.dimred.utils.export import embedding_to_csv
+from ckanext.dimred.utils.export import embedding_to_csv, iter_embedding_csv
+from ckanext.dimred.utils.render import embedding_to_png, embedding_to_png_data_url, render_signature
 
 __all__ = [
     "collect_adapters_signal",
+    "embedding_to_png",
     "embedding_to_png_data_url",
     "embedding_summary",
     "get_adapter_for_resource",
     "get_adapter_for_resource_signal",
     "printable_file_size",
     "embedding_to_csv",
+    "iter_embedding_csv",
     "get_cache",
     "build_display_summary",
+    "render_signature",
 ]
@@ -8,18 +8,66 @@ from typing import Any
 
 from redis import exceptions as redis_exc
 
+import ckan.plugins.toolkit as tk
 from ckan.lib.redis import connect_to_redis
 
 from ckanext.dimred import config as dimred_config
+from ckanext.dimred.utils.metrics import get_metrics
 
 log = logging.getLogger(__name__)
 
+# upper bound for a single warm-up; the lock expires if a worker dies
+WARM_LOCK_TTL = 600
+# provisional results live as long as the job replacing them may take, so
+# they are recomputed (and the job enqueued again) if it never finished
+PROVISIONAL_TTL = WARM_LOCK_TTL
+# config options that change computed results without being part of the
+# settings signature of a view (see _cache_settings in the actions)
+RESULT_OPTIONS = (
+    dimred_config.EMBEDDING_DECIMALS,
+    dimred_config.SPARSE_MAX_DENSITY,
+    dimred_config.MAX_MEMORY_MB,
+    dimred_config.PROGRESSIVE_METHOD,
+    dimred_config.PROGRESSIVE_MAX_ROWS,
+    dimred_config.UMAP_N_NEIGHBORS,
+    dimred_config.UMAP_MIN_DIST,
+    dimred_config.UMAP_N_COMPONENTS,
+    dimred_config.TSNE_PERPLEXITY,
+    dimred_config.TSNE_N_COMPONENTS,
+    dimred_config.PCA_N_COMPONENTS,
+    dimred_config.PCA_WHITEN,
+    dimred_config.SVD_N_COMPONENTS,
+)
+
 
 def _stable_dumps(data: dict[str, Any]) -> str:
     """Serialize data deterministically for hashing."""
     return json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
 
 
+def config_generation() -> str:
+    """Return a short hash of the config options that change computed results (RESULT_OPTIONS).
+
+    It is part of every cache key, so changing one of them (e.g. on deploy)
+    makes all previously cached entries unreachable; they then expire with
+    their TTL. Other options (metrics, execution backend...) leave the
+    cache alone. The hash is computed once per set of values.
+    """
+    return _generation(tuple(str(tk.config.get(key)) for key in RESULT_OPTIONS))
+
+
+@lru_cache(maxsize=8)
+def _generation(values: tuple[str, ...]) -> str:
+    options = dict(zip(RESULT_OPTIONS, values, strict=True))
+    return hashlib.sha256(_stable_dumps(options).encode("utf-8")).hexdigest()[:8]
+
+
+def settings_signature(settings: dict[str, Any]) -> str:
+    """Return a stable hash of the settings that define an embedding."""
+    payload = _stable_dumps(settings)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class DimredCacheManager:
     """Small Redis-backed cache for dimred previews."""
 
@@ -41,44 +89,249 @@ class DimredCacheManager:
         return dimred_config.cache_ttl()
 
     def settings_signature(self, settings: dict[str, Any]) -> str:
-        payload = _stable_dumps(settings)
-        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return settings_signature(settings)
+
+    def _view_prefix(self, resource_id: str, view_id: str) -> str:
+        return f"{self.prefix}:{resource_id}:{view_id}:"
 
     def _key(self, resource_id: str, view_id: str, settings_sig: str) -> str:
-        return f"{self.prefix}:{resource_id}:{view_id}:{settings_sig}"
+        return f"{self._view_prefix(resource_id, view_id)}{config_generation()}:{settings_sig}"
+
+    def _content_key(self, content_id: str, settings_sig: str) -> str:
+        return f"{self.prefix}:content:{content_id}:{config_generation()}:{settings_sig}"
+
+    def _content_id_key(self, resource_id: str) -> str:
+        return f"{self.prefix}:content-id:{resource_id}"
+
+    def _index_key(self, resource_id: str) -> str:
+        return f"{self.prefix}:index:{resource_id}"
+
+    def _set_indexed(self, resource_id: str, key: str, value: bytes | str, ttl: int | None = None) -> None:
+        """Store a value and record its key in the resource index, atomically.
+
+        The index gets the cache TTL on every write, so it never outlives
+        the keys it lists by more than one TTL.
+        """
+        index_key = self._index_key(resource_id)
+        pipe = self.client.pipeline()
+        pipe.setex(key, ttl or self.ttl, value)
+        pipe.sadd(index_key, key)
+        pipe.expire(index_key, self.ttl)
+        pipe.execute()
 
     def get(self, resource_id: str, view_id: str, settings_sig: str) -> dict[str, Any] | None:
         if not self.enabled:
             return None
         try:
             raw = self.client.get(self._key(resource_id, view_id, settings_sig))
-            if not raw:
-                return None
+            if raw and raw.startswith(f"{self.prefix}:content:".encode()):
+                # pointer to a content-addressed entry
+                raw = self.client.get(raw)
+            return self._count_lookup("view", self._load_result(raw))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache get failed: %s", err)
+        return None
+
+    def get_many(self, entries: list[tuple[str, str, str]]) -> list[dict[str, Any] | None]:
+        """Return the cached results of many (resource_id, view_id, settings_sig) entries.
+
+        Costs two round trips whatever the number of entries: one MGET for
+        the resource + view keys and one for the content-addressed entries
+        they point to.
+        """
+        if not self.enabled or not entries:
+            return [None] * len(entries)
+        try:
+            raws = self.client.mget([self._key(*entry) for entry in entries])
+            content_prefix = f"{self.prefix}:content:".encode()
+            pointers = sorted({raw for raw in raws if raw and raw.startswith(content_prefix)})
+            if pointers:
+                targets = dict(zip(pointers, self.client.mget(pointers), strict=True))
+                raws = [targets.get(raw, raw) if raw else raw for raw in raws]
+            return [self._count_lookup("view", self._load_result(raw)) for raw in raws]
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache get failed: %s", err)
+        return [None] * len(entries)
+
+    def get_content(self, content_id: str, settings_sig: str) -> dict[str, Any] | None:
+        """Return the result computed from any file with this content and settings."""
+        if not self.enabled:
+            return None
+        try:
+            raw = self.client.get(self._content_key(content_id, settings_sig))
+            return self._count_lookup("content", self._load_result(raw))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache get failed: %s", err)
+        return None
+
+    def get_content_id(self, resource_id: str) -> str | None:
+        """Return the content id recorded for the current file of a resource."""
+        if not self.enabled:
+            return None
+        try:
+            raw = self.client.get(self._content_id_key(resource_id))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache get failed: %s", err)
+            return None
+        return raw.decode("utf-8") if raw else None
+
+    def _count_lookup(self, tier: str, found: Any) -> Any:
+        get_metrics().inc("dimred_cache_requests_total", tier=tier, result="hit" if found else "miss")
+        return found
+
+    def _load_result(self, raw: bytes | None) -> dict[str, Any] | None:
+        if not raw:
+            return None
+        try:
             data = json.loads(raw)
-            if isinstance(data, dict) and "embedding" in data and "meta" in data:
-                return data
-        except (redis_exc.RedisError, json.JSONDecodeError, TypeError) as err:
+        except (json.JSONDecodeError, TypeError) as err:
             log.warning("Dimred cache get failed: %s", err)
+            return None
+        if isinstance(data, dict) and "embedding" in data and "meta" in data:
+            return data
         return None
 
-    def save(self, resource_id: str, view_id: str, settings_sig: str, result: dict[str, Any]) -> None:
+    def save(  # noqa: PLR0913
+        self,
+        resource_id: str,
+        view_id: str,
+        settings_sig: str,
+        result: dict[str, Any],
+        *,
+        content_id: str | None = None,
+        ttl: int | None = None,
+    ) -> None:
+        """Store a result for a resource + view.
+
+        With a content_id (derived from the file content), the result is
+        stored once under a content-addressed key and the resource + view key
+        only points to it, so other views and resources with the same file
+        and settings reuse it (see link()). ttl overrides the cache TTL of
+        results stored without a content_id (e.g. provisional ones).
+        """
         if not self.enabled:
             return
         try:
-            key = self._key(resource_id, view_id, settings_sig)
             payload = json.dumps(result)
-            self.client.setex(key, self.ttl, payload)
+            get_metrics().observe("dimred_payload_bytes", len(payload), kind="preview")
+            if content_id is None:
+                self._set_indexed(resource_id, self._key(resource_id, view_id, settings_sig), payload, ttl)
+                return
+            self.client.setex(self._content_key(content_id, settings_sig), self.ttl, payload)
+            self.link(resource_id, view_id, settings_sig, content_id)
         except (redis_exc.RedisError, TypeError, ValueError) as err:
             log.warning("Dimred cache save failed: %s", err)
 
+    def link(self, resource_id: str, view_id: str, settings_sig: str, content_id: str) -> None:
+        """Point a resource + view at a content-addressed result and remember the resource's content id."""
+        if not self.enabled:
+            return
+        try:
+            self._set_indexed(
+                resource_id,
+                self._key(resource_id, view_id, settings_sig),
+                self._content_key(content_id, settings_sig),
+            )
+            self._set_indexed(resource_id, self._content_id_key(resource_id), content_id)
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache save failed: %s", err)
+
+    def _image_key(self, resource_id: str, view_id: str, settings_sig: str, render_sig: str) -> str:
+        return f"{self._key(resource_id, view_id, settings_sig)}:png:{render_sig}"
+
+    def get_image(self, resource_id: str, view_id: str, settings_sig: str, render_sig: str) -> bytes | None:
+        """Return cached PNG bytes rendered for the embedding, if any."""
+        if not self.enabled:
+            return None
+        try:
+            raw = self.client.get(self._image_key(resource_id, view_id, settings_sig, render_sig))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache image get failed: %s", err)
+            return None
+        return self._count_lookup("image", bytes(raw) if raw else None)
+
+    def save_image(
+        self,
+        resource_id: str,
+        view_id: str,
+        settings_sig: str,
+        render_sig: str,
+        content: bytes,
+    ) -> None:
+        """Store rendered PNG bytes next to the embedding they were drawn from.
+
+        The image key shares the embedding key prefix, so it is invalidated
+        together with the embedding.
+        """
+        if not self.enabled:
+            return
+        try:
+            key = self._image_key(resource_id, view_id, settings_sig, render_sig)
+            get_metrics().observe("dimred_payload_bytes", len(content), kind="image")
+            self._set_indexed(resource_id, key, content)
+        except (redis_exc.RedisError, TypeError, ValueError) as err:
+            log.warning("Dimred cache image save failed: %s", err)
+
+    def _lock_key(self, resource_id: str, view_id: str) -> str:
+        return f"{self.prefix}:lock:{resource_id}:{view_id}"
+
+    def acquire_lock(self, resource_id: str, view_id: str, ttl: int = WARM_LOCK_TTL) -> bool:
+        """Take the warm-up lock of a view; True if acquired (or caching is off)."""
+        if not self.enabled:
+            return True
+        try:
+            return bool(self.client.set(self._lock_key(resource_id, view_id), 1, nx=True, ex=ttl))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache lock failed: %s", err)
+            return True
+
+    def is_locked(self, resource_id: str, view_id: str) -> bool:
+        """Return True if the warm-up lock of a view is held."""
+        if not self.enabled:
+            return False
+        try:
+            return bool(self.client.exists(self._lock_key(resource_id, view_id)))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache lock check failed: %s", err)
+            return False
+
+    def release_lock(self, resource_id: str, view_id: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.client.delete(self._lock_key(resource_id, view_id))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache unlock failed: %s", err)
+
     def delete_for_resource(self, resource_id: str) -> None:
+        """Delete every cached entry of a resource, using its key index."""
         if not self.enabled:
             return
-        pattern = f"{self.prefix}:{resource_id}:*"
+        index_key = self._index_key(resource_id)
         try:
-            keys = list(self.client.scan_iter(match=pattern))
+            keys = self.client.smembers(index_key)
+            pipe = self.client.pipeline()
             if keys:
-                self.client.delete(*keys)
+                pipe.delete(*keys)
+            pipe.delete(index_key)
+            pipe.execute()
+        except redis_exc.RedisError as err:
+            log.warning("Dimred cache delete failed: %s", err)
+
+    def delete_for_view(self, resource_id: str, view_id: str) -> None:
+        """Delete every cached entry of one view (e.g. after its settings changed)."""
+        if not self.enabled:
+            return
+        index_key = self._index_key(resource_id)
+        view_prefix = self._view_prefix(resource_id, view_id).encode("utf-8")
+        try:
+            keys = [key for key in self.client.smembers(index_key) if key.startswith(view_prefix)]
+            if not keys:
+                return
+            pipe = self.client.pipeline()
+            pipe.delete(*keys)
+            pipe.srem(index_key, *keys)
+            pipe.execute()
         except redis_exc.RedisError as err:
             log.warning("Dimred cache delete failed: %s", err)
 
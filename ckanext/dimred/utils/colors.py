@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import base64
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# the largest code of each dtype marks points without a value
+UINT8_MISSING = np.iinfo(np.uint8).max
+UINT16_MISSING = np.iinfo(np.uint16).max
+# numeric values are quantized to codes 0..NUMERIC_LEVELS between min and max
+NUMERIC_LEVELS = UINT8_MISSING - 1
+
+
+def encode_color_candidates(candidates: list[dict[str, Any]]) -> None:
+    """Attach a compact ``encoding`` to every color candidate, in place.
+
+    Candidates whose values cannot be encoded (a numeric column without a
+    finite value) get none and are colored from their values.
+    """
+    for candidate in candidates:
+        encoding = encode_color_candidate(candidate)
+        if encoding:
+            candidate["encoding"] = encoding
+        else:
+            candidate.pop("encoding", None)
+
+
+def encode_color_candidate(candidate: dict[str, Any]) -> dict[str, Any] | None:
+    """Return the per-point codes the chart binds to its visual map.
+
+    - categorical: ``uint8`` (``uint16`` past 254 labels) palette index per
+      point, into ``labels``: the candidate's ``unique_values`` first, then
+      other values in order of appearance;
+    - numeric: ``uint8`` value quantized to ``0..levels`` between the
+      candidate's ``min`` and ``max``.
+
+    Codes are base64-encoded little-endian bytes; ``missing`` is the code of
+    points without a value.
+    """
+    values = candidate.get("values") or []
+    if candidate.get("kind") == "numeric":
+        return _encode_numeric(values, candidate.get("min"), candidate.get("max"))
+    return _encode_categorical(values, candidate.get("unique_values") or [])
+
+
+def decode_codes(encoding: dict[str, Any]) -> np.ndarray:
+    """Return the codes of an encoding as an array."""
+    return np.frombuffer(base64.b64decode(encoding["codes"]), dtype=np.dtype(encoding["dtype"]).newbyteorder("<"))
+
+
+def strip_encoded_values(meta: dict[str, Any]) -> dict[str, Any]:
+    """Return a copy of meta without the raw values the encodings replace.
+
+    Meant for the page payload of the chart; cached results keep the values
+    for exports and incremental updates.
+    """
+    info = dict(meta.get("prepare_info") or {})
+    candidates = info.get("color_candidates") or []
+    if not candidates or not all("encoding" in candidate for candidate in candidates):
+        return meta
+
+    info["color_candidates"] = [
+        {key: value for key, value in candidate.items() if key != "values"} for candidate in candidates
+    ]
+    info.pop("color_values", None)
+    return {**meta, "prepare_info": info}
+
+
+def _encode_categorical(values: list[Any], known_labels: list[str]) -> dict[str, Any]:
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    labels = list(known_labels)
+    index = {label: code for code, label in enumerate(labels)}
+    for label in uniques:
+        if label not in index:
+            index[label] = len(labels)
+            labels.append(label)
+
+    dtype, missing = (np.uint8, UINT8_MISSING) if len(labels) < UINT8_MISSING else (np.uint16, UINT16_MISSING)
+    # labels past the last code are drawn as missing
+    labels = labels[:missing]
+    mapping = np.array([index[label] for label in uniques], dtype=np.int64)
+    mapped = mapping[codes] if len(mapping) else np.zeros(len(codes), dtype=np.int64)
+    mapped[(codes < 0) | (mapped >= missing)] = missing
+    return {
+        "dtype": np.dtype(dtype).name,
+        "codes": _b64(mapped.astype(dtype)),
+        "missing": int(missing),
+        "labels": labels,
+    }
+
+
+def _encode_numeric(values: list[Any], min_val: float | None, max_val: float | None) -> dict[str, Any] | None:
+    if min_val is None or max_val is None:
+        return None
+
+    arr = np.array([np.nan if v is None else v for v in values], dtype=float)
+    known = np.isfinite(arr)
+    span = max_val - min_val
+    scaled = (arr[known] - min_val) / span * NUMERIC_LEVELS if span > 0 else np.zeros(known.sum())
+    codes = np.full(len(arr), UINT8_MISSING, dtype=np.uint8)
+    codes[known] = np.clip(np.rint(scaled), 0, NUMERIC_LEVELS)
+    return {
+        "dtype": "uint8",
+        "codes": _b64(codes),
+        "missing": int(UINT8_MISSING),
+        "levels": NUMERIC_LEVELS,
+    }
+
+
+def _b64(codes: np.ndarray) -> str:
+    return base64.b64encode(codes.astype(codes.dtype.newbyteorder("<")).tobytes()).decode("ascii")
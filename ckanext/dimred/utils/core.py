@@ -1,18 +1,14 @@
 from __future__ import annotations
 
-import base64
-import io
 import logging
 import math
 from typing import Any
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 import ckan.plugins.toolkit as tk
 
 from ckanext.dimred.adapters import BaseAdapter, adapter_registry
-from ckanext.dimred.exception import DimredEmbeddingError
 
 log = logging.getLogger(__name__)
 
@@ -54,128 +50,6 @@ def get_adapter_for_resource(
     return adapter_registry.get(res_format)
 
 
-def embedding_to_png_data_url(embedding: np.ndarray, meta: dict[str, Any]) -> str:
-    """Render a 2D/3D scatter plot for the embedding and return a data URL."""
-    if embedding.shape[1] < 2:  # noqa PLR2004
-        raise DimredEmbeddingError
-
-    xs = embedding[:, 0]
-    ys = embedding[:, 1]
-    is_3d = embedding.shape[1] >= 3  # noqa PLR2004
-    zs = embedding[:, 2] if is_3d else None
-
-    info = meta.get("prepare_info", {}) or {}
-    color_by = info.get("color_by")
-    color_values = info.get("color_values") or []
-
-    colors = _compute_colors(color_by, color_values, len(xs))
-
-    if is_3d:
-        fig, ax = _make_3d_figure(xs, ys, zs, colors)
-    else:
-        fig, ax = _make_2d_figure(xs, ys, colors)
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-
-    b64 = base64.b64encode(buf.read()).decode("ascii")
-    return "data:image/png;base64," + b64
-
-
-def _compute_colors(color_by: str | None, color_values: list[Any], n_points: int) -> list[str] | str:
-    """Return color mapping for points."""
-    if color_by and len(color_values) == n_points:
-        palette = [
-            "#1f77b4",
-            "#ff7f0e",
-            "#2ca02c",
-            "#d62728",
-            "#9467bd",
-            "#8c564b",
-            "#e377c2",
-            "#7f7f7f",
-            "#bcbd22",
-            "#17becf",
-        ]
-        color_map: dict[str, str] = {}
-        colors: list[str] = []
-        for label in color_values:
-            if label not in color_map:
-                idx = len(color_map) % len(palette)
-                color_map[label] = palette[idx]
-            colors.append(color_map[label])
-        return colors
-    return "#333333"
-
-
-def _axis_ticks(values: np.ndarray, n: int = 5) -> tuple[list[float], tuple[float, float]]:
-    """Return nice tick positions and limits for an array."""
-    vmin = float(np.nanmin(values))
-    vmax = float(np.nanmax(values))
-    if np.isclose(vmin, vmax):
-        vmin -= 0.5
-        vmax += 0.5
-    ticks = np.linspace(vmin, vmax, n).tolist()
-    return ticks, (vmin, vmax)
-
-
-def _make_3d_figure(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, colors: list[str] | str):
-    """Build a styled 3D matplotlib figure."""
-    fig = plt.figure(figsize=(5, 4), dpi=100)
-    ax = fig.add_subplot(111, projection="3d")
-    ax.scatter(xs, ys, zs, s=10, c=colors, depthshade=True)
-    xticks, xlim = _axis_ticks(xs)
-    yticks, ylim = _axis_ticks(ys)
-    zticks, zlim = _axis_ticks(zs)
-    ax.set_xlim(*xlim)
-    ax.set_ylim(*ylim)
-    ax.set_zlim(*zlim)
-    ax.set_xticks(xticks)
-    ax.set_yticks(yticks)
-    ax.set_zticks(zticks)
-    ax.set_xlabel("x")
-    ax.set_ylabel("y")
-    ax.set_zlabel("z")
-    ax.tick_params(labelsize=8, colors="#444444")
-    for axis in (ax.xaxis, ax.yaxis, ax.zaxis):
-        axis.set_pane_color((1, 1, 1, 0))
-        axis._axinfo["grid"]["color"] = "#dddddd"  # type: ignore[attr-defined]
-        axis._axinfo["grid"]["linewidth"] = 0.5  # type: ignore[attr-defined]
-    ax.grid(True)
-    fig.tight_layout()
-    return fig, ax
-
-
-def _make_2d_figure(xs: np.ndarray, ys: np.ndarray, colors: list[str] | str):
-    """Build a styled 2D matplotlib figure."""
-    fig, ax = plt.subplots(figsize=(5, 4), dpi=100)
-    for spine in ax.spines.values():
-        spine.set_visible(False)
-    ax.scatter(xs, ys, s=10, c=colors)
-    xticks, xlim = _axis_ticks(xs)
-    yticks, ylim = _axis_ticks(ys)
-    ax.set_xlim(*xlim)
-    ax.set_ylim(*ylim)
-    ax.set_xticks(xticks)
-    ax.set_yticks(yticks)
-    ax.tick_params(labelsize=8, colors="#444444")
-    ax.grid(True, color="#dddddd", linewidth=0.5)
-    ax.set_xlabel("x")
-    ax.set_ylabel("y")
-    fig.tight_layout()
-    return fig, ax
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-
-    b64 = base64.b64encode(buf.read()).decode("ascii")
-    return "data:image/png;base64," + b64
-
-
 def embedding_summary(embedding: np.ndarray | None, meta: dict[str, Any], top_n: int = 5) -> dict[str, Any]:
     """Compute simple summary stats for an embedding."""
     if embedding is None:
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+import numpy as np
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.exception import (
+    DimredError,
+    DimredMemoryLimitError,
+    DimredTimeoutError,
+    DimredWorkerError,
+    DimredWorkerTaskError,
+)
+from ckanext.dimred.methods import get_projection_method
+from ckanext.dimred.utils import memory as dimred_memory
+from ckanext.dimred.utils import timing as dimred_timing
+from ckanext.dimred.utils.frames import get_frame_cache
+
+log = logging.getLogger(__name__)
+
+INLINE = "inline"
+PROCESS = "process"
+EXECUTION_BACKENDS = (INLINE, PROCESS)
+
+# the parent gives up on a task this long after the worker's own timeout,
+# for native code that never returns to the interpreter to see the alarm
+HARD_TIMEOUT_GRACE = 30
+# rows x features of the matrix fitted by each worker at start-up
+WARMUP_SHAPE = (64, 4)
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """An array left in a shared memory block by a worker process."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def publish(cls, arr: np.ndarray, name: str | None = None) -> SharedArray:
+        arr = np.ascontiguousarray(arr)
+        block = shared_memory.SharedMemory(name=name, create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+        # the receiving process unlinks the block; without this the
+        # worker's resource tracker would also try to on exit
+        resource_tracker.unregister(block._name, "shared_memory")  # noqa: SLF001
+        block.close()
+        return cls(block.name, arr.shape, arr.dtype.str)
+
+    def collect(self) -> np.ndarray:
+        """Copy the array out of the shared block and free the block."""
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+
+
+@dataclass(frozen=True)
+class ProcessTask:
+    """A call submitted to a ProcessBackend, the pool it runs in and the token naming its shared blocks."""
+
+    future: Future
+    executor: ProcessPoolExecutor
+    token: str
+
+
+class ProcessBackend:
+    """Run pipeline calls in a persistent pool of worker processes.
+
+    Workers are forked from the web or job process, so they share its
+    loaded config and plugins, and stay alive between calls: numba
+    compiles UMAP once per worker (ahead of the first task when UMAP is
+    allowed) and each worker keeps its own frame cache, started empty
+    with fresh locks. A crash or an
+    out-of-memory kill in native code ends the worker, not the caller.
+
+    Every task runs under ``ckanext.dimred.process_memory_limit_mb`` and
+    ``ckanext.dimred.process_timeout``. A task that ignores its timeout
+    (stuck in native code) gets the whole pool killed and recreated, which
+    fails the other tasks running in it with DimredWorkerError; the shared
+    memory blocks their workers already published are freed.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args: Any, timed: bool = True) -> ProcessTask:
+        """Start func(*args) in a worker; pass the task to result().
+
+        With ``timed``, the spans func records are added to the caller's
+        timings by result(); func must not start its own recordings then.
+        """
+        executor = self._pool()
+        token = uuid.uuid4().hex[:16]
+        future = executor.submit(
+            _run_task,
+            func,
+            args,
+            dimred_config.process_timeout(),
+            dimred_config.process_memory_limit_mb(),
+            timed=timed,
+            token=token,
+        )
+        return ProcessTask(future, executor, token)
+
+    def result(self, task: ProcessTask) -> Any:
+        """Wait for a task and return its result, mapping every failure to a DimredError."""
+        timeout = dimred_config.process_timeout()
+        try:
+            outcome = task.future.result(timeout=timeout + HARD_TIMEOUT_GRACE if timeout else None)
+        except FutureTimeoutError as err:
+            log.exception("Dimred worker did not stop after its %ss timeout, restarting the pool", timeout)
+            self._restart(task.executor)
+            _discard_blocks(task.token)
+            raise DimredTimeoutError from err
+        except BrokenProcessPool as err:
+            log.exception("Dimred worker process died, restarting the pool")
+            self._restart(task.executor)
+            _discard_blocks(task.token)
+            raise DimredWorkerError from err
+
+        if "invalid" in outcome:
+            raise tk.ValidationError(outcome["invalid"])
+        dimred_timing.add_spans(outcome["spans"])
+        return _unpack(outcome["result"])
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) in a worker and return its result."""
+        return self.result(self.submit(func, *args))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # ProcessPoolExecutor cannot cancel a running task; its processes
+        # are only reachable through a private attribute
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_process_backend() -> ProcessBackend:
+    return ProcessBackend(dimred_config.process_workers())
+
+
+@lru_cache(maxsize=1)
+def get_batch_backend() -> ProcessBackend:
+    """Return the pool computing dimred_get_dimred_previews batches when the process backend is off."""
+    return ProcessBackend(dimred_config.batch_workers())
+
+
+def _run_task(  # noqa: PLR0913
+    func: Callable[..., Any], args: tuple[Any, ...], timeout: int, memory_limit_mb: int, *, timed: bool, token: str
+) -> dict[str, Any]:
+    """Worker side of ProcessBackend.submit.
+
+    The timeout covers the whole call; a func handling several items must
+    not go on with the next ones after a DimredTimeoutError.
+    """
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        spans: list[dict[str, Any]] = []
+        with dimred_memory.address_space_limit(memory_limit_mb):
+            if timed:
+                with dimred_timing.recording() as recorder:
+                    result = func(*args)
+                spans = recorder.spans
+            else:
+                result = func(*args)
+        return {"result": _pack(result, _block_names(token)), "spans": spans}
+    except tk.ValidationError as err:
+        # CKAN's ValidationError does not survive pickling
+        return {"invalid": err.error_dict}
+    except DimredError:
+        raise
+    except MemoryError as err:
+        raise DimredMemoryLimitError from err
+    except Exception as err:
+        log.exception("Dimred worker task failed")
+        raise DimredWorkerTaskError(type(err).__name__, str(err)) from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _raise_timeout(signum: int, frame: Any) -> None:
+    raise DimredTimeoutError
+
+
+def _pack(result: Any, names: Iterator[str]) -> Any:
+    """Move the arrays of a result (or of a result tuple) to shared memory instead of pickling them."""
+    if isinstance(result, np.ndarray):
+        return SharedArray.publish(result, next(names))
+    if isinstance(result, tuple):
+        return tuple(_pack(item, names) for item in result)
+    return result
+
+
+def _unpack(result: Any) -> Any:
+    if isinstance(result, SharedArray):
+        return result.collect()
+    if isinstance(result, tuple):
+        return tuple(_unpack(item) for item in result)
+    return result
+
+
+def _block_names(token: str) -> Iterator[str]:
+    """Names of the shared blocks of a task, in the order its worker creates them."""
+    return (f"dimred-{token}-{index}" for index in itertools.count())
+
+
+def _discard_blocks(token: str) -> None:
+    """Free the shared blocks a worker published for a task whose result was abandoned."""
+    for name in _block_names(token):
+        try:
+            block = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+
+def _init_worker() -> None:
+    """Drop the parent's state that must not leak into a worker and compile UMAP's numba code."""
+    # the fork may have happened inside a recording of the parent, or
+    # while another of its threads held a frame cache lock
+    dimred_timing.detach()
+    get_frame_cache().reset()
+    if "umap" not in dimred_config.allowed_methods():
+        return
+    started = time.perf_counter()
+    try:
+        rng = np.random.default_rng(0)
+        get_projection_method("umap")(n_neighbors=5).fit_transform(rng.random(WARMUP_SHAPE))
+    except Exception:  # noqa: BLE001 - warming up is an optimization only
+        log.warning("Dimred worker warm-up failed", exc_info=True)
+        return
+    log.debug("Dimred worker warmed up in %.1fs", time.perf_counter() - started)
@@ -1,36 +1,263 @@
 from __future__ import annotations
 
-import csv
 import io
+import json
+from collections.abc import Callable, Iterator
 from typing import Any
 
 import numpy as np
 
+from ckanext.dimred.exception import DimredExportDependencyError, DimredExportFormatError
 
-def embedding_to_csv(embedding: list[list[float]] | np.ndarray, meta: dict[str, Any]) -> str:
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is an optional extra
+    pa = None
+    pq = None
+
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+CSV_CHUNK_ROWS = 10000
+
+# format -> (content type, file extension)
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    "csv": (CSV_CONTENT_TYPE, "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    "npy": ("application/octet-stream", "npy"),
+}
+ARROW_FORMATS = ("parquet", "arrow")
+ARROW_META_KEY = b"dimred"
+
+_LINE_TERMINATOR = "\r\n"
+_QUOTE_TRIGGERS = (",", '"', "\r", "\n")
+
+ChunkFormatter = Callable[[int, int], list[str]]
+
+
+def embedding_to_csv(
+    embedding: list[list[float]] | np.ndarray,
+    meta: dict[str, Any],
+    include_candidates: bool = False,
+) -> str:
     """Convert embedding + meta into CSV string."""
-    arr = np.array(embedding)
-    n_dims = arr.shape[1] if arr.ndim > 1 else 1
+    return "".join(iter_embedding_csv(embedding, meta, include_candidates=include_candidates))
+
+
+def iter_embedding_csv(
+    embedding: list[list[float]] | np.ndarray,
+    meta: dict[str, Any],
+    include_candidates: bool = False,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yield the CSV export of an embedding in chunks of rows.
+
+    Every chunk is formatted column by column (bulk ``tolist`` + ``str``) and
+    joined once, instead of pushing each row through ``csv.writer``. The
+    output matches ``csv.writer`` with the default dialect.
+
+    Args:
+        embedding: embedding matrix (rows x components).
+        meta: embedding metadata with ``prepare_info``.
+        include_candidates: also add every color candidate column.
+        chunk_rows: number of rows formatted per yielded chunk.
+    """
+    arr = _as_matrix(embedding)
+    n_rows, n_dims = arr.shape
+
+    headers = _coordinate_names(n_dims)
+    extra_columns = [
+        (name, _numeric_formatter(values) if kind == "numeric" else _text_formatter(values))
+        for name, kind, values in _extra_columns(meta, n_rows, include_candidates)
+    ]
+    headers.extend(name for name, _ in extra_columns)
+
+    yield ",".join(_quote(h) for h in headers) + _LINE_TERMINATOR
+
+    for start in range(0, n_rows, max(chunk_rows, 1)):
+        stop = min(start + chunk_rows, n_rows)
+        columns = [list(map(str, arr[start:stop, idx].tolist())) for idx in range(n_dims)]
+        columns.extend(formatter(start, stop) for _, formatter in extra_columns)
+        yield _LINE_TERMINATOR.join(map(",".join, zip(*columns, strict=True))) + _LINE_TERMINATOR
 
+
+def embedding_to_binary(
+    embedding: list[list[float]] | np.ndarray,
+    meta: dict[str, Any],
+    export_format: str,
+    include_candidates: bool = False,
+) -> bytes:
+    """Convert embedding + meta into a Parquet, Arrow IPC or NPY file.
+
+    Columns are built straight from numpy arrays. Parquet and Arrow files
+    carry the method, its params and prepare_info (without the per-row value
+    lists, which are already columns) as JSON under the ``dimred`` schema
+    metadata key. NPY has no room for metadata, so it only holds the
+    structured array.
+
+    Args:
+        embedding: embedding matrix (rows x components).
+        meta: embedding metadata with ``prepare_info``.
+        export_format: one of ``parquet``, ``arrow`` or ``npy``.
+        include_candidates: also add every color candidate column.
+    """
+    arr = _as_matrix(embedding)
+    columns = [(name, "numeric", arr[:, idx]) for idx, name in enumerate(_coordinate_names(arr.shape[1]))]
+    columns.extend(_extra_columns(meta, arr.shape[0], include_candidates))
+
+    if export_format == "npy":
+        return _columns_to_npy(columns)
+    if export_format in ARROW_FORMATS:
+        return _columns_to_arrow(columns, meta, export_format)
+    raise DimredExportFormatError
+
+
+def available_export_formats() -> list[str]:
+    """Return the export formats that can be produced with the installed packages."""
+    return [name for name in EXPORT_FORMATS if pa is not None or name not in ARROW_FORMATS]
+
+
+def export_file_metadata(meta: dict[str, Any]) -> dict[str, Any]:
+    """Return the embedding metadata stored inside binary export files."""
+    info = dict(meta.get("prepare_info") or {})
+    info.pop("color_values", None)
+    info["color_candidates"] = [
+        {key: value for key, value in candidate.items() if key not in ("values", "encoding")}
+        for candidate in info.get("color_candidates") or []
+    ]
+    return {
+        "method": meta.get("method"),
+        "method_params": meta.get("method_params"),
+        "prepare_info": info,
+    }
+
+
+def _as_matrix(embedding: list[list[float]] | np.ndarray) -> np.ndarray:
+    arr = np.asarray(embedding)
+    if arr.ndim == 1:
+        arr = arr.reshape(-1, 1)
+    return arr
+
+
+def _coordinate_names(n_dims: int) -> list[str]:
     labels = ["x", "y", "z"]
-    headers = [labels[i] if i < len(labels) else f"dim_{i + 1}" for i in range(n_dims)]
+    return [labels[i] if i < len(labels) else f"dim_{i + 1}" for i in range(n_dims)]
+
 
+def _extra_columns(meta: dict[str, Any], n_rows: int, include_candidates: bool) -> list[tuple[str, str, Any]]:
+    """Return (header, kind, values) triples for the non-coordinate columns.
+
+    The color_by column comes first; with include_candidates every other
+    color candidate follows. ``kind`` is ``numeric`` or ``categorical``.
+    """
     prepare_info = meta.get("prepare_info", {}) or {}
+    candidates = [c for c in prepare_info.get("color_candidates") or [] if c.get("name")]
+    kinds = {c["name"]: c.get("kind") for c in candidates}
+    columns: list[tuple[str, str, Any]] = []
+    seen: set[str] = set()
+
     color_by = prepare_info.get("color_by")
     color_values = prepare_info.get("color_values") or []
-    include_color = bool(color_by) and len(color_values) == len(arr)
+    if color_by and len(color_values) == n_rows:
+        columns.append((color_by, kinds.get(color_by) or "categorical", color_values))
+        seen.add(color_by)
+
+    if not include_candidates:
+        return columns
+
+    for candidate in candidates:
+        name = candidate["name"]
+        values = candidate.get("values") or []
+        if name in seen or len(values) != n_rows:
+            continue
+        columns.append((name, candidate.get("kind") or "categorical", values))
+        seen.add(name)
+
+    return columns
+
+
+def _numeric_array(values: Any) -> np.ndarray:
+    """Return values as float64, with None mapped to NaN."""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.array(values, dtype=np.float64)
 
-    if include_color:
-        headers.append(color_by)
 
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(headers)
+def _text_array(values: Any) -> np.ndarray:
+    """Return values as a fixed-width unicode array, with None mapped to ''."""
+    return np.array(["" if v is None else str(v) for v in values], dtype=np.str_)
 
-    for idx, coords in enumerate(arr):
-        row = list(coords[:n_dims])
-        if include_color:
-            row.append(color_values[idx])
-        writer.writerow(row)
 
+def _columns_to_npy(columns: list[tuple[str, str, Any]]) -> bytes:
+    arrays = [_numeric_array(values) if kind == "numeric" else _text_array(values) for _, kind, values in columns]
+    n_rows = len(arrays[0]) if arrays else 0
+    record = np.empty(n_rows, dtype=[(name, arr.dtype) for (name, _, _), arr in zip(columns, arrays, strict=True)])
+    for (name, _, _), arr in zip(columns, arrays, strict=True):
+        record[name] = arr
+
+    buf = io.BytesIO()
+    np.save(buf, record, allow_pickle=False)
     return buf.getvalue()
+
+
+def _columns_to_arrow(columns: list[tuple[str, str, Any]], meta: dict[str, Any], export_format: str) -> bytes:
+    if pa is None:
+        raise DimredExportDependencyError
+
+    arrays = []
+    for _, kind, values in columns:
+        if kind == "numeric":
+            # NaN marks a missing value for candidate columns; coordinates are never NaN
+            arrays.append(pa.array(_numeric_array(values), from_pandas=True))
+        else:
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+
+    file_meta = json.dumps(export_file_metadata(meta), default=str)
+    table = pa.table(arrays, names=[name for name, _, _ in columns], metadata={ARROW_META_KEY: file_meta})
+
+    sink = pa.BufferOutputStream()
+    if export_format == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _text_formatter(values: list[Any]) -> ChunkFormatter:
+    """Return a chunk formatter for a text column, quoting like csv.writer.
+
+    Quoting is decided once per distinct value, so repetitive categorical
+    columns cost a dict lookup per row.
+    """
+    cache: dict[Any, str] = {}
+
+    def lookup(value: Any) -> str:
+        try:
+            return cache[value]
+        except KeyError:
+            formatted = cache[value] = "" if value is None else _quote(str(value))
+            return formatted
+        except TypeError:
+            return _quote(str(value))
+
+    def format_chunk(start: int, stop: int) -> list[str]:
+        return list(map(lookup, values[start:stop]))
+
+    return format_chunk
+
+
+def _numeric_formatter(values: list[Any]) -> ChunkFormatter:
+    """Return a chunk formatter for a numeric column (None -> empty field)."""
+
+    def format_chunk(start: int, stop: int) -> list[str]:
+        return ["" if v is None else str(v) for v in values[start:stop]]
+
+    return format_chunk
+
+
+def _quote(value: str) -> str:
+    """Quote a field the way csv.writer does with QUOTE_MINIMAL."""
+    if any(ch in value for ch in _QUOTE_TRIGGERS):
+        return '"' + value.replace('"', '""') + '"'
+    return value
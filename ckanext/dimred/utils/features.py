@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+
+from ckanext.dimred.exception import DimredFeatureError, DimredNotFittedError
+from ckanext.dimred.utils import timing as dimred_timing
+
+log = logging.getLogger(__name__)
+
+# features whose variance is this small (relative to their mean) are
+# treated as constant and left unscaled, like StandardScaler does
+_CONSTANT_VAR_RTOL = 1e-12
+
+# rows spread over the column that are checked before a full cardinality scan
+CARDINALITY_SAMPLE_ROWS = 1000
+CARDINALITY_CHUNK_ROWS = 10000
+
+
+def bounded_nunique(series: pd.Series, limit: int) -> int | None:
+    """Return the number of distinct non-null values, or None if it exceeds limit.
+
+    Unlike ``Series.nunique`` it stops as soon as the limit is exceeded: a
+    sample spread over the column is checked first, then the column is
+    scanned in chunks. Free-text columns are rejected after hashing about
+    CARDINALITY_SAMPLE_ROWS values instead of the whole column.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # counts codes, the values are not hashed again
+        n_unique = series.nunique(dropna=True)
+        return n_unique if n_unique <= limit else None
+
+    n_rows = len(series)
+    if n_rows > CARDINALITY_SAMPLE_ROWS:
+        step = n_rows // CARDINALITY_SAMPLE_ROWS
+        if series.iloc[::step].nunique(dropna=True) > limit:
+            return None
+
+    seen: set[Any] = set()
+    for start in range(0, n_rows, CARDINALITY_CHUNK_ROWS):
+        seen.update(series.iloc[start : start + CARDINALITY_CHUNK_ROWS].dropna().unique())
+        if len(seen) > limit:
+            return None
+    return len(seen)
+
+
+def categorize_columns(df: pd.DataFrame, max_categories: int) -> pd.DataFrame:
+    """Convert text columns with at most max_categories values to the category dtype.
+
+    Later cardinality checks, factorizing and one-hot encoding of these
+    columns then work on small integer codes instead of hashing strings.
+    Converts in place and returns df.
+    """
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+            continue
+        if bounded_nunique(series, max_categories) is None:
+            continue
+        try:
+            df.isetitem(position, series.astype("category"))
+        except TypeError:  # unhashable or unorderable values
+            log.debug("Column %s cannot be converted to category", column)
+    return df
+
+
+def column_kinds(df: pd.DataFrame) -> dict[str, str]:
+    """Return the numpy dtype kind of every column, the kind of its categories for categoricals."""
+    kinds = {}
+    for column, dtype in df.dtypes.items():
+        base = dtype.categories.dtype if isinstance(dtype, pd.CategoricalDtype) else dtype
+        kinds[column] = base.kind
+    return kinds
+
+
+class FeaturePreprocessor:
+    """Turn a dataframe into the scaled feature matrix fed to a reducer.
+
+    Numeric columns are used as is, categorical columns are one-hot encoded,
+    missing values are filled with the column mean and the result is
+    standardized. This is what ``get_dummies`` + ``fillna`` +
+    ``StandardScaler`` would produce, but the matrix is written column by
+    column into a single preallocated float32 array: numeric columns are
+    converted one at a time and centered and scaled in place, one-hot
+    blocks are filled from factorized codes, and no intermediate float64
+    frame is ever built (at most one float64 column is alive at a time).
+
+    With ``sparse=True`` the features are scaled without centering (like
+    ``StandardScaler(with_mean=False)``) and returned as a CSR matrix, where
+    one-hot columns cost nothing for the rows outside their category. Only
+    for methods that accept sparse input.
+
+    Everything learned during fit() (categories, means, scales) is kept, so
+    transform() encodes new rows exactly like the rows the reducer was
+    fitted on.
+    """
+
+    dtype = np.float32
+
+    def __init__(self, numeric_cols: list[str], categorical_cols: list[str], sparse: bool = False) -> None:
+        self.numeric_cols = list(numeric_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.sparse = sparse
+        self.feature_names: list[str] = []
+        self.categories: dict[str, pd.Index] = {}
+        self.mean_: np.ndarray | None = None
+        self.var_: np.ndarray | None = None
+        self.scale_: np.ndarray | None = None
+        self.n_samples_seen_ = 0
+
+    @property
+    def input_columns(self) -> list[str]:
+        return self.numeric_cols + self.categorical_cols
+
+    def fit_transform(self, df: pd.DataFrame) -> np.ndarray | sp.csr_matrix:
+        """Learn the encoding from df and return its scaled feature matrix."""
+        n_rows = len(df)
+        with dimred_timing.span("encode"):
+            codes: list[np.ndarray] = []
+            self.categories = {}
+            for col in self.categorical_cols:
+                col_codes, levels = pd.factorize(df[col], sort=True)
+                codes.append(col_codes)
+                self.categories[col] = pd.Index(levels)
+
+            self.feature_names = self.numeric_cols + [
+                f"{col}_{level}" for col in self.categorical_cols for level in self.categories[col]
+            ]
+            if len(self.feature_names) < 2:  # noqa PLR2004
+                raise DimredFeatureError
+
+            mean = np.zeros(len(self.feature_names))
+            var = np.zeros(len(self.feature_names))
+            # columns are converted again by _assemble, so only one float64
+            # copy is alive at a time
+            for i, col in enumerate(self.numeric_cols):
+                values = _numeric_values(df[col])
+                present = ~np.isnan(values)
+                if present.any():
+                    mean[i] = values[present].mean()
+                    # imputed values sit on the mean and add nothing to the variance
+                    var[i] = np.square(values[present] - mean[i]).sum() / n_rows
+
+        offset = len(self.numeric_cols)
+        for col, col_codes in zip(self.categorical_cols, codes, strict=True):
+            width = len(self.categories[col])
+            share = np.bincount(col_codes[col_codes >= 0], minlength=width) / max(n_rows, 1)
+            mean[offset : offset + width] = share
+            var[offset : offset + width] = share * (1.0 - share)
+            offset += width
+
+        self.mean_ = mean
+        self.var_ = var
+        self.scale_ = np.where(var > _CONSTANT_VAR_RTOL * (1.0 + np.square(mean)), np.sqrt(var), 1.0)
+        self.n_samples_seen_ = n_rows
+        with dimred_timing.span("scale"):
+            return self._assemble(df, codes)
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray | sp.csr_matrix:
+        """Encode new rows with the fitted encoding and return their scaled matrix.
+
+        Missing input columns are treated as missing values; categories unseen
+        during fit get all-zero dummy columns.
+        """
+        if self.mean_ is None:
+            raise DimredNotFittedError
+
+        df = df.reindex(columns=self.input_columns)
+        codes = []
+        for col in self.categorical_cols:
+            # match by label text, like the dummy column names do
+            labels = pd.Index([str(level) for level in self.categories[col]])
+            values = df[col]
+            codes.append(labels.get_indexer(values.astype(str).where(values.notna())))
+        return self._assemble(df, codes)
+
+    def drift(self, x_new: np.ndarray | sp.csr_matrix) -> float:
+        """Return how far the fitted scaling would move if x_new were added.
+
+        x_new is the output of transform(), i.e. in units of the fitted
+        standard deviation, where the fitted rows have std 1 (and mean 0
+        unless sparse). The result is the largest shift of a feature's mean
+        or std once the new rows are merged in (0 means a refit would scale
+        identically).
+        """
+        if self.mean_ is None or self.var_ is None or self.scale_ is None or not x_new.shape[0]:
+            return 0.0
+
+        x_new = x_new.toarray() if sp.issparse(x_new) else x_new
+        x_new = np.asarray(x_new, dtype=float)
+        n_old = float(self.n_samples_seen_)
+        total = n_old + len(x_new)
+        old_mean = (self.mean_ - self._center()) / self.scale_
+        # 1 for regular features, 0 for constant ones (their scale_ is 1)
+        old_var = self.var_ / np.square(self.scale_)
+
+        mean = (n_old * old_mean + x_new.sum(axis=0)) / total
+        second_moment = (n_old * (old_var + np.square(old_mean)) + np.square(x_new).sum(axis=0)) / total
+        std = np.sqrt(np.maximum(second_moment - np.square(mean), 0.0))
+        return float(max(np.max(np.abs(mean - old_mean)), np.max(np.abs(std - np.sqrt(old_var)))))
+
+    def unknown_features(self, df: pd.DataFrame) -> list[str]:
+        """Return one-hot columns of df that did not exist at fit time (unseen categories)."""
+        if not self.categorical_cols:
+            return []
+        encoded = pd.get_dummies(
+            df.reindex(columns=self.categorical_cols), columns=self.categorical_cols, dummy_na=False
+        )
+        known = set(self.feature_names)
+        return [col for col in encoded.columns if col not in known]
+
+    def _center(self) -> np.ndarray:
+        """Return what is subtracted from each feature before scaling."""
+        return np.zeros_like(self.mean_) if self.sparse else self.mean_
+
+    def _assemble(self, df: pd.DataFrame, codes: list[np.ndarray]) -> np.ndarray | sp.csr_matrix:
+        """Write the scaled features of every column of df into one preallocated matrix."""
+        if self.sparse:
+            return self._assemble_sparse(df, codes)
+
+        mean, scale = self.mean_, self.scale_
+        out = np.empty((len(df), len(self.feature_names)), dtype=self.dtype)
+
+        for i, col in enumerate(self.numeric_cols):
+            values = _numeric_values(df[col])
+            column = out[:, i]
+            np.subtract(values, mean[i], out=column, casting="same_kind")
+            column /= scale[i]
+            # missing values are imputed with the mean, i.e. 0 once centered
+            column[np.isnan(values)] = 0.0
+
+        offset = len(self.numeric_cols)
+        for col, col_codes in zip(self.categorical_cols, codes, strict=True):
+            width = len(self.categories[col])
+            block = slice(offset, offset + width)
+            # every row gets the scaled "0" of each dummy, then its own
+            # category is overwritten with the scaled "1"
+            out[:, block] = -mean[block] / scale[block]
+            rows = np.flatnonzero(col_codes >= 0)
+            out[rows, offset + col_codes[rows]] = ((1.0 - mean[block]) / scale[block])[col_codes[rows]]
+            offset += width
+
+        return out
+
+    def _assemble_sparse(self, df: pd.DataFrame, codes: list[np.ndarray]) -> sp.csr_matrix:
+        """Build the uncentered scaled features as CSR.
+
+        Every row has one slot per numeric column and one per categorical
+        column (its category's dummy); slots of missing categories are
+        dropped. Filling (rows x slots) value and column index arrays gives
+        the CSR data directly, in row order with sorted column indices.
+        """
+        mean, scale = self.mean_, self.scale_
+        n_rows = len(df)
+        n_numeric = len(self.numeric_cols)
+        n_slots = n_numeric + len(codes)
+        data = np.empty((n_rows, n_slots), dtype=self.dtype)
+        indices = np.empty((n_rows, n_slots), dtype=np.int32)
+        present = np.ones((n_rows, n_slots), dtype=bool)
+
+        for i, col in enumerate(self.numeric_cols):
+            values = _numeric_values(df[col])
+            column = data[:, i]
+            np.divide(values, scale[i], out=column, casting="same_kind")
+            column[np.isnan(values)] = mean[i] / scale[i]
+            indices[:, i] = i
+
+        offset = n_numeric
+        for slot, (col, col_codes) in enumerate(zip(self.categorical_cols, codes, strict=True), start=n_numeric):
+            width = len(self.categories[col])
+            present[:, slot] = col_codes >= 0
+            if width:
+                safe_codes = np.maximum(col_codes, 0)
+                indices[:, slot] = offset + safe_codes
+                data[:, slot] = (1.0 / scale[offset : offset + width])[safe_codes]
+            offset += width
+
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        return sp.csr_matrix((data[present], indices[present], indptr), shape=(n_rows, len(self.feature_names)))
+
+
+def _numeric_values(series: pd.Series) -> np.ndarray:
+    """Return a column as float64 with NaN for missing or non-numeric values."""
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.utils import memory as dimred_memory
+from ckanext.dimred.utils.metrics import get_metrics
+
+log = logging.getLogger(__name__)
+
+
+class FrameCache:
+    """Parsed resource frames kept in the memory of one worker process.
+
+    Several views of a resource (and back-to-back or concurrent runs over
+    it, e.g. a cache warm-up or a batch) then read and parse the file
+    once. Entries are keyed by resource id and a cheap signature of the
+    file (see ``BaseAdapter.source_signature``), expire after
+    ``ckanext.dimred.frame_cache_ttl`` seconds and are evicted least
+    recently used first to stay under ``ckanext.dimred.frame_cache_mb``.
+
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self) -> None:
+        # key -> (value, size in bytes, time stored)
+        self._entries: OrderedDict[tuple[str, str], tuple[Any, int, float]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._loading: dict[tuple[str, str], threading.Lock] = {}
+
+    @property
+    def max_bytes(self) -> int:
+        return dimred_config.frame_cache_mb() * dimred_memory.MB
+
+    @property
+    def ttl(self) -> int:
+        return dimred_config.frame_cache_ttl()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def size(self) -> int:
+        """Return the bytes held by the cached values."""
+        return self._size
+
+    def get(self, resource_id: str, signature: str) -> Any | None:
+        with self._lock:
+            return self._get((resource_id, signature))
+
+    def get_or_load(self, resource_id: str, signature: str, load: Callable[[], tuple[Any, int]]) -> Any:
+        """Return the cached value, or call load() for a (value, size in bytes) pair and cache it.
+
+        Concurrent callers asking for the same entry wait for a single load.
+        """
+        if not self.enabled:
+            return load()[0]
+
+        key = (resource_id, signature)
+        with self._lock:
+            found = self._get(key)
+            if found is not None:
+                return self._count(found)
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                found = self._get(key)
+            if found is not None:
+                return self._count(found)
+            try:
+                value, size = load()
+                # stored before the key lock is dropped, so a caller arriving
+                # in between finds it instead of loading it again
+                self.put(resource_id, signature, value, size)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return self._count(None, value)
+
+    def put(self, resource_id: str, signature: str, value: Any, size: int) -> None:
+        """Store a value, evicting the least recently used ones; values larger than the cache are skipped."""
+        max_bytes = self.max_bytes
+        if size > max_bytes:
+            log.debug("Dimred frame of %s (%d bytes) is too large to cache", resource_id, size)
+            return
+        with self._lock:
+            self._pop((resource_id, signature))
+            while self._entries and self._size + size > max_bytes:
+                self._pop(next(iter(self._entries)))
+            self._entries[(resource_id, signature)] = (value, size, time.monotonic())
+            self._size += size
+
+    def discard(self, resource_id: str) -> None:
+        """Drop every cached frame of a resource."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == resource_id]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def reset(self) -> None:
+        """Empty the cache and replace its locks.
+
+        For a forked process: another thread of the parent may have held
+        the cache lock or a load lock at the fork, and would never release
+        the child's copy.
+        """
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def _get(self, key: tuple[str, str]) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, stored = entry
+        if time.monotonic() - stored > self.ttl:
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _pop(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _count(self, found: Any | None, loaded: Any | None = None) -> Any:
+        get_metrics().inc("dimred_cache_requests_total", tier="frame", result="hit" if found is not None else "miss")
+        return found if found is not None else loaded
+
+
+@lru_cache(maxsize=1)
+def get_frame_cache() -> FrameCache:
+    return FrameCache()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import sys
+from collections.abc import Iterator
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# float32 copies of the encoded rows x features matrix alive at the peak:
+# the assembled feature matrix (see FeaturePreprocessor), the reducer's
+# working copy (centering / SVD workspace / neighbor search input) and
+# one spare for method internals
+MATRIX_COPIES = 3
+FLOAT_BYTES = 4
+# column index stored next to each value of a sparse (CSR) matrix
+INDEX_BYTES = 4
+# below this, a memory-limited sample is refused rather than used
+MIN_SAMPLE_ROWS = 100
+
+
+def encoded_width(df: pd.DataFrame, numeric_cols: list[str], categorical_cols: list[str]) -> int:
+    """Return the number of features after one-hot encoding of categorical_cols."""
+    return len(numeric_cols) + sum(int(df[col].nunique(dropna=True)) for col in categorical_cols)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Return the memory held by df, including the strings of object columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def estimate_peak_bytes(
+    df: pd.DataFrame,
+    numeric_cols: list[str],
+    categorical_cols: list[str],
+    sparse: bool = False,
+) -> tuple[int, int]:
+    """Estimate the peak memory of encoding + reducing df.
+
+    Returns (base bytes, bytes per row): the loaded frame stays in memory
+    during the whole pipeline, on top of which every row costs its encoded
+    width times the float copies made along the way. A sparse matrix only
+    stores one value (and its index) per numeric and categorical column.
+    """
+    base = int(df.memory_usage(index=True, deep=False).sum())
+    if sparse:
+        per_row = (len(numeric_cols) + len(categorical_cols)) * (FLOAT_BYTES + INDEX_BYTES) * MATRIX_COPIES
+    else:
+        per_row = encoded_width(df, numeric_cols, categorical_cols) * FLOAT_BYTES * MATRIX_COPIES
+    return base, per_row
+
+
+def peak_rss_bytes() -> int | None:
+    """Return the peak resident set size of the current process, if known.
+
+    This is the high-water mark of the whole process lifetime: in a
+    long-lived worker it comes from whatever run used the most memory, so
+    compare it with a baseline (see peak_growth_mb) to measure one run.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def peak_growth_mb(baseline: int | None) -> float | None:
+    """Return how much the process peak RSS rose above a baseline taken with peak_rss_bytes(), in MB.
+
+    It is 0 when the work since the baseline stayed below an earlier peak
+    of the process, so it is a lower bound of that work's own peak.
+    """
+    peak = peak_rss_bytes()
+    if baseline is None or peak is None:
+        return None
+    return round((peak - baseline) / MB, 1)
+
+
+@contextlib.contextmanager
+def address_space_limit(limit_mb: int) -> Iterator[None]:
+    """Cap the address space of the current process while the block runs.
+
+    Allocations above the cap raise MemoryError instead of getting the
+    process killed by the OOM killer. The previous limit is restored on
+    exit. Does nothing if limit_mb is 0 or the platform has no rlimits.
+    """
+    if not limit_mb or resource is None:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = limit_mb * MB
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError) as err:
+        log.warning("Cannot set dimred memory limit: %s", err)
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+import math
+from functools import lru_cache
+
+from redis import exceptions as redis_exc
+
+from ckan.lib.redis import connect_to_redis
+
+from ckanext.dimred import config as dimred_config
+
+log = logging.getLogger(__name__)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> help text
+COUNTERS: dict[str, str] = {
+    "dimred_cache_requests_total": "Cache lookups by tier (view, content, image, frame) and result (hit, miss).",
+    "dimred_download_bytes_total": "Bytes of resource content fetched from remote URLs.",
+    "dimred_exports_total": "Embedding exports by format.",
+    "dimred_failures_total": "Failed embedding computations by error class.",
+}
+# name -> (help text, bucket upper bounds)
+HISTOGRAMS: dict[str, tuple[str, tuple[float, ...]]] = {
+    "dimred_pipeline_duration_seconds": (
+        "Time to compute an embedding by method and rows used.",
+        (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+    ),
+    "dimred_payload_bytes": (
+        "Size of cached results by kind (preview JSON, PNG image).",
+        (10_000, 100_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000, 100_000_000),
+    ),
+}
+# upper bounds of the "rows" label of pipeline durations
+ROW_BUCKETS = ((1_000, "1k"), (10_000, "10k"), (100_000, "100k"), (1_000_000, "1M"))
+
+_FIELD_SEP = "\t"
+
+
+def row_bucket(n_rows: int) -> str:
+    """Return the coarse row-count label of a pipeline run (e.g. ``10k`` for up to 10 000 rows)."""
+    for bound, label in ROW_BUCKETS:
+        if n_rows <= bound:
+            return label
+    return "more"
+
+
+def _label_string(labels: dict[str, str]) -> str:
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in sorted(labels.items())
+    )
+    return ",".join(f'{key}="{value}"' for key, value in escaped)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class DimredMetrics:
+    """Counters and histograms kept in Redis.
+
+    Every web and job worker process adds to the same Redis hashes, so the
+    exposition is already aggregated over all processes (no per-process
+    files as with prometheus_client's multiprocess mode). Redis failures
+    are logged and otherwise ignored: metrics never break a request.
+    """
+
+    prefix = "ckanext:dimred:metrics"
+
+    def __init__(self) -> None:
+        try:
+            self.client = connect_to_redis()
+        except (redis_exc.RedisError, OSError) as err:
+            log.warning("Dimred metrics disabled: cannot connect to redis (%s)", err)
+            self.client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.client) and dimred_config.metrics_enabled()
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add amount to a counter."""
+        if not self.enabled or name not in COUNTERS:
+            return
+        try:
+            self.client.hincrbyfloat(self._key(name), _label_string(labels), amount)
+        except redis_exc.RedisError as err:
+            log.debug("Dimred metrics update failed: %s", err)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record one observation of a histogram."""
+        if not self.enabled or name not in HISTOGRAMS:
+            return
+        _, bounds = HISTOGRAMS[name]
+        bound = next((b for b in bounds if value <= b), math.inf)
+        series = _label_string(labels)
+        try:
+            # buckets are stored per bound and made cumulative when rendered
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hincrby(self._key(name), f"{series}{_FIELD_SEP}{_format_value(bound)}", 1)
+            pipe.hincrbyfloat(self._key(name), f"{series}{_FIELD_SEP}sum", value)
+            pipe.hincrby(self._key(name), f"{series}{_FIELD_SEP}count", 1)
+            pipe.execute()
+        except redis_exc.RedisError as err:
+            log.debug("Dimred metrics update failed: %s", err)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for name, help_text in COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for series, raw in sorted(self._read(name).items()):
+                value = _format_value(float(raw))
+                lines.append(f"{name}{{{series}}} {value}" if series else f"{name} {value}")
+        for name, (help_text, bounds) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            lines += self._render_histogram(name, bounds)
+        return "\n".join(lines) + "\n"
+
+    def _read(self, name: str) -> dict[str, str]:
+        if not self.client:
+            return {}
+        try:
+            raw = self.client.hgetall(self._key(name))
+        except redis_exc.RedisError as err:
+            log.warning("Dimred metrics read failed: %s", err)
+            return {}
+        return {field.decode("utf-8"): value.decode("utf-8") for field, value in raw.items()}
+
+    def _render_histogram(self, name: str, bounds: tuple[float, ...]) -> list[str]:
+        per_series: dict[str, dict[str, str]] = {}
+        for field, value in self._read(name).items():
+            series, _, suffix = field.rpartition(_FIELD_SEP)
+            per_series.setdefault(series, {})[suffix] = value
+
+        lines = []
+        for series, values in sorted(per_series.items()):
+            prefix = f"{series}," if series else ""
+            cumulative = 0
+            for bound in (*bounds, math.inf):
+                cumulative += int(values.get(_format_value(bound), 0))
+                lines.append(f'{name}_bucket{{{prefix}le="{_format_value(bound)}"}} {cumulative}')
+            labels = f"{{{series}}}" if series else ""
+            lines.append(f"{name}_sum{labels} {_format_value(float(values.get('sum', 0)))}")
+            lines.append(f"{name}_count{labels} {int(values.get('count', 0))}")
+        return lines
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> DimredMetrics:
+    return DimredMetrics()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ckanext.dimred import config as dimred_config
+from ckanext.dimred.methods import BaseProjectionMethod
+from ckanext.dimred.utils.features import FeaturePreprocessor
+
+log = logging.getLogger(__name__)
+
+
+class FittedModel:
+    """Fitted preprocessing + reducer for one resource and settings signature."""
+
+    #: bumped whenever the pickled layout changes; older files are ignored
+    format_version = 2
+
+    def __init__(
+        self,
+        method: str,
+        preprocessor: FeaturePreprocessor,
+        reducer: BaseProjectionMethod,
+        prepare_info: dict[str, Any] | None = None,
+        fingerprint: dict[str, Any] | None = None,
+    ) -> None:
+        self.method = method
+        self.preprocessor = preprocessor
+        self.reducer = reducer
+        self.prepare_info = prepare_info or {}
+        # content fingerprint of the file the model was fitted on (see
+        # BaseAdapter.fingerprint), used to detect append-only updates
+        self.fingerprint = fingerprint
+        self.created = time.time()
+        self.version = self.format_version
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Project new rows into the fitted embedding without refitting."""
+        return self.reducer.transform(self.preprocessor.transform(df))
+
+
+class ModelStore:
+    """Local joblib store of fitted models.
+
+    Models are saved as ``<root>/<resource_id>/<settings_sig>.joblib``. The
+    files are only ever written by this extension, as loading them unpickles
+    arbitrary objects.
+    """
+
+    suffix = ".joblib"
+
+    def __init__(self, root: str | None = None) -> None:
+        self.root = root or dimred_config.model_store_path()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root) and dimred_config.model_store_enabled()
+
+    def _resource_dir(self, resource_id: str) -> str:
+        return os.path.join(self.root, resource_id)
+
+    def _path(self, resource_id: str, settings_sig: str) -> str:
+        return os.path.join(self._resource_dir(resource_id), settings_sig + self.suffix)
+
+    def load(self, resource_id: str, settings_sig: str) -> FittedModel | None:
+        if not self.enabled:
+            return None
+        path = self._path(resource_id, settings_sig)
+        if not os.path.exists(path):
+            return None
+        try:
+            model = joblib.load(path)
+        except Exception:  # noqa: BLE001 - a broken or outdated model is just a miss
+            log.warning("Dimred model %s cannot be loaded, ignoring it", path, exc_info=True)
+            return None
+        if not isinstance(model, FittedModel) or getattr(model, "version", 1) != FittedModel.format_version:
+            return None
+        return model
+
+    def save(self, resource_id: str, settings_sig: str, model: FittedModel) -> None:
+        """Persist a fitted model, replacing the previous one atomically."""
+        if not self.enabled:
+            return
+        directory = self._resource_dir(resource_id)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError as err:
+            log.warning("Dimred model save failed: %s", err)
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as dest:
+                joblib.dump(model, dest)
+            os.replace(tmp_path, self._path(resource_id, settings_sig))
+        except OSError as err:
+            log.warning("Dimred model save failed: %s", err)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, resource_id: str, keep: set[str]) -> None:
+        """Delete the models of a resource whose settings signature is not in keep."""
+        if not self.enabled:
+            return
+        try:
+            names = os.listdir(self._resource_dir(resource_id))
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(self.suffix) and name[: -len(self.suffix)] not in keep:
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self._resource_dir(resource_id), name))
+
+    def delete_for_resource(self, resource_id: str) -> None:
+        if not self.enabled:
+            return
+        shutil.rmtree(self._resource_dir(resource_id), ignore_errors=True)
+
+
+@lru_cache(maxsize=1)
+def get_model_store() -> ModelStore:
+    return ModelStore()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import cProfile
+import html
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from redis import exceptions as redis_exc
+
+from ckan.lib.redis import connect_to_redis
+
+from ckanext.dimred.exception import (
+    DimredProfileDependencyError,
+    DimredProfileRateLimitError,
+    DimredRateLimitUnavailableError,
+)
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pragma: no cover - pyinstrument is an optional extra
+    PyinstrumentProfiler = None
+
+log = logging.getLogger(__name__)
+
+# format -> (content type, file extension)
+PROFILE_FORMATS: dict[str, tuple[str, str]] = {
+    "speedscope": ("application/json", "speedscope.json"),
+    "html": ("text/html; charset=utf-8", "html"),
+    "text": ("text/plain; charset=utf-8", "txt"),
+}
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# seconds between two stack samples of the profiled thread
+SAMPLE_INTERVAL = 0.005
+RATE_LIMIT_KEY = "ckanext:dimred:profile:rate"
+TEXT_REPORT_ROWS = 40
+
+
+def acquire_profile_slot(interval: int) -> None:
+    """Allow one profile per interval seconds over all processes, or raise DimredRateLimitError.
+
+    The slot is a Redis key set only if missing and expiring after
+    interval, so it is released even if the profiled process dies.
+    """
+    try:
+        acquired = connect_to_redis().set(RATE_LIMIT_KEY, "1", nx=True, ex=max(interval, 1))
+    except (redis_exc.RedisError, OSError) as err:
+        # without Redis there is no way to rate-limit across processes
+        raise DimredRateLimitUnavailableError from err
+    if not acquired:
+        raise DimredProfileRateLimitError(interval)
+
+
+def profile_call(
+    func: Callable[[], Any],
+    profile_format: str = "speedscope",
+    name: str = "dimred",
+    top_allocations: int = 20,
+) -> dict[str, Any]:
+    """Run func under a profiler and tracemalloc and return the report.
+
+    - ``speedscope``: a sampling profile of the calling thread, in the
+      speedscope file format (https://www.speedscope.app);
+    - ``html``: pyinstrument's interactive HTML report (needs pyinstrument);
+    - ``text``: the functions with the highest cumulative time, measured
+      by cProfile.
+
+    Returns ``content`` (str), ``allocations`` (the top_allocations source
+    lines holding most memory allocated during the call), ``peak_mb``
+    (traced peak) and ``elapsed_ms``. Exceptions raised by func propagate.
+    """
+    if profile_format == "html" and PyinstrumentProfiler is None:
+        raise DimredProfileDependencyError
+
+    tracing = top_allocations > 0 and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        if profile_format == "html":
+            content = _run_pyinstrument(func)
+        elif profile_format == "text":
+            content = _run_cprofile(func)
+        else:
+            content = json.dumps(_run_sampler(func, name))
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        allocations, peak = _allocations(top_allocations) if tracing else ([], 0)
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    return {
+        "content": content,
+        "allocations": allocations,
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "elapsed_ms": elapsed_ms,
+    }
+
+
+def allocations_text(allocations: list[dict[str, Any]]) -> str:
+    """Return the top allocations as a plain-text table."""
+    lines = ["Top allocations during the run (tracemalloc):"]
+    lines += [f"{a['size_kb']:>12.1f} KiB {a['count']:>9} blocks  {a['file']}:{a['line']}" for a in allocations]
+    return "\n".join(lines)
+
+
+def _allocations(limit: int) -> tuple[list[dict[str, Any]], int]:
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+    )
+    allocations = [
+        {
+            "file": stat.traceback[0].filename,
+            "line": stat.traceback[0].lineno,
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+    return allocations, peak
+
+
+def _run_pyinstrument(func: Callable[[], Any]) -> str:
+    profiler = PyinstrumentProfiler(interval=SAMPLE_INTERVAL)
+    profiler.start()
+    try:
+        func()
+    finally:
+        profiler.stop()
+    return profiler.output_html()
+
+
+def _run_cprofile(func: Callable[[], Any]) -> str:
+    profiler = cProfile.Profile()
+    profiler.runcall(func)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TEXT_REPORT_ROWS)
+    return out.getvalue()
+
+
+def _run_sampler(func: Callable[[], Any], name: str) -> dict[str, Any]:
+    """Sample the stack of the calling thread every SAMPLE_INTERVAL while func runs."""
+    target = threading.get_ident()
+    done = threading.Event()
+    frames: dict[tuple[str, str, int], int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+
+    def sample() -> None:
+        last = time.perf_counter()
+        while not done.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(target)  # noqa: SLF001
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, frame.f_lineno)
+                stack.append(frames.setdefault(key, len(frames)))
+                frame = frame.f_back
+            if stack:
+                # speedscope stacks run from the root to the leaf
+                samples.append(stack[::-1])
+                weights.append(round((now - last) * 1000, 3))
+            last = now
+
+    sampler = threading.Thread(target=sample, name="dimred-profile-sampler", daemon=True)
+    sampler.start()
+    try:
+        func()
+    finally:
+        done.set()
+        sampler.join()
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "ckanext-dimred",
+        "shared": {"frames": [{"name": fn, "file": file, "line": line} for fn, file, line in frames]},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def with_allocations(report: dict[str, Any], profile_format: str) -> str:
+    """Return the profile content with the top allocations added in the format's own way."""
+    allocations = report["allocations"]
+    if not allocations:
+        return report["content"]
+    if profile_format == "speedscope":
+        # speedscope ignores unknown top-level keys
+        data = json.loads(report["content"])
+        data["dimred"] = {"allocations": allocations, "peak_mb": report["peak_mb"]}
+        return json.dumps(data)
+    if profile_format == "html":
+        table = f"<pre>{html.escape(allocations_text(allocations))}</pre>"
+        return report["content"].replace("</body>", f"{table}</body>", 1)
+    return f"{report['content']}\n{allocations_text(allocations)}\n"
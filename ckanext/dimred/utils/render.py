@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import queue
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ckanext.dimred.exception import DimredEmbeddingError
+
+log = logging.getLogger(__name__)
+
+PNG_CONTENT_TYPE = "image/png"
+
+RENDER_OPTIONS: dict[str, Any] = {
+    "figsize": (5, 4),
+    "dpi": 100,
+    "marker_size": 10,
+    "margins_2d": {"left": 0.17, "right": 0.93, "bottom": 0.12, "top": 0.95},
+    "margins_3d": {"left": 0.0, "right": 1.0, "bottom": 0.02, "top": 1.0},
+}
+
+FIGURE_POOL_SIZE = 4
+
+PALETTE = [
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#d62728",
+    "#9467bd",
+    "#8c564b",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+]
+
+
+def render_signature(options: dict[str, Any] | None = None) -> str:
+    """Return a short, stable signature for PNG render options."""
+    payload = json.dumps(options or RENDER_OPTIONS, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class _FigureTemplate:
+    """Pre-styled figure with its Agg canvas and axes, reusable across renders."""
+
+    def __init__(self, is_3d: bool) -> None:
+        self.is_3d = is_3d
+        self.figure = Figure(figsize=RENDER_OPTIONS["figsize"], dpi=RENDER_OPTIONS["dpi"])
+        self.canvas = FigureCanvasAgg(self.figure)
+        if is_3d:
+            self.axes = self.figure.add_subplot(111, projection="3d")
+            self.figure.subplots_adjust(**RENDER_OPTIONS["margins_3d"])
+            _style_3d_axes(self.axes)
+        else:
+            self.axes = self.figure.add_subplot(111)
+            self.figure.subplots_adjust(**RENDER_OPTIONS["margins_2d"])
+            _style_2d_axes(self.axes)
+
+    def render(
+        self,
+        coords: tuple[np.ndarray, ...],
+        colors: np.ndarray | str,
+    ) -> bytes:
+        """Draw the points, encode the PNG and remove the points again."""
+        ax = self.axes
+        if self.is_3d:
+            artist = ax.scatter(*coords, s=RENDER_OPTIONS["marker_size"], c=colors, depthshade=True)
+            setters = ((ax.set_xlim, ax.set_xticks), (ax.set_ylim, ax.set_yticks), (ax.set_zlim, ax.set_zticks))
+        else:
+            artist = ax.scatter(*coords, s=RENDER_OPTIONS["marker_size"], c=colors)
+            setters = ((ax.set_xlim, ax.set_xticks), (ax.set_ylim, ax.set_yticks))
+
+        try:
+            for values, (set_lim, set_ticks) in zip(coords, setters, strict=False):
+                ticks, lim = _axis_ticks(values)
+                set_lim(*lim)
+                set_ticks(ticks)
+
+            buf = io.BytesIO()
+            self.canvas.print_png(buf)
+            return buf.getvalue()
+        finally:
+            artist.remove()
+
+
+class _FigurePool:
+    """Bounded pool of figure templates for one plot kind (2D or 3D).
+
+    A template is owned by exactly one render between acquire() and release(),
+    so threads never share matplotlib state. The pool is a SimpleQueue, whose
+    put/get are atomic, so no lock is taken on the render path; when the pool
+    is empty a new template is built instead of waiting.
+    """
+
+    def __init__(self, factory: Callable[[], _FigureTemplate], max_size: int) -> None:
+        self._factory = factory
+        self._max_size = max_size
+        self._idle: queue.SimpleQueue[_FigureTemplate] = queue.SimpleQueue()
+
+    def acquire(self) -> _FigureTemplate:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._factory()
+
+    def release(self, template: _FigureTemplate) -> None:
+        # qsize() is approximate under concurrency; the pool may briefly
+        # exceed max_size by the number of concurrent renders, which is fine.
+        if self._idle.qsize() < self._max_size:
+            self._idle.put(template)
+
+
+_POOLS = {
+    False: _FigurePool(lambda: _FigureTemplate(is_3d=False), FIGURE_POOL_SIZE),
+    True: _FigurePool(lambda: _FigureTemplate(is_3d=True), FIGURE_POOL_SIZE),
+}
+
+
+def embedding_to_png(embedding: np.ndarray, meta: dict[str, Any]) -> bytes:
+    """Render a 2D/3D scatter plot for the embedding and return PNG bytes.
+
+    Rendering uses pooled, pre-styled figures drawn directly on the Agg
+    canvas, so pyplot's global figure manager is never touched.
+    """
+    if embedding.ndim != 2 or embedding.shape[1] < 2:  # noqa PLR2004
+        raise DimredEmbeddingError
+
+    is_3d = embedding.shape[1] >= 3  # noqa PLR2004
+    n_dims = 3 if is_3d else 2
+    coords = tuple(embedding[:, idx] for idx in range(n_dims))
+
+    info = meta.get("prepare_info", {}) or {}
+    colors = _compute_colors(info.get("color_by"), info.get("color_values") or [], embedding.shape[0])
+
+    pool = _POOLS[is_3d]
+    template = pool.acquire()
+    try:
+        content = template.render(coords, colors)
+    except Exception:
+        # do not return a template in an unknown state to the pool
+        log.exception("Dimred PNG render failed")
+        raise
+    pool.release(template)
+    return content
+
+
+def embedding_to_png_data_url(embedding: np.ndarray, meta: dict[str, Any]) -> str:
+    """Render a 2D/3D scatter plot for the embedding and return a data URL."""
+    b64 = base64.b64encode(embedding_to_png(embedding, meta)).decode("ascii")
+    return "data:image/png;base64," + b64
+
+
+def _compute_colors(color_by: str | None, color_values: list[Any], n_points: int) -> np.ndarray | str:
+    """Return color mapping for points.
+
+    Labels are assigned palette colors in order of first appearance.
+    """
+    if color_by and len(color_values) == n_points:
+        labels = np.asarray(["" if v is None else str(v) for v in color_values])
+        _, first_idx, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first_idx))
+        palette = np.asarray(PALETTE)
+        return palette[order[inverse.ravel()] % len(PALETTE)]
+    return "#333333"
+
+
+def _axis_ticks(values: np.ndarray, n: int = 5) -> tuple[list[float], tuple[float, float]]:
+    """Return nice tick positions and limits for an array."""
+    vmin = float(np.nanmin(values))
+    vmax = float(np.nanmax(values))
+    if np.isclose(vmin, vmax):
+        vmin -= 0.5
+        vmax += 0.5
+    ticks = np.linspace(vmin, vmax, n).tolist()
+    return ticks, (vmin, vmax)
+
+
+def _style_3d_axes(ax: Any) -> None:
+    """Apply the static 3D styling once per pooled figure."""
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_zlabel("z")
+    ax.tick_params(labelsize=8, colors="#444444")
+    for axis in (ax.xaxis, ax.yaxis, ax.zaxis):
+        axis.set_pane_color((1, 1, 1, 0))
+        axis._axinfo["grid"]["color"] = "#dddddd"  # type: ignore[attr-defined]
+        axis._axinfo["grid"]["linewidth"] = 0.5  # type: ignore[attr-defined]
+    ax.grid(True)
+
+
+def _style_2d_axes(ax: Any) -> None:
+    """Apply the static 2D styling once per pooled figure."""
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.tick_params(labelsize=8, colors="#444444")
+    ax.grid(True, color="#dddddd", linewidth=0.5)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
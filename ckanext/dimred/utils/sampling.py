@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from ckanext.dimred.utils.features import bounded_nunique
+
+log = logging.getLogger(__name__)
+
+UNIFORM = "uniform"
+STRATIFIED = "stratified"
+DENSITY = "density"
+SAMPLING_STRATEGIES = (UNIFORM, STRATIFIED, DENSITY)
+
+RANDOM_STATE = 42
+
+# numeric stratify columns with more distinct values are cut into this many quantile bins
+STRATIFY_BINS = 10
+# density sampling fits its clusters on a pilot sample of this many rows
+DENSITY_PILOT_ROWS = 5000
+DENSITY_CLUSTERS = 32
+DENSITY_MIN_CLUSTER_ROWS = 10
+
+
+def sample_rows(  # noqa: PLR0913
+    df: pd.DataFrame,
+    n_rows: int,
+    *,
+    strategy: str = UNIFORM,
+    stratify_by: str = "",
+    numeric_cols: list[str] | None = None,
+    class_cap: int = 0,
+) -> tuple[pd.DataFrame, str]:
+    """Pick at most n_rows rows of df and return them with the strategy actually used.
+
+    - ``uniform``: random rows, the classic ``df.sample``;
+    - ``stratified``: rows are balanced over the values of stratify_by;
+    - ``density``: rows are balanced over coarse k-means clusters of the
+      numeric columns, fitted on a small pilot sample.
+
+    Balanced means every class gets the same quota and classes smaller than
+    it are kept whole, so rare classes and sparse regions survive a low
+    n_rows while large ones are thinned. class_cap additionally limits the
+    rows of each class. Strategies that cannot be applied (no stratify
+    column, no numeric columns) fall back to uniform. Sampled rows keep
+    their original order and get a fresh index.
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        log.warning("Unknown dimred sampling strategy %r, using uniform sampling", strategy)
+        strategy = UNIFORM
+
+    strata = None
+    if strategy == STRATIFIED and stratify_by in df.columns:
+        strata = _column_strata(df[stratify_by])
+    elif strategy == DENSITY and numeric_cols:
+        strata = _density_strata(df, numeric_cols)
+    if strata is None:
+        strategy = UNIFORM
+
+    if strategy == UNIFORM:
+        if len(df) > n_rows:
+            df = df.sample(n_rows, random_state=RANDOM_STATE).reset_index(drop=True)
+        return df, strategy
+
+    positions = _balanced_positions(strata, n_rows, class_cap)
+    if len(positions) == len(df):
+        return df, strategy
+    return df.iloc[positions].reset_index(drop=True), strategy
+
+
+def balanced_quotas(sizes: np.ndarray, n_rows: int, class_cap: int = 0) -> np.ndarray:
+    """Split n_rows over classes of the given sizes as evenly as they allow.
+
+    Classes are filled from the smallest up: each takes an equal share of
+    what is left, or all of its rows if it has fewer, so the quotas sum to
+    ``min(n_rows, sizes.sum())`` (after capping every class at class_cap).
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if class_cap:
+        sizes = np.minimum(sizes, class_cap)
+    if sizes.sum() <= n_rows:
+        return sizes
+
+    quotas = np.zeros_like(sizes)
+    remaining = n_rows
+    order = np.argsort(sizes, kind="stable")
+    for i, stratum in enumerate(order):
+        share = -(-remaining // (len(order) - i))  # ceil, the last class takes the rest
+        quotas[stratum] = min(sizes[stratum], share)
+        remaining -= quotas[stratum]
+    return quotas
+
+
+def _balanced_positions(strata: np.ndarray, n_rows: int, class_cap: int) -> np.ndarray:
+    """Return sorted row positions holding each stratum's quota of random rows."""
+    sizes = np.bincount(strata)
+    quotas = balanced_quotas(sizes, n_rows, class_cap)
+
+    # shuffle, then group by stratum: each group is a random order of its rows
+    rng = np.random.default_rng(RANDOM_STATE)
+    shuffled = rng.permutation(len(strata))
+    grouped = shuffled[np.argsort(strata[shuffled], kind="stable")]
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(len(strata)) - np.repeat(starts, sizes)
+    keep = rank < np.repeat(quotas, sizes)
+    return np.sort(grouped[keep])
+
+
+def _column_strata(series: pd.Series) -> np.ndarray:
+    """Return a stratum code per row: one per value, or per quantile bin of a many-valued numeric column.
+
+    Missing values form a stratum of their own.
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype) and bounded_nunique(series, STRATIFY_BINS) is None:
+        series = pd.qcut(series, STRATIFY_BINS, duplicates="drop")
+    codes, _ = pd.factorize(series, use_na_sentinel=False)
+    return codes
+
+
+def _density_strata(df: pd.DataFrame, numeric_cols: list[str]) -> np.ndarray | None:
+    """Return the coarse k-means cluster of every row, fitted on a pilot sample."""
+    values = df[numeric_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+    pilot_rows = min(len(values), DENSITY_PILOT_ROWS)
+    n_clusters = min(DENSITY_CLUSTERS, pilot_rows // DENSITY_MIN_CLUSTER_ROWS)
+    if n_clusters < 2:  # noqa PLR2004
+        return None
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    pilot = values[rng.choice(len(values), pilot_rows, replace=False)]
+    # scale with pilot statistics and impute missing values with the mean (0)
+    mean = np.nanmean(pilot, axis=0)
+    std = np.nanstd(pilot, axis=0)
+    mean = np.where(np.isnan(mean), 0.0, mean)
+    std = np.where(np.isnan(std) | (std == 0), 1.0, std)
+    values = np.nan_to_num((values - mean) / std, nan=0.0)
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=RANDOM_STATE, n_init=3)
+    kmeans.fit(np.nan_to_num((pilot - mean) / std, nan=0.0))
+    return kmeans.predict(values)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import logging
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from ckanext.dimred.utils import memory as dimred_memory
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - opentelemetry-api is an optional extra
+    otel_trace = None
+
+log = logging.getLogger(__name__)
+
+TRACER_NAME = "ckanext.dimred"
+
+_recorder: contextvars.ContextVar[SpanRecorder | None] = contextvars.ContextVar("dimred_span_recorder", default=None)
+
+
+class SpanRecorder:
+    """Collect the wall time and peak memory growth of the named stages of one pipeline run.
+
+    Spans nest: a span opened inside another is named ``outer.inner``.
+    With ``opentelemetry`` every span is also exported as an OpenTelemetry
+    span (through whatever tracer provider the process configured), so
+    timings can be aggregated across workers.
+    """
+
+    def __init__(self, opentelemetry: bool = False) -> None:
+        self.spans: list[dict[str, Any]] = []
+        self._stack: list[str] = []
+        self._started = time.perf_counter()
+        self._tracer = otel_trace.get_tracer(TRACER_NAME) if opentelemetry and otel_trace else None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[None]:
+        path = ".".join([*self._stack, name])
+        self._stack.append(name)
+        peak_before = dimred_memory.peak_rss_bytes()
+        started = time.perf_counter()
+        otel_span = (
+            self._tracer.start_as_current_span(f"dimred.{path}", attributes=attributes)
+            if self._tracer
+            else contextlib.nullcontext()
+        )
+        try:
+            with otel_span:
+                yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._stack.pop()
+            record: dict[str, Any] = {"name": path, "ms": round(elapsed_ms, 1)}
+            # how much this stage raised the process high-water mark; the
+            # mark itself belongs to the process, not to this run
+            peak_growth = dimred_memory.peak_growth_mb(peak_before)
+            if peak_growth is not None:
+                record["peak_growth_mb"] = peak_growth
+            self.spans.append(record)
+
+    def total_ms(self) -> float:
+        """Return the time since the recorder was created."""
+        return round((time.perf_counter() - self._started) * 1000, 1)
+
+    def report(self) -> dict[str, Any]:
+        """Return the spans recorded so far, in the order they finished."""
+        return {"total_ms": self.total_ms(), "spans": list(self.spans)}
+
+
+@contextlib.contextmanager
+def recording(opentelemetry: bool = False) -> Iterator[SpanRecorder]:
+    """Record the spans opened in this context (and nested calls) on a new SpanRecorder.
+
+    If a recording is already active, its recorder is reused, so an outer
+    pipeline run collects the spans of the calls it makes.
+    """
+    current = _recorder.get()
+    if current is not None:
+        yield current
+        return
+
+    recorder = SpanRecorder(opentelemetry)
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def span(name: str, **attributes: Any) -> contextlib.AbstractContextManager[None]:
+    """Time a pipeline stage on the active recorder; does nothing outside ``recording``."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return contextlib.nullcontext()
+    return recorder.span(name, **attributes)
+
+
+def add_spans(spans: list[dict[str, Any]]) -> None:
+    """Add spans recorded elsewhere (e.g. in a worker process) to the active recorder, if any.
+
+    They are nested under the spans open on the recorder.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return
+    prefix = "".join(f"{name}." for name in recorder._stack)  # noqa: SLF001
+    recorder.spans.extend({**span, "name": f"{prefix}{span['name']}"} for span in spans)
+
+
+def detach() -> None:
+    """Forget the recording of the current context, e.g. one inherited by a forked process."""
+    _recorder.set(None)
+
+
+def log_report(report: dict[str, Any], **context: Any) -> None:
+    """Log a timing report as one line, with the report itself in ``extra`` for structured handlers."""
+    stages = " ".join(f"{span['name']}={span['ms']:.0f}ms" for span in report["spans"])
+    details = " ".join(f"{key}={value}" for key, value in context.items())
+    log.info(
+        "dimred timings %s total=%.0fms %s",
+        details,
+        report["total_ms"],
+        stages,
+        extra={"dimred_timings": {**context, **report}},
+    )
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from flask import Blueprint, Response
+from flask import Blueprint, Response, request
 
 import ckan.plugins.toolkit as tk
 
-from ckanext.dimred.exception import DimredError
+from ckanext.dimred.exception import DimredError, DimredRateLimitError
 
 dimred = Blueprint("dimred", __name__)
 
@@ -12,7 +12,16 @@ dimred = Blueprint("dimred", __name__)
 @dimred.route("/dimred/export/<resource_id>/<view_id>")
 def export_embedding(resource_id: str, view_id: str):
     try:
-        result = tk.get_action("dimred_export_embedding")({}, {"id": resource_id, "view_id": view_id})
+        result = tk.get_action("dimred_export_embedding")(
+            {},
+            {
+                "id": resource_id,
+                "view_id": view_id,
+                "format": request.args.get("format", "csv"),
+                "include_candidates": tk.asbool(request.args.get("candidates", False)),
+                "stream": True,
+            },
+        )
     except tk.NotAuthorized:
         return tk.abort(403, tk._("Not authorized"))
     except tk.ValidationError as err:
@@ -25,3 +34,64 @@ def export_embedding(resource_id: str, view_id: str):
         "Content-Disposition": f'attachment; filename="{result["filename"]}"',
     }
     return Response(result["content"], headers=headers)
+
+
+@dimred.route("/dimred/metrics")
+def metrics():
+    try:
+        result = tk.get_action("dimred_metrics")({}, {})
+    except tk.NotAuthorized:
+        return tk.abort(403, tk._("Not authorized"))
+
+    return Response(result["content"], content_type=result["content_type"])
+
+
+@dimred.route("/dimred/profile/<resource_id>/<view_id>")
+def profile_view(resource_id: str, view_id: str):
+    data_dict = {"id": resource_id, "view_id": view_id, "format": request.args.get("format", "speedscope")}
+    if "top" in request.args:
+        data_dict["top"] = request.args["top"]
+    try:
+        result = tk.get_action("dimred_profile_view")({}, data_dict)
+    except tk.ObjectNotFound:
+        return tk.abort(404, tk._("Resource view not found"))
+    except tk.NotAuthorized:
+        return tk.abort(403, tk._("Not authorized"))
+    except tk.ValidationError as err:
+        return tk.abort(400, str(err))
+    except DimredRateLimitError as err:
+        return tk.abort(429, str(err))
+    except DimredError as err:
+        return tk.abort(400, str(err))
+
+    headers = {
+        "Content-Type": result["content_type"],
+        "Content-Disposition": f'attachment; filename="{result["filename"]}"',
+        "Cache-Control": "no-store",
+    }
+    return Response(result["content"], headers=headers)
+
+
+@dimred.route("/dimred/image/<resource_id>/<view_id>.png")
+def embedding_image(resource_id: str, view_id: str):
+    try:
+        result = tk.get_action("dimred_get_dimred_image")({}, {"id": resource_id, "view_id": view_id})
+    except tk.ObjectNotFound:
+        return tk.abort(404, tk._("Resource view not found"))
+    except tk.NotAuthorized:
+        return tk.abort(403, tk._("Not authorized"))
+    except tk.ValidationError as err:
+        return tk.abort(400, str(err))
+    except DimredError as err:
+        return tk.abort(400, str(err))
+
+    # Resources may be private, so only the browser may keep a copy, and it
+    # has to revalidate with the ETag, which is cheap thanks to the PNG cache.
+    if result["etag"] in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(result["content"], content_type=result["content_type"])
+    response.set_etag(result["etag"])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response